@@ -5,10 +5,13 @@
 # @ Author: Mazhar
 # ""
 
+import html
 import json
 import logging
 import os
 import sys
+import time
+from functools import partial
 
 from click import UsageError
 
@@ -17,18 +20,39 @@ sys.path.append(
     os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../../"))
 )
 import warnings
-from typing import Dict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import streamlit as st
 from dotenv import load_dotenv
 from lancedb.table import Table
 from openai import OpenAI
+from utils.answer_cache import AnswerKey, CachedAnswer, answer_key, get_answer_cache
+from utils.async_chat import (
+    AsyncChatConfig,
+    AsyncChatTurn,
+    get_async_client,
+    get_background_loop,
+    get_first_token_stats,
+    run_async,
+)
+from utils.context_window import PromptBreakdown, get_conversation_window
+from utils.query_batcher import QueryBatchConfig, embed_query_batched
+from utils.reranking import RerankConfig
+from utils.retrieval import (
+    MetadataFilter,
+    RetrievalConfig,
+    SearchResult,
+    get_filter_values,
+    has_metadata_field,
+)
 from utils.sidebar_handler import handle_sidebar
+from utils.streaming import iterate_on_loop
 from utils.st_utils import (
+    append_chat_message,
     get_chat_response,
     get_context,
+    get_session_id,
     load_chat_history,
-    save_chat_history,
 )
 
 from configs import cfgs
@@ -61,6 +85,21 @@ def initialize_session() -> None:
         st.session_state.table_name = None
     if "current_input_type" not in st.session_state:
         st.session_state.current_input_type = None
+    if "history_table" not in st.session_state:
+        st.session_state.history_table = None
+    if "has_earlier_messages" not in st.session_state:
+        st.session_state.has_earlier_messages = False
+
+
+def load_history_page(
+    table_name: str, before_id: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Load one page of chat history and whether older messages exist."""
+    page_size: int = cfgs["CHAT_HISTORY"]["PAGE_SIZE"]
+    messages: List[Dict[str, Any]] = load_chat_history(
+        table_name=table_name, session_id=get_session_id(), limit=page_size + 1, before_id=before_id
+    )
+    return messages[-page_size:], len(messages) > page_size
 
 
 def main() -> None:
@@ -82,50 +121,229 @@ def main() -> None:
     if table.name == st.session_state.table_name:
         st.session_state.table = table
         st.session_state.table_name = table.name
-        st.session_state.messages = load_chat_history(file_name=table.name)
+
+    # Load the latest page of history once per table, not on every rerun
+    if st.session_state.history_table != table.name:
+        st.session_state.history_table = table.name
+        st.session_state.conversation_window = get_conversation_window(
+            window_cfgs=cfgs["LLM"]["CONTEXT_WINDOW"],
+            client=client,
+            model_name=cfgs["LLM"]["MODEL"],
+        )
+        st.session_state.messages, st.session_state.has_earlier_messages = load_history_page(
+            table_name=table.name
+        )
+
+    if st.session_state.has_earlier_messages and st.button(label="Load earlier messages"):
+        earlier, st.session_state.has_earlier_messages = load_history_page(
+            table_name=table.name, before_id=st.session_state.messages[0]["id"]
+        )
+        st.session_state.messages = earlier + st.session_state.messages
 
     # Display chat history
     for message in st.session_state.messages:
         with st.chat_message(name=message["role"]):
             st.markdown(body=message["content"])
 
+    extra_tables: List[Table] = st.session_state.get("extra_tables", [])
+    filters: MetadataFilter = select_filters(tables=[table, *extra_tables])
+
     # Handle user input
     prompt: str | None = st.chat_input(placeholder="Ask a question about the document")
     if prompt:
-        handle_chat_interaction(prompt=prompt, table=table)
+        handle_chat_interaction(
+            prompt=prompt, table=table, filters=filters, extra_tables=extra_tables
+        )
 
 
-def handle_chat_interaction(prompt: str, table: Table) -> None:
-    """Handles user input, fetches context, and returns a response."""
+def select_filters(tables: Sequence[Table]) -> MetadataFilter:
+    """Let the user narrow the search down to some files, pages or URLs."""
+    # Distinct file names are read once per table version, not on every rerun
+    key: Tuple[Tuple[str, int], ...] = tuple((table.name, table.version) for table in tables)
+    if st.session_state.get("filter_values_key") != key:
+        st.session_state.filter_values_key = key
+        st.session_state.filter_filenames = sorted(
+            {name for table in tables for name in get_filter_values(table=table, name="filename")}
+        )
+
+    filters = MetadataFilter()
+    with st.sidebar.expander(label="Search filters"):
+        if len(st.session_state.filter_filenames) > 1:
+            filters.filenames = st.multiselect(
+                label="Files", options=st.session_state.filter_filenames
+            )
+        page_from: int = st.number_input(label="From page", min_value=0, value=0, step=1)
+        page_to: int = st.number_input(label="To page (0: last)", min_value=0, value=0, step=1)
+        filters.page_from = page_from or None
+        filters.page_to = page_to or None
+        if any(has_metadata_field(table=table, name="source_url") for table in tables):
+            filters.url_prefix = (
+                st.text_input(
+                    label="URLs starting with", placeholder="https://example.com/docs/"
+                )
+                or None
+            )
+    return filters
+
+
+def handle_chat_interaction(
+    prompt: str,
+    table: Table,
+    filters: Optional[MetadataFilter] = None,
+    extra_tables: Optional[List[Table]] = None,
+) -> None:
+    """Handles user input, fetches context, and returns a response.
+
+    With ``extra_tables`` the context is retrieved from all tables at once,
+    while the conversation stays attached to ``table``. With ``LLM.ASYNC``
+    enabled the turn runs on the shared event loop, saving the question while
+    it is embedded and opening the completion stream as soon as the context
+    is found.
+    """
+    started: float = time.perf_counter()
     # Display user message
     with st.chat_message(name="user"):
         st.markdown(body=prompt)
 
     # Append user message to chat history
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    save_chat_history(file_name=table.name, messages=st.session_state.messages)
-
-    # Retrieve relevant context
-    with st.status(label="Searching document...", expanded=False):
-        context: str = get_context(query=prompt, table=table)
-        display_search_results(context=context)
+    message: Dict[str, Any] = {"role": "user", "content": prompt}
+    st.session_state.messages.append(message)
+    save_question = partial(
+        append_chat_message, table_name=table.name, session_id=get_session_id(), message=message
+    )
 
-    # Display assistant response
-    with st.chat_message(name="assistant"):
-        response: str = get_chat_response(
-            client=client,
+    batching = QueryBatchConfig.from_configs(cfgs=cfgs)
+    retrieval = RetrievalConfig.from_configs(cfgs=cfgs)
+    async_cfgs = AsyncChatConfig.from_configs(cfgs=cfgs)
+    turn: Optional[AsyncChatTurn] = None
+    query_vector: Optional[List[float]] = None
+    if async_cfgs.enabled:
+        turn = AsyncChatTurn(
+            client=get_async_client(config=async_cfgs),
+            config=async_cfgs,
             model_name=cfgs["LLM"]["MODEL"],
             temperature=cfgs["LLM"]["TEMPERATURE"],
-            messages=st.session_state.messages,
-            context=context,
+            messages=list(st.session_state.messages),
+            window=st.session_state.conversation_window,
+            started=started,
+        )
+        query_vector = run_async(
+            coro=turn.prepare(
+                tables=[table, *(extra_tables or [])],
+                persist=save_question,
+                batching=batching,
+                retrieval=retrieval,
+            )
+        )
+    else:
+        save_question()
+
+    cache_cfgs: Dict = cfgs["LLM"]["CACHE"]
+    # Answers restricted by filters, or drawn from other tables, are not shared
+    # with answers about this table alone
+    use_cache: bool = (
+        cache_cfgs["ENABLED"]
+        and not (filters and filters.active)
+        and not extra_tables
+        and (not cache_cfgs["STANDALONE_ONLY"] or len(st.session_state.messages) == 1)
+    )
+    cached: Optional[CachedAnswer] = None
+    key: Optional[AnswerKey] = None
+    if use_cache:
+        key = answer_key(
+            table=table,
+            model=cfgs["LLM"]["MODEL"],
+            temperature=cfgs["LLM"]["TEMPERATURE"],
+            bucket_size=cache_cfgs["TEMPERATURE_BUCKET"],
+        )
+        if query_vector is None:
+            query_vector = embed_query_batched(table=table, query=prompt, config=batching)
+        cached = get_answer_cache(cache_cfgs=cache_cfgs).lookup(key=key, vector=query_vector)
+
+    if cached is not None:
+        with st.status(label="Answered from cache", expanded=False):
+            st.caption(
+                body=f"Similar question ({cached.similarity:.3f}): {cached.question}"
+            )
+            display_search_results(results=cached.context)
+        with st.chat_message(name="assistant"):
+            st.markdown(body=cached.answer)
+        response: str = cached.answer
+    else:
+        search = partial(
+            get_context,
+            table=table,
+            num_results=cfgs["VECTOR_DB"]["SEARCH"]["CONTEXT_RESULTS"],
+            retrieval=retrieval,
+            filters=filters,
+            tables=extra_tables,
+            rerank=RerankConfig.from_configs(cfgs=cfgs),
+            batching=batching,
         )
+        # Retrieve relevant context
+        with st.status(label="Searching document...", expanded=False):
+            if turn is not None:
+                context: List[SearchResult] = run_async(
+                    coro=turn.retrieve(search=search, vector=query_vector)
+                )
+            else:
+                context = search(query=prompt, vector=query_vector)
+            display_search_results(results=context)
+
+        # Display assistant response
+        first_token: Dict[str, float] = {}
+        with st.chat_message(name="assistant"):
+            if turn is not None:
+                deltas = iterate_on_loop(agen=turn.stream(), loop=get_background_loop())
+                response = "".join(st.write_stream(stream=deltas))
+                first_token["ms"] = turn.timings.get("first_token_ms", turn.timings["total_ms"])
+            else:
+                response = get_chat_response(
+                    client=client,
+                    model_name=cfgs["LLM"]["MODEL"],
+                    temperature=cfgs["LLM"]["TEMPERATURE"],
+                    messages=st.session_state.messages,
+                    context=context,
+                    window=st.session_state.conversation_window,
+                    on_first_token=lambda: first_token.setdefault(
+                        "ms", (time.perf_counter() - started) * 1000
+                    ),
+                )
+        path: str = "async" if turn is not None else "sync"
+        if "ms" in first_token:
+            get_first_token_stats().record(path=path, ttft_ms=first_token["ms"])
+        if cfgs["UI"]["SHOW_STATS"]:
+            display_prompt_breakdown(
+                breakdown=st.session_state.conversation_window.last_breakdown
+            )
+            if "ms" in first_token:
+                st.caption(body=f"First token after {first_token['ms']:.0f} ms ({path} path)")
+
+        if key is not None and query_vector is not None:
+            get_answer_cache(cache_cfgs=cache_cfgs).store(
+                key=key, question=prompt, vector=query_vector, answer=response, context=context
+            )
 
     # Append assistant response to chat history
-    st.session_state.messages.append({"role": "assistant", "content": response})
-    save_chat_history(file_name=table.name, messages=st.session_state.messages)
+    message = {"role": "assistant", "content": response}
+    append_chat_message(table_name=table.name, session_id=get_session_id(), message=message)
+    st.session_state.messages.append(message)
+
+
+def display_prompt_breakdown(breakdown: Optional[PromptBreakdown]) -> None:
+    """Shows how the prompt tokens of the last request were spent."""
+    if breakdown is None:
+        return
+    st.caption(
+        body=f"Prompt tokens: {breakdown.total}/{breakdown.budget} "
+        f"(system {breakdown.system}, context {breakdown.context}, "
+        f"summary {breakdown.summary}, history {breakdown.history}) · "
+        f"{breakdown.history_messages} messages kept, {breakdown.dropped_messages} dropped · "
+        f"{breakdown.context_chunks} chunks kept, {breakdown.dropped_chunks} dropped"
+    )
 
 
-def display_search_results(context: str) -> None:
+def display_search_results(results: Sequence[SearchResult]) -> None:
     """Formats and displays search results from the document."""
     st.markdown(
         """
@@ -155,17 +373,11 @@ def display_search_results(context: str) -> None:
     )
 
     st.write("Found relevant sections:")
-    for chunk in context.split(sep="\n\n"):
-        parts: list[str] = chunk.split(sep="\n")
-        text: str = parts[0]
-        metadata: Dict[str, str] = {
-            line.split(sep=": ")[0]: line.split(sep=": ")[1]
-            for line in parts[1:]
-            if ": " in line
-        }
-
-        source: str = metadata.get("Source", "Unknown source")
-        title: str = metadata.get("Title", "Untitled section")
+    for result in results:
+        source: str = html.escape(result.source)
+        if result.table:
+            source = f"[{html.escape(result.table)}] {source}"
+        title: str = html.escape(result.title or "Untitled section")
 
         st.markdown(
             body=f"""
@@ -173,7 +385,7 @@ def display_search_results(context: str) -> None:
                 <details>
                     <summary>{source}</summary>
                     <div class="metadata">Section: {title}</div>
-                    <div style="margin-top: 8px;">{text}</div>
+                    <div style="margin-top: 8px;">{html.escape(result.text)}</div>
                 </details>
             </div>
             """,
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+# """
+# batch_ingestion.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
+
+import argparse
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from docling.datamodel.base_models import ConversionStatus
+from docling.datamodel.document import ConversionResult
+from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
+from lancedb.table import Table
+from utils.converters import ConverterKind, get_converter_registry, kind_for_source
+from utils.streaming import staged
+from utils.tokenizer import OpenAITokenizerWrapper
+
+from configs import cfgs
+from src.app.chunking import initialize_chunker
+from src.app.embedding import (
+    IngestStats,
+    get_batch_embedder,
+    open_ingest_table,
+    page_metadata,
+    process_chunk,
+    sync_rows,
+)
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+# File types picked up when a directory is given as a source
+DOCUMENT_SUFFIXES = (".pdf", ".docx", ".pptx", ".html", ".htm", ".md")
+
+
+@dataclass
+class DocumentReport:
+    """Outcome and timings of one document in a batch."""
+
+    source: str
+    chunks: int = 0
+    tokens: int = 0
+    chunk_ids: List[str] = field(default_factory=list)
+    convert_seconds: float = 0.0
+    chunk_seconds: float = 0.0
+    worker: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class _DocumentResult:
+    report: DocumentReport
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class BatchIngestResult:
+    """Table, counters and per-document reports of a batch ingestion."""
+
+    table: Table
+    stats: IngestStats
+    documents: List[DocumentReport]
+
+    @property
+    def failed(self) -> List[DocumentReport]:
+        return [report for report in self.documents if not report.ok]
+
+
+# Per-process state of a pool worker, set up once by ``_init_worker``
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(max_tokens: int, do_ocr: bool, kinds: List[ConverterKind]) -> None:
+    # Load the conversion models and the chunker once per worker, not per document.
+    # A failing warm-up must not break the pool; the documents needing that
+    # converter then fail one by one with the actual error.
+    for kind in kinds:
+        try:
+            get_converter_registry().get(kind=kind, do_ocr=do_ocr)
+        except Exception as e:
+            logger.warning(msg=f"Could not load the {kind} converter: {e}")
+    _worker["chunker"] = initialize_chunker(max_tokens=max_tokens)
+    _worker["tokenizer"] = OpenAITokenizerWrapper()
+    _worker["do_ocr"] = do_ocr
+
+
+def _process_source(source: str, kind: Optional[ConverterKind]) -> _DocumentResult:
+    report = DocumentReport(source=source, worker=os.getpid())
+    try:
+        start: float = time.perf_counter()
+        result: ConversionResult = get_converter_registry().convert(
+            source=source,
+            kind=kind or kind_for_source(source=source),
+            do_ocr=_worker["do_ocr"],
+            raises_on_error=False,
+        )
+        report.convert_seconds = time.perf_counter() - start
+        if result.status not in (ConversionStatus.SUCCESS, ConversionStatus.PARTIAL_SUCCESS):
+            errors: str = "; ".join(error.error_message for error in result.errors)
+            report.error = f"conversion {result.status.value}: {errors}"
+            return _DocumentResult(report=report)
+
+        page: Optional[Dict[str, Any]] = None
+        if "://" in source:
+            page = page_metadata(
+                url=source, fetched_at=time.time(), content_hash=result.input.document_hash
+            )
+
+        start = time.perf_counter()
+        chunker: HybridChunker = _worker["chunker"]
+        rows: List[Dict[str, Any]] = [
+            process_chunk(chunk=chunk, page=page) for chunk in chunker.chunk(dl_doc=result.document)
+        ]
+        report.chunk_seconds = time.perf_counter() - start
+        report.chunks = len(rows)
+        report.chunk_ids = [row["chunk_id"] for row in rows]
+        tokenizer: OpenAITokenizerWrapper = _worker["tokenizer"]
+        report.tokens = sum(tokenizer.count_tokens_batch(texts=[row["text"] for row in rows]))
+        return _DocumentResult(report=report, rows=rows)
+    except Exception as e:
+        report.error = f"{type(e).__name__}: {e}"
+        return _DocumentResult(report=report)
+
+
+def collect_sources(inputs: Iterable[str]) -> List[str]:
+    """
+    Expand directories into the documents they contain.
+
+    Args:
+        inputs: File paths, directories and URLs
+
+    Returns:
+        List[str]: Document paths and URLs, directories expanded recursively
+    """
+    sources: List[str] = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                sources.extend(
+                    os.path.join(root, name)
+                    for name in sorted(files)
+                    if name.lower().endswith(DOCUMENT_SUFFIXES)
+                )
+        else:
+            sources.append(item)
+    return sources
+
+
+def iter_pool_rows(
+    sources: List[str],
+    max_tokens: int,
+    workers: int,
+    stats: IngestStats,
+    reports: List[DocumentReport],
+    kind: Optional[ConverterKind] = None,
+    do_ocr: bool = True,
+    on_document: Optional[Callable[[DocumentReport], None]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Convert and chunk documents in a process pool and yield their rows.
+
+    At most ``MAX_PENDING_PER_WORKER`` documents per worker are in flight, so
+    results do not pile up in memory. A failing document is reported and
+    skipped. If a worker dies the pool is restarted and the documents that
+    were in flight are reported as failed.
+
+    Args:
+        sources: Document paths or URLs
+        max_tokens: Maximum tokens per chunk
+        workers: Number of worker processes
+        stats: Counters updated as documents complete
+        reports: Receives one report per document, in completion order
+        kind: Converter kind, guessed from each source if omitted
+        do_ocr: Whether the PDF pipeline runs OCR
+        on_document: Called with each report as its document completes
+
+    Returns:
+        Iterator[Dict[str, Any]]: Rows ready for embedding
+    """
+    pool_cfgs: Dict[str, Any] = cfgs["INGESTION"]["POOL"]
+    kinds: List[ConverterKind] = (
+        [kind] if kind else sorted({kind_for_source(source=source) for source in sources})
+    )
+    max_pending: int = workers * pool_cfgs["MAX_PENDING_PER_WORKER"]
+    remaining: Iterator[str] = iter(sources)
+    exhausted: bool = False
+
+    def record(report: DocumentReport) -> None:
+        reports.append(report)
+        stats.documents += 1
+        if report.ok:
+            logger.info(
+                msg=f"{report.source}: {report.chunks} chunks, convert "
+                f"{report.convert_seconds:.2f}s, chunk {report.chunk_seconds:.2f}s "
+                f"(pid {report.worker})"
+            )
+        else:
+            stats.failed += 1
+            logger.warning(msg=f"{report.source} failed: {report.error}")
+        if on_document is not None:
+            on_document(report)
+
+    while True:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(method=pool_cfgs["START_METHOD"]),
+            initializer=_init_worker,
+            initargs=(max_tokens, do_ocr, kinds),
+        ) as pool:
+            pending: Dict[Future, str] = {}
+            broken: bool = False
+            while not broken:
+                while not exhausted and len(pending) < max_pending:
+                    source: Optional[str] = next(remaining, None)
+                    if source is None:
+                        exhausted = True
+                        break
+                    pending[pool.submit(_process_source, source, kind)] = source
+                if not pending:
+                    break
+
+                done: Set[Future]
+                done, _ = wait(fs=list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    source = pending.pop(future)
+                    try:
+                        result: _DocumentResult = future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        record(report=DocumentReport(source=source, error=f"worker died: {e}"))
+                        continue
+                    record(report=result.report)
+                    stats.chunks += len(result.rows)
+                    yield from result.rows
+
+            # Every document still in flight is lost with a broken pool
+            for source in pending.values():
+                record(report=DocumentReport(source=source, error="worker pool crashed"))
+
+        if not broken or exhausted:
+            return
+        logger.warning(msg="Worker pool crashed, restarting it")
+
+
+def ingest_sources(
+    sources: List[str],
+    max_tokens: int,
+    db_path: str,
+    table_name: str,
+    llm_provider: str,
+    embed_model: str,
+    mode: str = "overwrite",
+    workers: Optional[int] = None,
+    kind: Optional[ConverterKind] = None,
+    do_ocr: bool = True,
+    on_progress: Optional[Callable[[IngestStats], None]] = None,
+    on_document: Optional[Callable[[DocumentReport], None]] = None,
+    keep_ids: Optional[Set[str]] = None,
+    on_committed: Optional[Callable[[List[str]], None]] = None,
+    stale_scope: Optional[Set[str]] = None,
+    on_deleted: Optional[Callable[[List[str]], None]] = None,
+) -> BatchIngestResult:
+    """
+    Ingest many documents, converting and chunking them in parallel processes.
+
+    Conversion and chunking are CPU-bound and run in a process pool with warm
+    converters in every worker. Rows are streamed back and written by this
+    process alone, through the same embedding and write pipeline as
+    ``ingest_documents``.
+
+    Args:
+        sources: Document paths or URLs
+        max_tokens: Maximum tokens per chunk
+        db_path: Path to the database
+        table_name: Name of the table
+        llm_provider: Name of the LLM provider
+        embed_model: Name of the embedding model
+        mode: Table creation mode ("create", "overwrite" or "upsert")
+        workers: Number of worker processes, ``INGESTION.POOL.WORKERS`` or the CPU count if omitted
+        kind: Converter kind, guessed from each source if omitted
+        do_ocr: Whether the PDF pipeline runs OCR
+        on_progress: Called with the counters after every written batch
+        on_document: Called with each document report as it completes, before its
+            rows are written
+        keep_ids: Stored chunks not to delete in upsert mode (see ``sync_rows``)
+        on_committed: Called with the ids of rows once they are durably stored
+        stale_scope: Stored chunks an upsert may delete (see ``sync_rows``)
+        on_deleted: Called with the ids of the stale chunks once they are deleted
+
+    Returns:
+        BatchIngestResult: Table, counters and per-document reports
+    """
+    workers = workers or cfgs["INGESTION"]["POOL"]["WORKERS"] or os.cpu_count() or 1
+    workers = max(1, min(workers, len(sources)))
+    table: Table = open_ingest_table(
+        db_path=db_path,
+        table_name=table_name,
+        llm_provider=llm_provider,
+        embed_model=embed_model,
+        mode=mode,
+    )
+    stats = IngestStats()
+    reports: List[DocumentReport] = []
+    rows: Iterator[Dict[str, Any]] = staged(
+        iterable=iter_pool_rows(
+            sources=sources,
+            max_tokens=max_tokens,
+            workers=workers,
+            stats=stats,
+            reports=reports,
+            kind=kind,
+            do_ocr=do_ocr,
+            on_document=on_document,
+        ),
+        maxsize=cfgs["INGESTION"]["QUEUE_SIZE"],
+        name="pool",
+    )
+    sync_rows(
+        table=table,
+        rows=rows,
+        mode=mode,
+        embedder=get_batch_embedder(table=table),
+        stats=stats,
+        on_progress=on_progress,
+        keep_ids=keep_ids,
+        on_committed=on_committed,
+        stale_scope=stale_scope,
+        on_deleted=on_deleted,
+    )
+    return BatchIngestResult(table=table, stats=stats, documents=reports)
+
+
+def main() -> None:
+    """Ingest files, directories or URLs into one table."""
+    parser = argparse.ArgumentParser(description="Parallel batch ingestion")
+    parser.add_argument("sources", nargs="+", help="Files, directories or URLs")
+    parser.add_argument("--table", default=cfgs["VECTOR_DB"]["TABLE_NAME"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--mode", default=cfgs["VECTOR_DB"]["MODE"])
+    args: argparse.Namespace = parser.parse_args()
+
+    result: BatchIngestResult = ingest_sources(
+        sources=collect_sources(inputs=args.sources),
+        max_tokens=cfgs["LLM"]["MAX_TOKENS"],
+        db_path=cfgs["VECTOR_DB"]["URI"],
+        table_name=args.table,
+        llm_provider=cfgs["LLM"]["PROVIDER"],
+        embed_model=cfgs["EMBEDDINGS"]["MODEL"],
+        mode=args.mode,
+        workers=args.workers,
+        do_ocr=cfgs["CONVERSION"]["DO_OCR"],
+    )
+
+    for report in result.documents:
+        status: str = "ok" if report.ok else f"FAILED ({report.error})"
+        print(
+            f"{report.source}: {status} chunks={report.chunks} "
+            f"convert={report.convert_seconds:.2f}s chunk={report.chunk_seconds:.2f}s"
+        )
+    print(f"{result.stats}")
+
+
+if __name__ == "__main__":
+    main()
+
+# Usage
+# uv run python src/app/batch_ingestion.py data/pdfs --table reports --workers 16
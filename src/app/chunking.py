@@ -12,14 +12,15 @@ import sys
 # Add the project root directory to Python path
 sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
 
-from typing import Iterator, List
+from typing import Iterator, List, Optional, Union
 
 from docling.datamodel.document import ConversionResult
-from docling.document_converter import DocumentConverter
 from docling_core.transforms.chunker.base import BaseChunk
+from docling_core.transforms.chunker.hierarchical_chunker import DocChunk
 from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
 from dotenv import load_dotenv
 from openai import OpenAI
+from utils.converters import get_converter_registry, kind_for_source
 from utils.tokenizer import OpenAITokenizerWrapper
 
 from configs import cfgs
@@ -27,6 +28,26 @@ from configs import cfgs
 load_dotenv()
 
 
+class OpenAIHybridChunker(HybridChunker):
+    """HybridChunker counting tokens with the memoized fast path of ``OpenAITokenizerWrapper``.
+
+    The stock implementation tokenizes every candidate window into a list of
+    strings just to take its length; merging peers re-counts the same spans
+    over and over, so the counts are served from the wrapper's LRU instead.
+    """
+
+    def _count_text_tokens(self, text: Optional[Union[str, list[str]]]) -> int:
+        if isinstance(text, str) and isinstance(self.tokenizer, OpenAITokenizerWrapper):
+            return self.tokenizer.count_tokens(text=text)
+        # None, or a list whose items come back here one by one
+        return super()._count_text_tokens(text=text)
+
+    def _count_chunk_tokens(self, doc_chunk: DocChunk) -> int:
+        if isinstance(self.tokenizer, OpenAITokenizerWrapper):
+            return self.tokenizer.count_tokens(text=self.serialize(chunk=doc_chunk))
+        return super()._count_chunk_tokens(doc_chunk=doc_chunk)
+
+
 def initialize_chunker(max_tokens: int) -> HybridChunker:
     """
     Initialize the HybridChunker with OpenAI tokenizer.
@@ -38,7 +59,7 @@ def initialize_chunker(max_tokens: int) -> HybridChunker:
         HybridChunker: Initialized chunker
     """
     tokenizer = OpenAITokenizerWrapper()
-    return HybridChunker(
+    return OpenAIHybridChunker(
         tokenizer=tokenizer,
         max_tokens=max_tokens,
         merge_peers=True,
@@ -57,8 +78,9 @@ def chunk_document(source_path: str, max_tokens: int) -> List[BaseChunk]:
         List[BaseChunk]: List of document chunks
     """
     # Convert document
-    converter = DocumentConverter()
-    result: ConversionResult = converter.convert(source=source_path)
+    result: ConversionResult = get_converter_registry().convert(
+        source=source_path, kind=kind_for_source(source=source_path)
+    )
 
     # Initialize chunker and process document
     chunker: HybridChunker = initialize_chunker(max_tokens=max_tokens)
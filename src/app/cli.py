@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# """
+# cli.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
+# and the app directory, which is not on it when run as the ``hybrid-rag`` entry point
+sys.path.append(os.path.abspath(path=os.path.dirname(p=__file__)))
+
+import argparse
+import glob
+import logging
+import time
+from typing import List, Optional
+
+from utils.checkpoint import (
+    CheckpointManifest,
+    CheckpointTracker,
+    get_checkpoint_manifest,
+    plan_resume,
+    upsert_scope,
+)
+from utils.sitemap import get_sitemap_urls
+
+from configs import cfgs
+from src.app.batch_ingestion import (
+    BatchIngestResult,
+    DocumentReport,
+    collect_sources,
+    ingest_sources,
+)
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+PROJECT_ROOT: str = os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../.."))
+
+
+def _project_path(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def expand_inputs(inputs: List[str], url_files: List[str], sitemaps: List[str]) -> List[str]:
+    """
+    Turn the command line inputs into a deduplicated list of sources.
+
+    Args:
+        inputs: Files, directories, glob patterns and URLs
+        url_files: Files listing one URL or path per line, ``#`` starting a comment
+        sitemaps: Websites whose sitemap lists the pages to ingest
+
+    Returns:
+        List[str]: Document paths and URLs, in input order
+    """
+    items: List[str] = []
+    for item in inputs:
+        if "://" not in item and glob.has_magic(s=item):
+            items.extend(sorted(glob.glob(pathname=item, recursive=True)))
+        else:
+            items.append(item)
+    for url_file in url_files:
+        with open(file=url_file, encoding="utf-8") as f:
+            items.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    for sitemap in sitemaps:
+        items.extend(get_sitemap_urls(base_url=sitemap))
+    return list(dict.fromkeys(collect_sources(inputs=items)))
+
+
+def ingest_command(args: argparse.Namespace) -> int:
+    """Run ``hybrid-rag ingest``; returns the process exit code."""
+    sources: List[str] = expand_inputs(
+        inputs=args.sources, url_files=args.urls, sitemaps=args.sitemap
+    )
+    if not sources:
+        print("No documents found", file=sys.stderr)
+        return 2
+
+    manifest: CheckpointManifest = get_checkpoint_manifest(
+        path=_project_path(path=args.manifest), table_name=args.table
+    )
+    if args.mode != "upsert" or args.refresh:
+        # The table is rebuilt (or explicitly re-ingested), so nothing can be skipped
+        manifest.reset()
+    todo, done, hashes = plan_resume(manifest=manifest, sources=sources)
+    skipped: int = len(sources) - len(todo)
+    print(f"{len(sources)} sources: {len(todo)} to ingest, {skipped} already done")
+    if not todo:
+        return 0
+
+    # Other sources of the table, in this run or not, keep their chunks
+    keep_ids, stale_scope = upsert_scope(manifest=manifest, todo=todo)
+    tracker = CheckpointTracker(manifest=manifest, hashes=hashes)
+    reports: List[DocumentReport] = []
+
+    def on_document(report: DocumentReport) -> None:
+        tracker.document(
+            source=report.source,
+            chunk_ids=report.chunk_ids,
+            tokens=report.tokens,
+            error=report.error,
+        )
+        if not args.quiet:
+            status: str = "ok" if report.ok else f"FAILED ({report.error})"
+            print(
+                f"[{skipped + len(reports) + 1}/{len(sources)}] {report.source}: {status} "
+                f"chunks={report.chunks} tokens={report.tokens} "
+                f"convert={report.convert_seconds:.2f}s chunk={report.chunk_seconds:.2f}s"
+            )
+        reports.append(report)
+
+    start: float = time.perf_counter()
+    result: BatchIngestResult = ingest_sources(
+        sources=todo,
+        max_tokens=cfgs["LLM"]["MAX_TOKENS"],
+        db_path=_project_path(path=cfgs["VECTOR_DB"]["URI"]),
+        table_name=args.table,
+        llm_provider=cfgs["LLM"]["PROVIDER"],
+        embed_model=cfgs["EMBEDDINGS"]["MODEL"],
+        mode=args.mode,
+        workers=args.workers,
+        do_ocr=cfgs["CONVERSION"]["DO_OCR"],
+        on_document=on_document,
+        keep_ids=keep_ids,
+        on_committed=tracker.committed,
+        stale_scope=stale_scope,
+        on_deleted=tracker.deleted,
+    )
+    seconds: float = max(time.perf_counter() - start, 1e-9)
+
+    stats = result.stats
+    tokens: int = sum(report.tokens for report in result.documents)
+    print(
+        f"Ingested {stats.documents} sources into {args.table} in {seconds:.1f}s: "
+        f"{stats.documents / seconds:.2f} pages/s, {stats.chunks / seconds:.1f} chunks/s, "
+        f"{tokens / seconds:.0f} tokens/s"
+    )
+    print(
+        f"chunks={stats.chunks} inserted={stats.inserted} unchanged={stats.unchanged} "
+        f"deleted={stats.deleted} failed={stats.failed} checkpointed={tracker.done}"
+    )
+    return 1 if result.failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argument parser of the ``hybrid-rag`` command."""
+    parser = argparse.ArgumentParser(prog="hybrid-rag", description="Hybrid RAG tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser(
+        "ingest",
+        help="Ingest documents into a table",
+        description="Convert, chunk, embed and store documents. Sources completed by an "
+        "earlier run are skipped unless they changed, so an interrupted run resumes.",
+    )
+    ingest.add_argument(
+        "sources", nargs="*", help="Files, directories, glob patterns (quoted) or URLs"
+    )
+    ingest.add_argument(
+        "--urls", action="append", default=[], metavar="FILE", help="File with one URL per line"
+    )
+    ingest.add_argument(
+        "--sitemap", action="append", default=[], metavar="URL", help="Website to crawl"
+    )
+    ingest.add_argument("--table", default=cfgs["VECTOR_DB"]["TABLE_NAME"])
+    ingest.add_argument("--workers", type=int, default=None)
+    ingest.add_argument(
+        "--mode",
+        default="upsert",
+        choices=["create", "overwrite", "upsert"],
+        help="Only upsert resumes from the checkpoint manifest",
+    )
+    ingest.add_argument("--manifest", default=cfgs["INGESTION"]["CHECKPOINT"]["PATH"])
+    ingest.add_argument(
+        "--refresh", action="store_true", help="Ignore the checkpoints and re-ingest everything"
+    )
+    ingest.add_argument("--quiet", action="store_true", help="Only print the final stats")
+    ingest.set_defaults(handler=ingest_command)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the ``hybrid-rag`` command."""
+    args: argparse.Namespace = build_parser().parse_args(args=argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# Usage, from the project root (``uv sync`` installs the ``hybrid-rag`` entry point)
+# uv run hybrid-rag ingest data/pdfs "data/**/*.md" --table reports --workers 16
+# uv run hybrid-rag ingest --sitemap https://docs.example.com --urls extra_urls.txt
@@ -5,30 +5,57 @@
 # @ Author: Mazhar
 # ""
 
+import hashlib
+import json
+import logging
 import os
 import sys
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse
 
 # Add the project root directory to Python path
 sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
 
-from typing import Any, Dict, Iterator, List
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, cast
 
 import lancedb
+import pyarrow as pa
+import pyarrow.compute as pc
 from docling.datamodel.document import ConversionResult
-from docling.document_converter import DocumentConverter
 from docling_core.transforms.chunker.base import BaseChunk
 from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
+from docling_core.types.doc.document import DoclingDocument
 from dotenv import load_dotenv
-from lancedb.embeddings import get_registry
+from lancedb.embeddings import OpenAIEmbeddings, get_registry
 from lancedb.pydantic import LanceModel, Vector
-from lancedb.table import Table
+from lancedb.table import LanceTable, Table
 from openai import OpenAI
+from utils.batch_embedder import BatchEmbedder
+from utils.converters import get_converter_registry, kind_for_source
+from utils.crawler import CrawlState, FetchedPage, get_crawl_state
+from utils.embedding_cache import CachedEmbeddings
+from utils.indexing import ensure_fts_index, ensure_scalar_indexes, ensure_vector_index
+from utils.streaming import batched, staged
 from utils.tokenizer import OpenAITokenizerWrapper
 
 from configs import cfgs
+from src.app.chunking import initialize_chunker
+from src.app.extraction import iter_site_documents
 
 load_dotenv()
 
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+# Largest number of ids put into a single ``chunk_id IN (...)`` delete predicate
+DELETE_BATCH_SIZE = 500
+
+# Metadata of web pages; fetch times are left out of chunk ids, and the other
+# fields only count once set, so chunks of files keep the ids they always had
+PAGE_METADATA = ("content_hash", "fetched_at", "source_url")
+UNHASHED_METADATA = ("fetched_at",)
+
 
 class ChunkMetadata(LanceModel):
     """
@@ -36,8 +63,11 @@ class ChunkMetadata(LanceModel):
     Fields must be in alphabetical order (Pydantic requirement).
     """
 
+    content_hash: str | None
+    fetched_at: str | None
     filename: str | None
     page_numbers: List[int] | None
+    source_url: str | None
     title: str | None
 
 
@@ -52,17 +82,28 @@ def get_chunks(max_tokens: int, source_path: str) -> List[BaseChunk]:
     Returns:
         List[BaseChunk]: List of document chunks
     """
-    tokenizer = OpenAITokenizerWrapper()
-    converter = DocumentConverter()
-    result: ConversionResult = converter.convert(source=source_path)
-
-    chunker = HybridChunker(
-        tokenizer=tokenizer,
-        max_tokens=max_tokens,
-        merge_peers=True,
+    result: ConversionResult = get_converter_registry().convert(
+        source=source_path, kind=kind_for_source(source=source_path)
     )
+    return chunk_docling_document(document=result.document, max_tokens=max_tokens)
+
+
+def chunk_docling_document(document: DoclingDocument, max_tokens: int) -> List[BaseChunk]:
+    """
+    Chunk an already converted document.
+
+    Chunking the ``DoclingDocument`` directly keeps the page provenance of every
+    item, which is lost when the document is exported to markdown and converted again.
 
-    chunk_iter: Iterator[BaseChunk] = chunker.chunk(dl_doc=result.document)
+    Args:
+        document: Converted Docling document
+        max_tokens: Maximum tokens per chunk
+
+    Returns:
+        List[BaseChunk]: List of document chunks
+    """
+    chunker: HybridChunker = initialize_chunker(max_tokens=max_tokens)
+    chunk_iter: Iterator[BaseChunk] = chunker.chunk(dl_doc=document)
     return list(chunk_iter)
 
 
@@ -80,6 +121,33 @@ def initialize_database(db_path: str) -> lancedb.DBConnection:
     return lancedb.connect(uri=db_path)
 
 
+def get_embedding_function(llm_provider: str, embed_model: str) -> Any:
+    """
+    Get the registry embedding function, wrapped in the on-disk cache if enabled.
+
+    Args:
+        llm_provider: Name of the LLM provider
+        embed_model: Name of the embedding model
+
+    Returns:
+        Any: LanceDB embedding function
+    """
+    cache_cfgs: Dict[str, Any] = cfgs["EMBEDDINGS"]["CACHE"]
+    if not cache_cfgs["ENABLED"]:
+        return get_registry().get(name=llm_provider).create(name=embed_model)
+
+    return (
+        get_registry()
+        .get(name="cached")
+        .create(
+            provider=llm_provider,
+            name=embed_model,
+            cache_path=cache_cfgs["PATH"],
+            max_entries=cache_cfgs["MAX_ENTRIES"],
+        )
+    )
+
+
 def create_table(
     db: lancedb.DBConnection,
     table_name: str,
@@ -90,18 +158,31 @@ def create_table(
     """
     Create a LanceDB table with the specified schema.
 
+    With ``mode="upsert"`` an existing table is opened as is so new chunks can be
+    merged into it. It is only recreated when it predates the ``chunk_id`` column.
+
     Args:
         db: Database connection
         table_name: Name of the table
         llm_provider: Name of the LLM provider
         embed_model: Name of the embedding model
-        mode: Table creation mode
+        mode: Table creation mode ("create", "overwrite" or "upsert")
 
     Returns:
         Table: Created LanceDB table
     """
+    if mode == "upsert":
+        if table_name in db.table_names():
+            table: Table = db.open_table(name=table_name)
+            if "chunk_id" in table.schema.names:
+                return table
+            logger.warning(msg=f"Table {table_name} has no chunk_id column, recreating it")
+            mode = "overwrite"
+        else:
+            mode = "create"
+
     # Get the embedding function
-    func: Any = get_registry().get(name=llm_provider).create(name=embed_model)
+    func: Any = get_embedding_function(llm_provider=llm_provider, embed_model=embed_model)
 
     # Create dynamic Chunks class with proper Vector initialization
     class Chunks(LanceModel):
@@ -110,6 +191,14 @@ def create_table(
         text: str = func.SourceField()
         vector: Vector(dim=func.ndims()) = func.VectorField()  # type: ignore
         metadata: ChunkMetadata
+        chunk_id: str
+        # Copies of metadata fields used in filters, since Lance only builds
+        # scalar indexes on top-level columns
+        filename: str | None
+        title: str | None
+        source_url: str | None
+        page_start: int | None
+        page_end: int | None
 
     return db.create_table(
         name=table_name,
@@ -118,6 +207,134 @@ def create_table(
     )
 
 
+def get_batch_embedder(table: Table) -> Optional[BatchEmbedder]:
+    """
+    Build a batch embedder matching the table's embedding function.
+
+    Only OpenAI models are embedded outside LanceDB. For other providers ``None``
+    is returned and LanceDB embeds on write as before.
+
+    Args:
+        table: LanceDB table
+
+    Returns:
+        Optional[BatchEmbedder]: Embedder, or ``None`` if batching does not apply
+    """
+    batch_cfgs: Dict[str, Any] = cfgs["EMBEDDINGS"]["BATCH"]
+    if not batch_cfgs["ENABLED"] or "vector" not in table.embedding_functions:
+        return None
+
+    function = table.embedding_functions["vector"].function
+    # The registry decorators type both classes as EmbeddingFunction, so the checks
+    # narrow ``function`` and the settings are read through ``func``
+    func: Any = function
+    cache: Any = None
+    if isinstance(function, CachedEmbeddings):
+        cache = func.get_cache()
+        if func.provider != "openai":
+            return None
+    elif not isinstance(function, OpenAIEmbeddings):
+        return None
+
+    return BatchEmbedder(
+        model=func.name,
+        ndims=func.ndims(),
+        dimensions=func.dim,
+        max_batch_tokens=batch_cfgs["MAX_TOKENS"],
+        max_batch_items=batch_cfgs["MAX_ITEMS"],
+        max_in_flight=batch_cfgs["MAX_IN_FLIGHT"],
+        max_retries=batch_cfgs["MAX_RETRIES"],
+        base_url=batch_cfgs["BASE_URL"],
+        cache=cache,
+    )
+
+
+def compute_chunk_id(text: str, metadata: Dict[str, Any]) -> str:
+    """
+    Stable content hash identifying a chunk.
+
+    Whitespace is normalized so re-extractions that only reflow the text keep
+    the same id.
+
+    Args:
+        text: Chunk text
+        metadata: Chunk metadata
+
+    Returns:
+        str: Hex sha256 digest of the normalized text and metadata
+    """
+    normalized: str = " ".join(text.split())
+    hashed: Dict[str, Any] = {
+        key: value
+        for key, value in metadata.items()
+        if key not in UNHASHED_METADATA and (value is not None or key not in PAGE_METADATA)
+    }
+    payload: str = json.dumps(obj=hashed, sort_keys=True, default=str)
+    return hashlib.sha256(f"{normalized}\x00{payload}".encode()).hexdigest()
+
+
+def page_metadata(url: str, fetched_at: float, content_hash: str) -> Dict[str, Any]:
+    """
+    Metadata shared by every chunk of a web page.
+
+    Args:
+        url: URL of the page
+        fetched_at: Fetch time, seconds since the epoch
+        content_hash: Hash of the page content
+
+    Returns:
+        Dict[str, Any]: ``source_url``, ``fetched_at`` (ISO 8601, UTC) and ``content_hash``
+    """
+    return {
+        "content_hash": content_hash,
+        "fetched_at": datetime.fromtimestamp(fetched_at, tz=timezone.utc).isoformat(
+            timespec="seconds"
+        ),
+        "source_url": url,
+    }
+
+
+def process_chunk(chunk: BaseChunk, page: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Process a chunk into the format required for the database.
+
+    Args:
+        chunk: Document chunk
+        page: Metadata of the web page the chunk comes from (see ``page_metadata``)
+
+    Returns:
+        Dict[str, Any]: Row ready for database insertion
+    """
+    metadata: Dict[str, Any] = {
+        **dict.fromkeys(PAGE_METADATA),
+        **(page or {}),
+        "filename": chunk.meta.origin.filename,  # type: ignore
+        "page_numbers": [
+            page_no
+            for page_no in sorted(
+                set(
+                    prov.page_no
+                    for item in chunk.meta.doc_items  # type: ignore
+                    for prov in item.prov
+                )
+            )
+        ]
+        or None,
+        "title": getattr(chunk.meta, "title", None),
+    }
+    page_numbers: Optional[List[int]] = metadata["page_numbers"]
+    return {
+        "text": chunk.text,
+        "metadata": metadata,
+        "chunk_id": compute_chunk_id(text=chunk.text, metadata=metadata),
+        "filename": metadata["filename"],
+        "title": metadata["title"],
+        "source_url": metadata["source_url"],
+        "page_start": page_numbers[0] if page_numbers else None,
+        "page_end": page_numbers[-1] if page_numbers else None,
+    }
+
+
 def process_chunks(chunks: List[BaseChunk]) -> List[Dict[str, Any]]:
     """
     Process chunks into the format required for the database.
@@ -128,27 +345,538 @@ def process_chunks(chunks: List[BaseChunk]) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: Processed chunks ready for database insertion
     """
-    return [
-        {
-            "text": chunk.text,
-            "metadata": {
-                "filename": chunk.meta.origin.filename,  # type: ignore
-                "page_numbers": [
-                    page_no
-                    for page_no in sorted(
-                        set(
-                            prov.page_no
-                            for item in chunk.meta.doc_items  # type: ignore
-                            for prov in item.prov
-                        )
-                    )
-                ]
-                or None,
-                "title": getattr(chunk.meta, "title", None),
-            },
-        }
-        for chunk in chunks
-    ]
+    return [process_chunk(chunk=chunk) for chunk in chunks]
+
+
+def iter_chunk_rows(
+    documents: Iterable[DoclingDocument], max_tokens: int, stats: "IngestStats"
+) -> Iterator[Dict[str, Any]]:
+    """
+    Chunk documents one at a time and yield database rows.
+
+    Only the document currently being chunked is held in memory.
+
+    Args:
+        documents: Converted documents
+        max_tokens: Maximum tokens per chunk
+        stats: Counters updated as documents and chunks go by
+
+    Returns:
+        Iterator[Dict[str, Any]]: Rows ready for embedding
+    """
+    chunker: HybridChunker = initialize_chunker(max_tokens=max_tokens)
+    for document in documents:
+        stats.documents += 1
+        for chunk in chunker.chunk(dl_doc=document):
+            stats.chunks += 1
+            yield process_chunk(chunk=chunk)
+
+
+@dataclass
+class IngestStats:
+    """Counters of a streaming ingestion run."""
+
+    documents: int = 0
+    chunks: int = 0
+    inserted: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    failed: int = 0
+    skipped: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+
+def get_chunk_ids(table: Table) -> Set[str]:
+    """
+    Read the ids of all chunks stored in a table.
+
+    Only the ``chunk_id`` column is scanned, the vectors are never loaded.
+
+    Args:
+        table: LanceDB table
+
+    Returns:
+        Set[str]: Stored chunk ids
+    """
+    # Tables opened from a local path are LanceTables backed by a Lance dataset
+    ids: Any = cast(LanceTable, table).to_lance().to_table(columns=["chunk_id"]).column("chunk_id")
+    return set(ids.to_pylist())
+
+
+def get_source_chunk_ids(table: Table) -> Dict[str, Set[str]]:
+    """
+    Read the ids of the stored chunks of every web page in a table.
+
+    Args:
+        table: LanceDB table
+
+    Returns:
+        Dict[str, Set[str]]: Chunk ids keyed by ``source_url``, empty for tables
+            created before page metadata existed
+    """
+    dataset: Any = cast(LanceTable, table).to_lance()
+    if "source_url" in table.schema.names:
+        columns: pa.Table = dataset.to_table(columns=["chunk_id", "source_url"])
+        urls: Any = columns.column("source_url")
+    elif table.schema.field("metadata").type.get_field_index("source_url") >= 0:
+        columns = dataset.to_table(columns=["chunk_id", "metadata"])
+        urls = pc.struct_field(columns.column("metadata"), "source_url")  # type: ignore
+    else:
+        return {}
+    sources: Dict[str, Set[str]] = {}
+    for chunk_id, url in zip(columns.column("chunk_id").to_pylist(), urls.to_pylist()):
+        if url is not None:
+            sources.setdefault(url, set()).add(chunk_id)
+    return sources
+
+
+def delete_chunks(table: Table, chunk_ids: List[str]) -> None:
+    """
+    Delete chunks by id, in batches to keep the predicates small.
+
+    Args:
+        table: LanceDB table
+        chunk_ids: Ids of the chunks to delete
+    """
+    for start in range(0, len(chunk_ids), DELETE_BATCH_SIZE):
+        batch: List[str] = chunk_ids[start : start + DELETE_BATCH_SIZE]
+        id_list: str = ", ".join(f"'{chunk_id}'" for chunk_id in batch)
+        table.delete(where=f"chunk_id IN ({id_list})")
+
+
+def to_record_batch(table: Table, rows: List[Dict[str, Any]]) -> pa.RecordBatch:
+    """
+    Convert rows to an Arrow record batch matching the table schema.
+
+    The vector column is left out when LanceDB still has to embed the rows.
+
+    Args:
+        table: Target LanceDB table
+        rows: Rows to convert
+
+    Returns:
+        pa.RecordBatch: Record batch ready for ``table.add``
+    """
+    schema: pa.Schema = table.schema
+    if "vector" not in rows[0]:
+        schema = schema.remove(schema.get_field_index("vector"))
+    return pa.RecordBatch.from_pylist(rows, schema=schema)
+
+
+def sync_rows(
+    table: Table,
+    rows: Iterable[Dict[str, Any]],
+    mode: str = "overwrite",
+    embedder: Optional[BatchEmbedder] = None,
+    stats: Optional[IngestStats] = None,
+    on_progress: Optional[Callable[[IngestStats], None]] = None,
+    keep_ids: Optional[Set[str]] = None,
+    on_committed: Optional[Callable[[List[str]], None]] = None,
+    failed_kept: bool = False,
+    stale_scope: Optional[Set[str]] = None,
+    on_deleted: Optional[Callable[[List[str]], None]] = None,
+) -> IngestStats:
+    """
+    Stream rows through embedding into fixed-size Arrow batches written to the table.
+
+    Rows are consumed lazily and every flushed batch is committed, so memory stays
+    flat and the table is queryable while ingestion is still running. In
+    ``upsert`` mode chunks already stored are skipped and, once the input is
+    exhausted, stored chunks that were not seen are deleted. Finally the
+    full-text and ANN indexes are created or brought up to date.
+
+    Args:
+        table: LanceDB table with a ``chunk_id`` column
+        rows: Rows as returned by ``process_chunk``
+        mode: "create", "overwrite" (append to the fresh table) or "upsert"
+        embedder: Optional batch embedder; without it LanceDB embeds on write
+        stats: Counters to update, a new ``IngestStats`` if omitted
+        on_progress: Called with the counters after every written batch
+        keep_ids: Stored chunks to keep in upsert mode although they are not in
+            ``rows``, e.g. those of sources skipped by a resumed run
+        on_committed: Called with the ids of rows that are durably stored, either
+            written or skipped because they already were
+        failed_kept: Whether ``keep_ids`` already holds the chunks of failed
+            documents, so stale chunks are deleted even when some failed
+        stale_scope: Stored chunks an upsert may delete when they are not in
+            ``rows``, every stored chunk if omitted
+        on_deleted: Called with the ids of the stale chunks once they are deleted
+
+    Returns:
+        IngestStats: Counters of the run
+    """
+    ingestion_cfgs: Dict[str, Any] = cfgs["INGESTION"]
+    stats = stats or IngestStats()
+    start: float = time.perf_counter()
+
+    existing_ids: Set[str] = get_chunk_ids(table=table) if mode == "upsert" else set()
+    seen_ids: Set[str] = set()
+
+    def new_rows() -> Iterator[Dict[str, Any]]:
+        for row in rows:
+            chunk_id: str = row["chunk_id"]
+            if chunk_id not in seen_ids and chunk_id not in existing_ids:
+                seen_ids.add(chunk_id)
+                yield row
+                continue
+            # Duplicate or already stored: nothing to write
+            if chunk_id not in seen_ids:
+                seen_ids.add(chunk_id)
+                stats.unchanged += 1
+            if on_committed is not None:
+                on_committed([chunk_id])
+
+    def write(batch: List[Dict[str, Any]]) -> None:
+        record_batch: pa.RecordBatch = to_record_batch(table=table, rows=batch)
+        if mode == "upsert":
+            table.merge_insert(on="chunk_id").when_not_matched_insert_all().execute(record_batch)
+        else:
+            table.add(data=record_batch)
+        stats.inserted += len(batch)
+        stats.batches += 1
+        if on_committed is not None:
+            on_committed([row["chunk_id"] for row in batch])
+        if on_progress is not None:
+            on_progress(stats)
+
+    pending: Iterable[Dict[str, Any]] = new_rows()
+    if embedder is not None:
+        pending = (row for batch in embedder.iter_embedded(rows=pending) for row in batch)
+
+    # Embedding overlaps with writing through the bounded queue
+    for batch in batched(
+        iterable=staged(iterable=pending, maxsize=ingestion_cfgs["QUEUE_SIZE"], name="embed"),
+        size=ingestion_cfgs["WRITE_BATCH_ROWS"],
+    ):
+        write(batch=batch)
+
+    if mode == "upsert" and stats.failed and not failed_kept:
+        # Chunks of documents that failed this time were not seen but are not stale
+        logger.warning(msg=f"{stats.failed} documents failed, keeping chunks missing from this run")
+    elif mode == "upsert":
+        candidates: Set[str] = existing_ids if stale_scope is None else existing_ids & stale_scope
+        stale_ids: List[str] = sorted(candidates - seen_ids - (keep_ids or set()))
+        if stale_ids:
+            delete_chunks(table=table, chunk_ids=stale_ids)
+            if on_deleted is not None:
+                on_deleted(stale_ids)
+        stats.deleted += len(stale_ids)
+
+    # The vector index goes first: optimize() updates every index, which would
+    # hide the unindexed rows that decide whether the IVF index is rebuilt
+    ensure_vector_index(table=table, index_cfgs=cfgs["VECTOR_DB"]["INDEX"])
+    ensure_fts_index(table=table, fts_cfgs=cfgs["VECTOR_DB"]["FTS"])
+    ensure_scalar_indexes(table=table, scalar_cfgs=cfgs["VECTOR_DB"]["SCALAR_INDEX"])
+
+    stats.seconds += time.perf_counter() - start
+    if embedder is not None:
+        logger.info(msg=f"Embedding stats: {embedder.stats}")
+    logger.info(msg=f"Synced {table.name}: {stats}")
+    return stats
+
+
+def write_chunks(
+    table: Table,
+    processed_chunks: Iterable[Dict[str, Any]],
+    embedder: Optional[BatchEmbedder] = None,
+) -> IngestStats:
+    """
+    Append chunks to a table, embedding them in batches when an embedder is given.
+
+    Args:
+        table: LanceDB table
+        processed_chunks: Chunks as returned by ``process_chunk``
+        embedder: Optional batch embedder; without it LanceDB embeds on write
+
+    Returns:
+        IngestStats: Counters of the run
+    """
+    return sync_rows(table=table, rows=processed_chunks, mode="overwrite", embedder=embedder)
+
+
+def upsert_chunks(
+    table: Table,
+    processed_chunks: Iterable[Dict[str, Any]],
+    embedder: Optional[BatchEmbedder] = None,
+) -> IngestStats:
+    """
+    Sync a table with a new set of chunks without re-embedding unchanged ones.
+
+    Chunks whose id is already stored are skipped, new chunks are embedded and
+    merged in on ``chunk_id``, and stored chunks missing from the new set are deleted.
+
+    Args:
+        table: LanceDB table with a ``chunk_id`` column
+        processed_chunks: Chunks as returned by ``process_chunk``
+        embedder: Optional batch embedder; without it LanceDB embeds on write
+
+    Returns:
+        IngestStats: Number of inserted, unchanged and deleted chunks
+    """
+    return sync_rows(table=table, rows=processed_chunks, mode="upsert", embedder=embedder)
+
+
+def open_ingest_table(
+    db_path: str,
+    table_name: str,
+    llm_provider: str,
+    embed_model: str,
+    mode: str = "overwrite",
+) -> Table:
+    """
+    Connect to the database and create (or open, in upsert mode) the target table.
+
+    Args:
+        db_path: Path to the database
+        table_name: Name of the table
+        llm_provider: Name of the LLM provider
+        embed_model: Name of the embedding model
+        mode: Table creation mode ("create", "overwrite" or "upsert")
+
+    Returns:
+        Table: Table ready for ``sync_rows``
+    """
+    db: lancedb.DBConnection = initialize_database(db_path=db_path)
+    return create_table(
+        db=db,
+        table_name=table_name,
+        llm_provider=llm_provider,
+        embed_model=embed_model,
+        mode=mode,
+    )
+
+
+def store_chunks(
+    chunks: Iterable[BaseChunk],
+    db_path: str,
+    table_name: str,
+    llm_provider: str,
+    embed_model: str,
+    mode: str = "overwrite",
+) -> Table:
+    """
+    Embed chunks and write them to a LanceDB table.
+
+    Args:
+        chunks: Document chunks
+        db_path: Path to the database
+        table_name: Name of the table
+        llm_provider: Name of the LLM provider
+        embed_model: Name of the embedding model
+        mode: Table creation mode ("create", "overwrite" or "upsert")
+
+    Returns:
+        Table: Created and populated LanceDB table
+    """
+    table: Table = open_ingest_table(
+        db_path=db_path,
+        table_name=table_name,
+        llm_provider=llm_provider,
+        embed_model=embed_model,
+        mode=mode,
+    )
+    sync_rows(
+        table=table,
+        rows=(process_chunk(chunk=chunk) for chunk in chunks),
+        mode=mode,
+        embedder=get_batch_embedder(table=table),
+    )
+    return table
+
+
+def ingest_documents(
+    documents: Iterable[DoclingDocument],
+    max_tokens: int,
+    db_path: str,
+    table_name: str,
+    llm_provider: str,
+    embed_model: str,
+    mode: str = "overwrite",
+    on_progress: Optional[Callable[[IngestStats], None]] = None,
+) -> Table:
+    """
+    Stream documents through chunking, embedding and writing.
+
+    Each stage runs behind a bounded queue: documents are chunked one at a time
+    while earlier chunks are embedded and written, so peak memory does not grow
+    with the number of documents.
+
+    Args:
+        documents: Converted documents, e.g. a generator over a sitemap
+        max_tokens: Maximum tokens per chunk
+        db_path: Path to the database
+        table_name: Name of the table
+        llm_provider: Name of the LLM provider
+        embed_model: Name of the embedding model
+        mode: Table creation mode ("create", "overwrite" or "upsert")
+        on_progress: Called with the counters after every written batch
+
+    Returns:
+        Table: Created and populated LanceDB table
+    """
+    table: Table = open_ingest_table(
+        db_path=db_path,
+        table_name=table_name,
+        llm_provider=llm_provider,
+        embed_model=embed_model,
+        mode=mode,
+    )
+    stats = IngestStats()
+    rows: Iterator[Dict[str, Any]] = staged(
+        iterable=iter_chunk_rows(documents=documents, max_tokens=max_tokens, stats=stats),
+        maxsize=cfgs["INGESTION"]["QUEUE_SIZE"],
+        name="chunk",
+    )
+    sync_rows(
+        table=table,
+        rows=rows,
+        mode=mode,
+        embedder=get_batch_embedder(table=table),
+        stats=stats,
+        on_progress=on_progress,
+    )
+    return table
+
+
+def iter_page_rows(
+    pages: Iterable[Tuple[FetchedPage, Optional[DoclingDocument]]],
+    max_tokens: int,
+    stats: IngestStats,
+    keep_ids: Set[str],
+    source_ids: Dict[str, Set[str]],
+    ingested: List[FetchedPage],
+) -> Iterator[Dict[str, Any]]:
+    """
+    Chunk every page of a crawl on its own and yield rows carrying the page metadata.
+
+    Only one page is held in memory at a time. The stored chunks of pages that
+    were not fetched again (unchanged) or failed are added to ``keep_ids``, so
+    an upsert does not delete them.
+
+    Args:
+        pages: Crawled pages with their documents (see ``iter_site_documents``)
+        max_tokens: Maximum tokens per chunk
+        stats: Counters updated as pages and chunks go by
+        keep_ids: Receives the ids of stored chunks to keep
+        source_ids: Stored chunk ids keyed by ``source_url``
+        ingested: Receives the pages whose chunks were yielded
+
+    Returns:
+        Iterator[Dict[str, Any]]: Rows ready for embedding
+    """
+    chunker: HybridChunker = initialize_chunker(max_tokens=max_tokens)
+    for page, document in pages:
+        if document is None:
+            keep_ids.update(source_ids.get(page.url, ()))
+            if page.status == "failed":
+                stats.failed += 1
+            else:
+                stats.skipped += 1
+            continue
+        stats.documents += 1
+        metadata: Dict[str, Any] = page_metadata(
+            url=page.url, fetched_at=page.fetched_at, content_hash=page.content_hash
+        )
+        for chunk in chunker.chunk(dl_doc=document):
+            stats.chunks += 1
+            yield process_chunk(chunk=chunk, page=metadata)
+        ingested.append(page)
+
+
+def ingest_website(
+    base_url: str,
+    max_tokens: int,
+    db_path: str,
+    table_name: str,
+    llm_provider: str,
+    embed_model: str,
+    sitemap_filename: str = "sitemap.xml",
+    mode: str = "overwrite",
+    on_progress: Optional[Callable[[IngestStats], None]] = None,
+) -> Table:
+    """
+    Crawl a website and ingest every page as its own document.
+
+    Chunks never straddle pages and carry the page URL, fetch time and content
+    hash. In ``upsert`` mode the crawl is incremental: pages unchanged since the
+    last run into this table are not fetched and keep their chunks, changed
+    pages replace theirs, and pages of this site gone from the sitemap are
+    deleted. Other documents in the table are left alone.
+
+    Args:
+        base_url: Base URL of the website
+        max_tokens: Maximum tokens per chunk
+        db_path: Path to the database
+        table_name: Name of the table
+        llm_provider: Name of the LLM provider
+        embed_model: Name of the embedding model
+        sitemap_filename: Name (or URL) of the sitemap file
+        mode: Table creation mode ("create", "overwrite" or "upsert")
+        on_progress: Called with the counters after every written batch
+
+    Returns:
+        Table: Created and populated LanceDB table
+    """
+    table: Table = open_ingest_table(
+        db_path=db_path,
+        table_name=table_name,
+        llm_provider=llm_provider,
+        embed_model=embed_model,
+        mode=mode,
+    )
+    state: CrawlState = get_crawl_state(path=cfgs["CRAWLER"]["STATE_PATH"], scope=table_name)
+    incremental: bool = mode == "upsert"
+    source_ids: Dict[str, Set[str]] = get_source_chunk_ids(table=table) if incremental else {}
+    if incremental:
+        # A page may only be skipped while the table still holds its chunks, which
+        # is not the case for recreated tables or ones without page metadata
+        forgotten: int = state.retain(urls=set(source_ids))
+        if forgotten:
+            logger.info(msg=f"Fetching {forgotten} pages again, their chunks are not stored")
+    # Only the pages of this site may go stale, never the documents or the other
+    # sites ingested into the same table
+    host: str = urlparse(url=base_url).netloc
+    site_ids: Set[str] = {
+        chunk_id
+        for url, chunk_ids in source_ids.items()
+        if urlparse(url=url).netloc == host
+        for chunk_id in chunk_ids
+    }
+    stats = IngestStats()
+    keep_ids: Set[str] = set()
+    ingested: List[FetchedPage] = []
+    rows: Iterator[Dict[str, Any]] = staged(
+        iterable=iter_page_rows(
+            pages=iter_site_documents(
+                base_url=base_url,
+                sitemap_filename=sitemap_filename,
+                state=state if incremental else None,
+            ),
+            max_tokens=max_tokens,
+            stats=stats,
+            keep_ids=keep_ids,
+            source_ids=source_ids,
+            ingested=ingested,
+        ),
+        maxsize=cfgs["INGESTION"]["QUEUE_SIZE"],
+        name="page",
+    )
+    sync_rows(
+        table=table,
+        rows=rows,
+        mode=mode,
+        embedder=get_batch_embedder(table=table),
+        stats=stats,
+        on_progress=on_progress,
+        keep_ids=keep_ids,
+        failed_kept=True,
+        stale_scope=site_ids,
+    )
+    # Only now are the pages stored; an interrupted run fetches them again
+    for page in ingested:
+        state.record(page=page)
+    return table
 
 
 def create_embeddings(
@@ -158,7 +886,7 @@ def create_embeddings(
     table_name: str,
     llm_provider: str,
     embed_model: str,
-    mode: str = "overwrite",  # Add mode parameter with default value
+    mode: str = "overwrite",  # "create", "overwrite" or "upsert"
 ) -> Table:
     """
     Main function to create embeddings from a document.
@@ -170,31 +898,62 @@ def create_embeddings(
         table_name: Name of the table
         llm_provider: Name of the LLM provider
         embed_model: Name of the embedding model
-        mode: Table creation mode ("create" or "overwrite")
+        mode: Table creation mode ("create", "overwrite" or "upsert")
 
     Returns:
         Table: Created and populated LanceDB table
     """
-    # Get document chunks
-    chunks: List[BaseChunk] = get_chunks(max_tokens=max_tokens, source_path=source_path)
-
-    # Initialize database
-    db: lancedb.DBConnection = initialize_database(db_path=db_path)
+    result: ConversionResult = get_converter_registry().convert(
+        source=source_path, kind=kind_for_source(source=source_path)
+    )
 
-    # Create table
-    table: Table = create_table(
-        db=db,
+    return ingest_documents(
+        documents=[result.document],
+        max_tokens=max_tokens,
+        db_path=db_path,
         table_name=table_name,
         llm_provider=llm_provider,
         embed_model=embed_model,
         mode=mode,
     )
 
-    # Process and add chunks
-    processed_chunks: List[Dict[str, Any]] = process_chunks(chunks=chunks)
-    table.add(data=processed_chunks)
 
-    return table
+def create_embeddings_from_document(
+    document: DoclingDocument,
+    max_tokens: int,
+    db_path: str,
+    table_name: str,
+    llm_provider: str,
+    embed_model: str,
+    mode: str = "overwrite",
+) -> Table:
+    """
+    Create embeddings from an already converted document.
+
+    Use this when the caller has run Docling itself (e.g. ``convert_pdf``) so the
+    document is not converted a second time.
+
+    Args:
+        document: Converted Docling document
+        max_tokens: Maximum tokens per chunk
+        db_path: Path to the database
+        table_name: Name of the table
+        llm_provider: Name of the LLM provider
+        embed_model: Name of the embedding model
+        mode: Table creation mode ("create", "overwrite" or "upsert")
+
+    Returns:
+        Table: Created and populated LanceDB table
+    """
+    return ingest_documents(
+        documents=[document],
+        max_tokens=max_tokens,
+        db_path=db_path,
+        table_name=table_name,
+        llm_provider=llm_provider,
+        embed_model=embed_model,
+        mode=mode,
+    )
 
 
 def main() -> None:
@@ -210,6 +969,7 @@ def main() -> None:
         table_name=cfgs["VECTOR_DB"]["TABLE_NAME"],
         llm_provider=cfgs["LLM"]["PROVIDER"],
         embed_model=cfgs["EMBEDDINGS"]["MODEL"],
+        mode=cfgs["VECTOR_DB"]["MODE"],
     )
 
     print(f"Created table with {table.count_rows()} rows")
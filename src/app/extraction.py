@@ -14,32 +14,72 @@ sys.path.append(
     os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../.."))
 )
 
-from typing import Any, Dict, Iterator, List
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from docling.datamodel.document import ConversionResult
-from docling.document_converter import DocumentConverter
 from docling_core.types.doc.document import DoclingDocument
-from utils.sitemap import get_sitemap_urls
+from docling_core.types.io import DocumentStream
+from utils.converters import ConverterRegistry, get_converter_registry, kind_for_source
+from utils.crawler import (
+    CrawlState,
+    FetchedPage,
+    iter_site_pages,
+    page_stream,
+    sitemap_location,
+)
 
 from configs import cfgs
 
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+
+def convert_pdf(pdf_path: str, do_ocr: bool = True) -> DoclingDocument:
+    """
+    Convert a PDF file into a Docling document.
+
+    Args:
+        pdf_path: Path to the PDF file
+        do_ocr: Whether to run OCR on the PDF pages
+
+    Returns:
+        DoclingDocument: Converted document with page provenance
+    """
+    result: ConversionResult = get_converter_registry().convert(
+        source=pdf_path, kind="pdf", do_ocr=do_ocr
+    )
+    return result.document
+
 
-def extract_pdf(pdf_path: str) -> tuple[str, Dict[Any, Any]]:
+def extract_pdf(pdf_path: str, do_ocr: bool = True) -> tuple[str, Dict[Any, Any]]:
     """
     Extract content from a PDF file.
 
     Args:
         pdf_path: Path to the PDF file
+        do_ocr: Whether to run OCR on the PDF pages
 
     Returns:
         tuple: (markdown_output, json_output)
     """
-    converter = DocumentConverter()
-    result: ConversionResult = converter.convert(source=pdf_path)
-    document: DoclingDocument = result.document
+    document: DoclingDocument = convert_pdf(pdf_path=pdf_path, do_ocr=do_ocr)
     return document.export_to_markdown(), document.export_to_dict()
 
 
+def convert_html(html_path: str) -> DoclingDocument:
+    """
+    Convert an HTML file or URL into a Docling document.
+
+    Args:
+        html_path: Path to the HTML file
+
+    Returns:
+        DoclingDocument: Converted document
+    """
+    result: ConversionResult = get_converter_registry().convert(source=html_path, kind="html")
+    return result.document
+
+
 def extract_html(html_path: str) -> str:
     """
     Extract content from an HTML file.
@@ -50,12 +90,70 @@ def extract_html(html_path: str) -> str:
     Returns:
         str: Markdown output
     """
-    converter = DocumentConverter()
-    result: ConversionResult = converter.convert(source=html_path)
-    document: DoclingDocument = result.document
+    document: DoclingDocument = convert_html(html_path=html_path)
     return document.export_to_markdown()
 
 
+def iter_site_documents(
+    base_url: str, sitemap_filename: str = "sitemap.xml", state: Optional[CrawlState] = None
+) -> Iterator[Tuple[FetchedPage, Optional[DoclingDocument]]]:
+    """
+    Crawl a sitemap and convert every page on its own.
+
+    Pages are fetched concurrently by the async crawler and converted from
+    memory as they arrive, while the next ones are still downloading.
+
+    Args:
+        base_url: Base URL of the website
+        sitemap_filename: Name (or URL) of the sitemap file
+        state: Validators of earlier crawls; unchanged pages are not fetched again
+
+    Returns:
+        Iterator[Tuple[FetchedPage, Optional[DoclingDocument]]]: Every page of the
+            sitemap with its document, None if it was unchanged or failed
+    """
+    pages: Iterator[FetchedPage] = iter_site_pages(
+        sitemap_url=sitemap_location(base_url=base_url, sitemap_filename=sitemap_filename),
+        crawler_cfgs=cfgs["CRAWLER"],
+        state=state,
+    )
+    registry: ConverterRegistry = get_converter_registry()
+
+    for page in pages:
+        if not page.changed:
+            if page.error:
+                logger.warning(msg=f"Skipping {page.url}: {page.error}")
+            yield page, None
+            continue
+        stream: DocumentStream = page_stream(page=page)
+        result: ConversionResult = registry.convert(
+            source=stream, kind=kind_for_source(source=stream.name), raises_on_error=False
+        )
+        if not result.document:
+            errors: str = "; ".join(error.error_message for error in result.errors)
+            page.status, page.error = "failed", f"conversion {result.status.value}: {errors}"
+            logger.warning(msg=f"Skipping {page.url}: {page.error}")
+        yield page, result.document or None
+
+
+def iter_sitemap_documents(
+    base_url: str, sitemap_filename: str = "sitemap.xml"
+) -> Iterator[DoclingDocument]:
+    """
+    Convert the pages listed in a sitemap one at a time.
+
+    Args:
+        base_url: Base URL of the website
+        sitemap_filename: Name of the sitemap file
+
+    Returns:
+        Iterator[DoclingDocument]: Extracted documents, yielded as they are converted
+    """
+    for _, document in iter_site_documents(base_url=base_url, sitemap_filename=sitemap_filename):
+        if document is not None:
+            yield document
+
+
 def extract_from_sitemap(
     base_url: str, sitemap_filename: str = "sitemap.xml"
 ) -> List[DoclingDocument]:
@@ -69,20 +167,7 @@ def extract_from_sitemap(
     Returns:
         List[DoclingDocument]: List of extracted documents
     """
-    converter = DocumentConverter()
-    sitemap_urls: List[str] = get_sitemap_urls(
-        base_url=base_url, sitemap_filename=sitemap_filename
-    )
-    conv_results_iter: Iterator[ConversionResult] = converter.convert_all(
-        source=sitemap_urls
-    )
-
-    docs: List[DoclingDocument] = []
-    for result in conv_results_iter:
-        if result.document:
-            docs.append(result.document)
-
-    return docs
+    return list(iter_sitemap_documents(base_url=base_url, sitemap_filename=sitemap_filename))
 
 
 def main() -> None:
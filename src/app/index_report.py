@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# """
+# index_report.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
+
+import argparse
+import statistics
+import time
+from typing import Any, Dict, List, Tuple, cast
+
+import lancedb
+from lancedb.table import LanceTable, Table
+from utils.embedding_cache import CachedEmbeddings  # registers the "cached" embedding function
+from utils.indexing import VECTOR_COLUMN, get_index
+
+from configs import cfgs
+
+
+def sample_query_vectors(table: Table, num_queries: int) -> List[List[float]]:
+    """
+    Use stored chunk vectors as query vectors.
+
+    Args:
+        table: LanceDB table
+        num_queries: Number of vectors to sample
+
+    Returns:
+        List[List[float]]: Query vectors
+    """
+    dataset: Any = cast(LanceTable, table).to_lance()
+    sample: Any = dataset.sample(num_rows=num_queries, columns=[VECTOR_COLUMN])
+    return sample.column(VECTOR_COLUMN).to_pylist()
+
+
+def run_queries(
+    table: Table,
+    vectors: List[List[float]],
+    k: int,
+    exact: bool,
+    nprobes: int | None = None,
+    refine_factor: int | None = None,
+) -> Tuple[List[List[str]], List[float]]:
+    """
+    Run vector searches and time each of them.
+
+    Args:
+        table: LanceDB table
+        vectors: Query vectors
+        k: Number of neighbours to retrieve
+        exact: Bypass the ANN index and scan every vector
+        nprobes: IVF partitions to probe
+        refine_factor: Exact re-ranking factor
+
+    Returns:
+        Tuple[List[List[str]], List[float]]: Retrieved chunk ids and latencies (ms) per query
+    """
+    ids: List[List[str]] = []
+    latencies: List[float] = []
+    for vector in vectors:
+        search: Any = table.search(vector)
+        search = search.metric(cfgs["VECTOR_DB"]["INDEX"]["METRIC"]).select(["chunk_id"]).limit(k)
+        if exact:
+            search = search.bypass_vector_index()
+        else:
+            if nprobes:
+                search = search.nprobes(nprobes)
+            if refine_factor:
+                search = search.refine_factor(refine_factor)
+
+        start: float = time.perf_counter()
+        result: Any = search.to_arrow()
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(result.column("chunk_id").to_pylist())
+    return ids, latencies
+
+
+def recall_at_k(exact_ids: List[List[str]], ann_ids: List[List[str]]) -> float:
+    """Share of the exact top-k neighbours found by the ANN search."""
+    found: int = sum(len(set(exact) & set(ann)) for exact, ann in zip(exact_ids, ann_ids))
+    total: int = sum(len(exact) for exact in exact_ids)
+    return found / total if total else 0.0
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values``."""
+    ordered: List[float] = sorted(values)
+    rank: int = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def build_report(
+    table: Table,
+    k: int,
+    num_queries: int,
+    nprobes_values: List[int],
+    refine_values: List[int],
+) -> List[Dict[str, Any]]:
+    """
+    Compare ANN search settings against the exact-search baseline.
+
+    Args:
+        table: LanceDB table with an ANN index
+        k: Number of neighbours to retrieve
+        num_queries: Number of sampled queries
+        nprobes_values: ``nprobes`` settings to try
+        refine_values: ``refine_factor`` settings to try (0 disables refinement)
+
+    Returns:
+        List[Dict[str, Any]]: One row per setting with recall@k and latency percentiles
+    """
+    vectors: List[List[float]] = sample_query_vectors(table=table, num_queries=num_queries)
+    exact_ids, exact_latencies = run_queries(table=table, vectors=vectors, k=k, exact=True)
+
+    report: List[Dict[str, Any]] = [
+        {
+            "setting": "exact",
+            f"recall@{k}": 1.0,
+            "p50_ms": round(statistics.median(exact_latencies), 2),
+            "p95_ms": round(percentile(values=exact_latencies, pct=95), 2),
+        }
+    ]
+    for nprobes in nprobes_values:
+        for refine_factor in refine_values:
+            ann_ids, latencies = run_queries(
+                table=table,
+                vectors=vectors,
+                k=k,
+                exact=False,
+                nprobes=nprobes,
+                refine_factor=refine_factor,
+            )
+            report.append(
+                {
+                    "setting": f"nprobes={nprobes} refine={refine_factor}",
+                    f"recall@{k}": round(recall_at_k(exact_ids=exact_ids, ann_ids=ann_ids), 4),
+                    "p50_ms": round(statistics.median(latencies), 2),
+                    "p95_ms": round(percentile(values=latencies, pct=95), 2),
+                }
+            )
+    return report
+
+
+def main() -> None:
+    """Print a recall-vs-latency report for a table."""
+    parser = argparse.ArgumentParser(description="ANN index recall vs latency report")
+    parser.add_argument("--table", default=cfgs["VECTOR_DB"]["TABLE_NAME"])
+    parser.add_argument("--k", type=int, default=cfgs["VECTOR_DB"]["LIMIT"])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--nprobes", default="5,10,20,50")
+    parser.add_argument("--refine", default="0,10")
+    args: argparse.Namespace = parser.parse_args()
+
+    db: lancedb.DBConnection = lancedb.connect(uri=cfgs["VECTOR_DB"]["URI"])
+    table: Table = db.open_table(name=args.table)
+    if get_index(table=table, column=VECTOR_COLUMN) is None:
+        print(f"Table {args.table} has no vector index, only the exact baseline is reported")
+
+    report: List[Dict[str, Any]] = build_report(
+        table=table,
+        k=args.k,
+        num_queries=args.queries,
+        nprobes_values=[int(n) for n in args.nprobes.split(sep=",")],
+        refine_values=[int(r) for r in args.refine.split(sep=",")],
+    )
+
+    print(f"{table.count_rows()} rows, {args.queries} queries")
+    for row in report:
+        print("  ".join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main()
+
+# Usage
+# uv run python src/app/index_report.py --table site_docling --queries 200 --nprobes 10,20,50
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# """
+# load_test.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from configs import cfgs
+from src.app.index_report import percentile
+
+WORDS: List[str] = [
+    "document",
+    "conversion",
+    "table",
+    "layout",
+    "model",
+    "pipeline",
+    "format",
+    "export",
+    "page",
+    "figure",
+    "OCR",
+    "markdown",
+]
+
+
+def make_questions(num_questions: int, seed: int = 0) -> List[str]:
+    """Distinct questions, so neither the embedding cache nor the batcher can dedupe them."""
+    rng = random.Random(seed)
+    return [
+        f"What does the {rng.choice(WORDS)} {rng.choice(WORDS)} do? ({i})"
+        for i in range(num_questions)
+    ]
+
+
+async def search_once(client: httpx.AsyncClient, body: Dict[str, Any]) -> Dict[str, float]:
+    start: float = time.perf_counter()
+    response: httpx.Response = await client.post(url="/search", json=body)
+    response.raise_for_status()
+    return {"latency_ms": (time.perf_counter() - start) * 1000}
+
+
+async def ask_once(client: httpx.AsyncClient, body: Dict[str, Any]) -> Dict[str, float]:
+    start: float = time.perf_counter()
+    first_token: Optional[float] = None
+    event: str = ""
+    async with client.stream(method="POST", url="/ask", json=body) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: ") :]
+            elif line.startswith("data: ") and event == "token" and first_token is None:
+                first_token = (time.perf_counter() - start) * 1000
+            elif line.startswith("data: ") and event == "error":
+                raise RuntimeError(json.loads(line[len("data: ") :])["error"])
+    latency: float = (time.perf_counter() - start) * 1000
+    return {"latency_ms": latency, "first_token_ms": first_token or latency}
+
+
+async def run_load(
+    url: str,
+    endpoint: str,
+    questions: List[str],
+    concurrency: int,
+    table: str,
+) -> Dict[str, Any]:
+    """
+    Send one request per question, ``concurrency`` at a time.
+
+    Args:
+        url: Base URL of the service
+        endpoint: "search" or "ask"
+        questions: Questions to send
+        concurrency: Requests in flight
+        table: Table searched
+
+    Returns:
+        Dict[str, Any]: Throughput, latency percentiles and the number of errors
+    """
+    call = search_once if endpoint == "search" else ask_once
+    semaphore = asyncio.Semaphore(value=concurrency)
+    samples: List[Dict[str, float]] = []
+    errors: List[str] = []
+
+    async def one(client: httpx.AsyncClient, question: str) -> None:
+        key: str = "query" if endpoint == "search" else "question"
+        async with semaphore:
+            try:
+                samples.append(await call(client, {key: question, "table": table}))
+            except (httpx.HTTPError, RuntimeError) as e:
+                errors.append(str(e))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        start: float = time.perf_counter()
+        await asyncio.gather(*(one(client=client, question=q) for q in questions))
+        seconds: float = time.perf_counter() - start
+
+    report: Dict[str, Any] = {
+        "endpoint": endpoint,
+        "requests": len(questions),
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "rps": round(len(samples) / seconds, 1),
+    }
+    for metric in ("latency_ms", "first_token_ms"):
+        values: List[float] = [sample[metric] for sample in samples if metric in sample]
+        if values:
+            name: str = metric.removesuffix("_ms")
+            report[f"{name}_p50_ms"] = round(statistics.median(values), 1)
+            report[f"{name}_p95_ms"] = round(percentile(values=values, pct=95), 1)
+            report[f"{name}_p99_ms"] = round(percentile(values=values, pct=99), 1)
+    if errors:
+        report["first_error"] = errors[0]
+    return report
+
+
+def main() -> None:
+    """Load-test a running ``server.py`` and print its latency and batching stats."""
+    parser = argparse.ArgumentParser(description="Load test of the Hybrid RAG HTTP service")
+    parser.add_argument(
+        "--url", default=f"http://{cfgs['SERVER']['HOST']}:{cfgs['SERVER']['PORT']}"
+    )
+    parser.add_argument("--endpoint", default="search", choices=["search", "ask"])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,16,64")
+    parser.add_argument("--table", default=cfgs["VECTOR_DB"]["TABLE_NAME"])
+    parser.add_argument("--seed", type=int, default=0)
+    args: argparse.Namespace = parser.parse_args()
+
+    for i, concurrency in enumerate(int(c) for c in args.concurrency.split(sep=",")):
+        report: Dict[str, Any] = asyncio.run(
+            main=run_load(
+                url=args.url,
+                endpoint=args.endpoint,
+                questions=make_questions(num_questions=args.requests, seed=args.seed + i),
+                concurrency=concurrency,
+                table=args.table,
+            )
+        )
+        print("  ".join(f"{key}={value}" for key, value in report.items()))
+    print(httpx.get(url=f"{args.url}/stats").json())
+
+
+if __name__ == "__main__":
+    main()
+
+# Usage
+# uv run python src/app/utils/openai_stub.py --port 8765 --latency-ms 50
+# OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub uv run python src/app/server.py
+# uv run python src/app/load_test.py --endpoint ask --requests 500 --concurrency 1,16,64
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# """
+# retrieval_benchmark.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import lancedb
+from lancedb.table import Table
+from utils.embedding_cache import CachedEmbeddings  # registers the "cached" embedding function
+from utils.indexing import VECTOR_COLUMN
+from utils.retrieval import RetrievalConfig, to_search_results, vector_search
+
+from configs import cfgs
+from src.app.index_report import percentile, sample_query_vectors
+
+SearchPath = Callable[[Table, List[float], int, RetrievalConfig], int]
+
+
+def pandas_path(table: Table, vector: List[float], limit: int, config: RetrievalConfig) -> int:
+    """
+    The former retrieval path: every column, vector included, converted to pandas
+    and read back one ``Series`` per row.
+
+    Returns:
+        int: Number of results
+    """
+    search: Any = table.search(vector, vector_column_name=VECTOR_COLUMN)
+    search = search.metric(config.metric).limit(limit)
+    if config.nprobes:
+        search = search.nprobes(config.nprobes)
+    if config.refine_factor:
+        search = search.refine_factor(config.refine_factor)
+
+    results: List[Tuple[Any, ...]] = []
+    for _, row in search.to_pandas().iterrows():
+        metadata: Dict[str, Any] = row["metadata"]
+        results.append(
+            (row["text"], metadata["filename"], list(metadata["page_numbers"]), metadata["title"])
+        )
+    return len(results)
+
+
+def arrow_path(table: Table, vector: List[float], limit: int, config: RetrievalConfig) -> int:
+    """
+    The Arrow path: projected columns only, converted column by column.
+
+    Returns:
+        int: Number of results
+    """
+    results = vector_search(table=table, vector=vector, limit=limit, config=config)
+    return len(to_search_results(results=results))
+
+
+PATHS: Dict[str, SearchPath] = {"pandas": pandas_path, "arrow": arrow_path}
+
+
+def run_path(
+    path: SearchPath,
+    table: Table,
+    vectors: List[List[float]],
+    limit: int,
+    concurrency: int,
+    config: RetrievalConfig,
+) -> Tuple[List[float], float]:
+    """
+    Run one query per vector, ``concurrency`` at a time.
+
+    Returns:
+        Tuple[List[float], float]: Latency (ms) of each query and the wall time (s)
+    """
+
+    def timed(vector: List[float]) -> float:
+        start: float = time.perf_counter()
+        path(table, vector, limit, config)
+        return (time.perf_counter() - start) * 1000
+
+    start: float = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies: List[float] = list(pool.map(timed, vectors))
+    return latencies, time.perf_counter() - start
+
+
+def build_report(
+    table: Table,
+    num_queries: int,
+    limits: List[int],
+    concurrency_values: List[int],
+    config: RetrievalConfig,
+) -> List[Dict[str, Any]]:
+    """
+    Compare the pandas and Arrow retrieval paths on the same queries.
+
+    Args:
+        table: LanceDB table
+        num_queries: Number of sampled queries
+        limits: Result counts to try
+        concurrency_values: Numbers of concurrent queries to try
+        config: Retrieval settings shared by both paths
+
+    Returns:
+        List[Dict[str, Any]]: One row per path and setting with latency percentiles and QPS
+    """
+    vectors: List[List[float]] = sample_query_vectors(table=table, num_queries=num_queries)
+    for path in PATHS.values():
+        # Warm the index and file caches so the first path measured is not penalized
+        run_path(
+            path=path,
+            table=table,
+            vectors=vectors,
+            limit=max(limits),
+            concurrency=1,
+            config=config,
+        )
+
+    report: List[Dict[str, Any]] = []
+    for limit in limits:
+        for concurrency in concurrency_values:
+            for name, path in PATHS.items():
+                latencies, seconds = run_path(
+                    path=path,
+                    table=table,
+                    vectors=vectors,
+                    limit=limit,
+                    concurrency=concurrency,
+                    config=config,
+                )
+                report.append(
+                    {
+                        "path": name,
+                        "limit": limit,
+                        "concurrency": concurrency,
+                        "p50_ms": round(statistics.median(latencies), 2),
+                        "p95_ms": round(percentile(values=latencies, pct=95), 2),
+                        "qps": round(len(vectors) / seconds, 1),
+                    }
+                )
+    return report
+
+
+def main() -> None:
+    """Print a pandas vs Arrow retrieval latency report for a table."""
+    parser = argparse.ArgumentParser(description="pandas vs Arrow retrieval benchmark")
+    parser.add_argument("--table", default=cfgs["VECTOR_DB"]["TABLE_NAME"])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limits", default="5,20,100")
+    parser.add_argument("--concurrency", default="1,8")
+    args: argparse.Namespace = parser.parse_args()
+
+    db: lancedb.DBConnection = lancedb.connect(uri=cfgs["VECTOR_DB"]["URI"])
+    table: Table = db.open_table(name=args.table)
+    report: List[Dict[str, Any]] = build_report(
+        table=table,
+        num_queries=args.queries,
+        limits=[int(n) for n in args.limits.split(sep=",")],
+        concurrency_values=[int(c) for c in args.concurrency.split(sep=",")],
+        config=RetrievalConfig.from_configs(cfgs=cfgs),
+    )
+
+    print(f"{table.count_rows()} rows, {args.queries} queries")
+    for row in report:
+        print("  ".join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main()
+
+# Usage
+# uv run python src/app/retrieval_benchmark.py --table site_docling --limits 5,50 --concurrency 1,16
@@ -11,10 +11,13 @@ import sys
 # Add the project root directory to Python path
 sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
 
+from typing import Optional, Sequence
+
 import lancedb
-import pandas as pd
-from lancedb.query import LanceQueryBuilder
+import pyarrow as pa
 from lancedb.table import Table
+from utils.embedding_cache import CachedEmbeddings  # registers the "cached" embedding function
+from utils.retrieval import MetadataFilter, RetrievalConfig, federated_search, hybrid_search
 
 from configs import cfgs
 
@@ -46,7 +49,13 @@ def load_table(db: lancedb.DBConnection, table_name: str) -> Table:
     return db.open_table(name=table_name)
 
 
-def search_documents(table: Table, query: str, limit: int) -> pd.DataFrame:
+def search_documents(
+    table: Table,
+    query: str,
+    limit: int,
+    retrieval: Optional[RetrievalConfig] = None,
+    filters: Optional[MetadataFilter] = None,
+) -> pa.Table:
     """
     Search documents in the table.
 
@@ -54,12 +63,41 @@ def search_documents(table: Table, query: str, limit: int) -> pd.DataFrame:
         table: LanceDB table
         query: Search query
         limit: Maximum number of results to return
+        retrieval: Retrieval mode, fusion and ANN settings
+        filters: Restrictions on filename, title, pages or URL, applied before the search
+
+    Returns:
+        pa.Table: Search results with their text, metadata fields and score
+    """
+    where: Optional[str] = filters.to_where(table=table) if filters else None
+    results, _ = hybrid_search(table=table, query=query, limit=limit, config=retrieval, where=where)
+    return results
+
+
+def search_tables(
+    tables: Sequence[Table],
+    query: str,
+    limit: int,
+    retrieval: Optional[RetrievalConfig] = None,
+    filters: Optional[MetadataFilter] = None,
+) -> pa.Table:
+    """
+    Search several tables at once.
+
+    Args:
+        tables: LanceDB tables, searched concurrently
+        query: Search query
+        limit: Maximum number of results to return
+        retrieval: Retrieval mode, fusion and ANN settings
+        filters: Restrictions on filename, title, pages or URL, applied to every table
 
     Returns:
-        pd.DataFrame: Search results as a pandas DataFrame
+        pa.Table: Merged results with the ``table`` each one comes from
     """
-    result: LanceQueryBuilder = table.search(query=query).limit(limit=limit)
-    return result.to_pandas()
+    results, _ = federated_search(
+        tables=tables, query=query, limit=limit, config=retrieval, filters=filters
+    )
+    return results
 
 
 def main() -> None:
@@ -71,11 +109,14 @@ def main() -> None:
     table: Table = load_table(db=db, table_name=cfgs["VECTOR_DB"]["TABLE_NAME"])
 
     # Search documents
-    results: pd.DataFrame = search_documents(
-        table=table, query=cfgs["QUERY"], limit=cfgs["VECTOR_DB"]["LIMIT"]
+    results: pa.Table = search_documents(
+        table=table,
+        query=cfgs["QUERY"],
+        limit=cfgs["VECTOR_DB"]["LIMIT"],
+        retrieval=RetrievalConfig.from_configs(cfgs=cfgs),
     )
 
-    print(results.head(n=5))
+    print(results.slice(offset=0, length=5).to_pandas())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,508 @@
+# -*- coding: utf-8 -*-
+# """
+# server.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import timedelta
+from functools import partial
+from typing import Any, AsyncGenerator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import lancedb
+import tornado.web
+from dotenv import load_dotenv
+from lancedb.table import Table
+from openai import OpenAI
+from tornado.iostream import StreamClosedError
+from utils.context_window import get_conversation_window
+from utils.embedding_cache import CachedEmbeddings  # registers the "cached" embedding function
+from utils.ingest_jobs import IngestJob, IngestJobConfig, IngestJobQueue, get_ingest_job_queue
+from utils.query_batcher import QueryBatchConfig, can_share_query_vector, get_query_coalescer
+from utils.reranking import RerankConfig
+from utils.retrieval import MetadataFilter, RetrievalConfig, SearchResult
+from utils.st_utils import get_context, stream_chat_response
+
+from configs import cfgs
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+
+async def iterate_in_thread(
+    executor: ThreadPoolExecutor, factory: Callable[[], Iterator[Any]]
+) -> AsyncGenerator[Any, None]:
+    """
+    Consume a blocking iterator on the executor, yielding its items on the event loop.
+
+    The iterator is closed as soon as the consumer stops, so an abandoned
+    streaming response stops downloading at the next item.
+
+    Args:
+        executor: Thread running the iterator
+        factory: Creates the iterator, called on that thread
+
+    Yields:
+        Any: Items of the iterator
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(item: Tuple[str, Any]) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # The event loop is closed
+            pass
+
+    def produce() -> None:
+        try:
+            iterator: Iterator[Any] = factory()
+            try:
+                for item in iterator:
+                    if stop.is_set():
+                        break
+                    put(item=("item", item))
+            finally:
+                close: Optional[Callable[[], None]] = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+            put(item=("end", None))
+        except Exception as e:
+            put(item=("error", e))
+
+    loop.run_in_executor(executor, produce)
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "end":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stop.set()
+
+
+class RagService:
+    """State shared by every request: warm tables, the LLM slots, the worker threads."""
+
+    def __init__(self, cfgs: Dict[str, Any]) -> None:
+        """Connect to the database and create the worker threads.
+
+        Args:
+            cfgs: Application configuration
+        """
+        server_cfgs: Dict[str, Any] = cfgs["SERVER"]
+        self.cfgs: Dict[str, Any] = cfgs
+        # One connection for the whole process; open tables pick up new versions
+        # written by ingestion jobs or other processes within this interval
+        self.db: lancedb.DBConnection = lancedb.connect(
+            uri=cfgs["VECTOR_DB"]["URI"],
+            read_consistency_interval=timedelta(seconds=server_cfgs["READ_CONSISTENCY_SECONDS"]),
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=server_cfgs["WORKERS"], thread_name_prefix="rag-server"
+        )
+        self.batching: QueryBatchConfig = QueryBatchConfig.from_configs(cfgs=cfgs)
+        self.llm_slots = asyncio.Semaphore(value=server_cfgs["MAX_LLM_CONCURRENCY"])
+        self.llm_active: int = 0
+        self.llm_waiting: int = 0
+        self.client = OpenAI()
+        self.retrieval: RetrievalConfig = RetrievalConfig.from_configs(cfgs=cfgs)
+        self.rerank: RerankConfig = RerankConfig.from_configs(cfgs=cfgs)
+        self._tables: Dict[str, Table] = {}
+        self._tables_lock = threading.Lock()
+        # Local paths /ingest may read, resolved once; without a root only URLs
+        root: Optional[str] = server_cfgs["INGEST_ROOT"]
+        self.ingest_root: Optional[str] = os.path.realpath(root) if root else None
+        # Jobs persist across restarts and may be run by any process sharing the queue
+        self.jobs: IngestJobQueue = get_ingest_job_queue(
+            config=IngestJobConfig.from_configs(cfgs=cfgs)
+        )
+        self.jobs.add_listener(listener=self._job_finished)
+
+    def open_table(self, name: str) -> Table:
+        """Return the warm handle of table ``name``, opening it on first use."""
+        with self._tables_lock:
+            if name not in self._tables:
+                self._tables[name] = self.db.open_table(name=name)
+            return self._tables[name]
+
+    def ingest_source(self, source: str) -> Optional[str]:
+        """
+        Check a source sent to ``/ingest``.
+
+        Args:
+            source: URL, or path of a file or directory, relative to the working directory
+
+        Returns:
+            Optional[str]: The URL, or the real path when it lies inside
+            ``SERVER.INGEST_ROOT``; None if the source may not be read
+        """
+        if urlparse(url=source).scheme in ("http", "https"):
+            return source
+        if self.ingest_root is None:
+            return None
+        # Symlinks and ".." are resolved first, so neither leads out of the root
+        path: str = os.path.realpath(source)
+        if os.path.commonpath([path, self.ingest_root]) != self.ingest_root:
+            return None
+        return path
+
+    async def run(self, function: Callable[..., Any], **kwargs: Any) -> Any:
+        """Run a blocking call on the worker threads."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(function, **kwargs)
+        )
+
+    async def tables(self, names: List[str]) -> List[Table]:
+        """Warm handles of the tables, the first one being the main table."""
+        # A finished job may drop a handle at any time, so the dict is only read
+        # under the lock and opened handles are used as returned
+        handles: List[Table] = []
+        for name in names:
+            with self._tables_lock:
+                warm: Optional[Table] = self._tables.get(name)
+            if warm is not None:
+                handles.append(warm)
+                continue
+            try:
+                table: Table = await self.run(self.open_table, name=name)
+            except (FileNotFoundError, ValueError) as e:
+                raise tornado.web.HTTPError(status_code=404, reason=f"Unknown table {name}") from e
+            handles.append(table)
+        return handles
+
+    async def query_vector(self, tables: List[Table], query: str) -> Optional[List[float]]:
+        """
+        Batched embedding of ``query``, shared by all ``tables``.
+
+        The query joins the process-wide coalescer without holding a worker thread
+        while its batch fills.
+
+        Returns:
+            Optional[List[float]]: None when batching is off, no vector is needed
+            (full-text search) or the tables use different embedding functions, the
+            search then embedding the query itself
+        """
+        if not self.batching.enabled or not can_share_query_vector(
+            tables=tables, retrieval=self.retrieval
+        ):
+            return None
+        coalescer = get_query_coalescer(config=self.batching)
+        return await asyncio.wrap_future(coalescer.submit(table=tables[0], query=query))
+
+    async def search(
+        self, body: Dict[str, Any], query: str
+    ) -> Tuple[List[SearchResult], Dict[str, float]]:
+        """
+        Retrieve the context of ``query`` as described by a request body.
+
+        Returns:
+            Tuple[List[SearchResult], Dict[str, float]]: Results best first and the
+            duration in ms of the embedding and the search
+        """
+        names: List[str] = [body.get("table") or self.cfgs["VECTOR_DB"]["TABLE_NAME"]]
+        names.extend(name for name in body.get("tables") or [] if name not in names)
+        tables: List[Table] = await self.tables(names=names)
+        try:
+            filters = MetadataFilter(**(body.get("filters") or {}))
+        except TypeError as e:
+            raise tornado.web.HTTPError(status_code=400, reason=f"Invalid filters: {e}") from e
+
+        start: float = time.perf_counter()
+        vector: Optional[List[float]] = await self.query_vector(tables=tables, query=query)
+        embedded: float = time.perf_counter()
+        results: List[SearchResult] = await self.run(
+            get_context,
+            query=query,
+            table=tables[0],
+            num_results=int(
+                body.get("limit") or self.cfgs["VECTOR_DB"]["SEARCH"]["CONTEXT_RESULTS"]
+            ),
+            retrieval=self.retrieval,
+            filters=filters if filters.active else None,
+            tables=tables[1:],
+            rerank=self.rerank,
+            vector=vector,
+        )
+        timings: Dict[str, float] = {
+            "embed_ms": round((embedded - start) * 1000, 2),
+            "search_ms": round((time.perf_counter() - embedded) * 1000, 2),
+        }
+        return results, timings
+
+    async def answer(
+        self, messages: List[Dict[str, str]], context: List[SearchResult]
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream the answer to the last message, at most ``MAX_LLM_CONCURRENCY`` at a time.
+
+        Yields:
+            str: Text deltas of the answer
+        """
+        llm_cfgs: Dict[str, Any] = self.cfgs["LLM"]
+        self.llm_waiting += 1
+        try:
+            await self.llm_slots.acquire()
+        finally:
+            self.llm_waiting -= 1
+        self.llm_active += 1
+        try:
+            deltas: AsyncGenerator[str, None] = iterate_in_thread(
+                executor=self.executor,
+                factory=partial(
+                    stream_chat_response,
+                    client=self.client,
+                    model_name=llm_cfgs["MODEL"],
+                    messages=messages,
+                    temperature=llm_cfgs["TEMPERATURE"],
+                    context=context,
+                    window=get_conversation_window(
+                        window_cfgs=llm_cfgs["CONTEXT_WINDOW"],
+                        client=self.client,
+                        model_name=llm_cfgs["MODEL"],
+                    ),
+                ),
+            )
+            async with contextlib.aclosing(deltas):
+                async for delta in deltas:
+                    yield delta
+        finally:
+            self.llm_active -= 1
+            self.llm_slots.release()
+
+    def _job_finished(self, job: IngestJob) -> None:
+        # An overwritten table is reopened with its new schema and indexes
+        with self._tables_lock:
+            self._tables.pop(job.table, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters shown by ``/stats``."""
+        return {
+            "tables": sorted(self._tables),
+            "embed_batching": get_query_coalescer(config=self.batching).stats(),
+            "llm": {"active": self.llm_active, "waiting": self.llm_waiting},
+            "jobs": self.jobs.stats(),
+        }
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    """JSON request bodies and JSON errors."""
+
+    def initialize(self, service: RagService) -> None:
+        self.service: RagService = service
+
+    def json_body(self) -> Dict[str, Any]:
+        try:
+            body: Any = json.loads(self.request.body or b"{}")
+        except ValueError as e:
+            raise tornado.web.HTTPError(status_code=400, reason="Invalid JSON body") from e
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(status_code=400, reason="Expected a JSON object")
+        return body
+
+    def required(self, body: Dict[str, Any], name: str) -> Any:
+        if not body.get(name):
+            raise tornado.web.HTTPError(status_code=400, reason=f"Missing {name}")
+        return body[name]
+
+    def write_error(self, status_code: int, **kwargs: Any) -> None:
+        self.finish(chunk={"error": self._reason})
+
+
+class HealthHandler(BaseHandler):
+    def get(self) -> None:
+        self.write(chunk={"status": "ok"})
+
+
+class StatsHandler(BaseHandler):
+    def get(self) -> None:
+        self.write(chunk=self.service.stats())
+
+
+class SearchHandler(BaseHandler):
+    """``POST /search {"query", "table", "tables", "limit", "filters"}``"""
+
+    async def post(self) -> None:
+        body: Dict[str, Any] = self.json_body()
+        query: str = self.required(body=body, name="query")
+        results, timings = await self.service.search(body=body, query=query)
+        self.write(chunk={"results": [asdict(result) for result in results], "timings": timings})
+
+
+class AskHandler(BaseHandler):
+    """``POST /ask {"question", "history", "table", "tables", "limit", "filters", "stream"}``
+
+    Streams Server-Sent Events: ``context`` with the retrieved chunks, one
+    ``token`` per text delta, then ``done`` with the full answer, or ``error``.
+    With ``"stream": false`` the answer is returned as a single JSON object.
+    The service keeps no conversation state; earlier turns are sent as ``history``.
+    """
+
+    async def send_event(self, event: str, data: Dict[str, Any]) -> None:
+        self.write(chunk=f"event: {event}\ndata: {json.dumps(obj=data)}\n\n")
+        await self.flush()
+
+    async def post(self) -> None:
+        body: Dict[str, Any] = self.json_body()
+        question: str = self.required(body=body, name="question")
+        messages: List[Dict[str, str]] = [
+            {"role": message["role"], "content": message["content"]}
+            for message in body.get("history") or []
+        ]
+        messages.append({"role": "user", "content": question})
+
+        start: float = time.perf_counter()
+        context, timings = await self.service.search(body=body, query=question)
+        stream: bool = body.get("stream", True)
+        if stream:
+            self.set_header("Content-Type", "text/event-stream")
+            self.set_header("Cache-Control", "no-cache")
+            self.set_header("X-Accel-Buffering", "no")
+
+        answer: List[str] = []
+        llm_start: float = time.perf_counter()
+        try:
+            if stream:
+                await self.send_event(
+                    event="context", data={"results": [asdict(result) for result in context]}
+                )
+            # Closing the stream early frees its LLM slot and stops the download
+            async with contextlib.aclosing(
+                self.service.answer(messages=messages, context=context)
+            ) as deltas:
+                async for delta in deltas:
+                    if not answer:
+                        timings["first_token_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                    answer.append(delta)
+                    if stream:
+                        await self.send_event(event="token", data={"delta": delta})
+        except StreamClosedError:
+            logger.info(msg="Client disconnected while the answer was streamed")
+            return
+        except Exception as e:
+            logger.exception(msg="Answer generation failed")
+            if not stream:
+                raise tornado.web.HTTPError(status_code=502, reason=f"LLM error: {e}") from e
+            await self.send_event(event="error", data={"error": str(e)})
+            return
+
+        timings["llm_ms"] = round((time.perf_counter() - llm_start) * 1000, 2)
+        timings["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        result: Dict[str, Any] = {"answer": "".join(answer), "timings": timings}
+        if stream:
+            await self.send_event(event="done", data=result)
+        else:
+            result["context"] = [asdict(item) for item in context]
+            self.write(chunk=result)
+
+
+class IngestHandler(BaseHandler):
+    """``POST /ingest {"sources" | "website", "table", "mode", "workers", "max_pages"}``.
+
+    Queues an ingestion job of documents, or of the pages of a website's sitemap.
+    Sources are URLs, or local paths inside ``SERVER.INGEST_ROOT``.
+    """
+
+    def post(self) -> None:
+        body: Dict[str, Any] = self.json_body()
+        mode: str = body.get("mode") or self.service.cfgs["VECTOR_DB"]["MODE"]
+        if mode not in ("create", "overwrite", "upsert"):
+            raise tornado.web.HTTPError(status_code=400, reason=f"Invalid mode {mode}")
+        options: Dict[str, Any] = {
+            name: body[name]
+            for name in ("workers", "max_pages", "sitemap_filename")
+            if name in body
+        }
+        if body.get("website"):
+            kind, sources = "website", [body["website"]]
+        else:
+            kind, sources = "documents", []
+            for source in self.required(body=body, name="sources"):
+                checked: Optional[str] = (
+                    self.service.ingest_source(source=source) if isinstance(source, str) else None
+                )
+                if checked is None:
+                    raise tornado.web.HTTPError(
+                        status_code=403, reason=f"Source not allowed: {source}"
+                    )
+                sources.append(checked)
+        job: IngestJob = self.service.jobs.submit(
+            kind=kind,
+            table=body.get("table") or self.service.cfgs["VECTOR_DB"]["TABLE_NAME"],
+            sources=sources,
+            mode=mode,
+            options=options,
+        )
+        self.set_status(status_code=202)
+        self.write(chunk=asdict(job))
+
+
+class IngestJobHandler(BaseHandler):
+    """``GET /ingest/<id>`` reports the progress of an ingestion job."""
+
+    def get(self, job_id: str) -> None:
+        job: Optional[IngestJob] = self.service.jobs.get(job_id=job_id)
+        if job is None:
+            raise tornado.web.HTTPError(status_code=404, reason=f"Unknown job {job_id}")
+        self.write(chunk=asdict(job))
+
+
+def make_app(service: RagService) -> tornado.web.Application:
+    """Routes of the service."""
+    args: Dict[str, Any] = {"service": service}
+    return tornado.web.Application(
+        handlers=[
+            (r"/health", HealthHandler, args),
+            (r"/stats", StatsHandler, args),
+            (r"/search", SearchHandler, args),
+            (r"/ask", AskHandler, args),
+            (r"/ingest", IngestHandler, args),
+            (r"/ingest/([0-9a-f]+)", IngestJobHandler, args),
+        ]
+    )
+
+
+async def serve(host: str, port: int) -> None:
+    """Run the service until the process is stopped."""
+    service = RagService(cfgs=cfgs)
+    make_app(service=service).listen(port=port, address=host)
+    print(f"Hybrid RAG service listening on http://{host}:{port}")
+    await asyncio.Event().wait()
+
+
+def main() -> None:
+    """Run the HTTP service from the command line."""
+    parser = argparse.ArgumentParser(description="Hybrid RAG HTTP service")
+    parser.add_argument("--host", default=cfgs["SERVER"]["HOST"])
+    parser.add_argument("--port", type=int, default=cfgs["SERVER"]["PORT"])
+    args: argparse.Namespace = parser.parse_args()
+
+    load_dotenv()
+    asyncio.run(main=serve(host=args.host, port=args.port))
+
+
+if __name__ == "__main__":
+    main()
+
+# Usage
+# uv run python src/app/server.py --port 8000
+# curl -N localhost:8000/ask -d '{"question": "What is Docling?", "table": "docling"}'
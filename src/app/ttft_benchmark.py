@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# """
+# ttft_benchmark.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.append(os.path.abspath(path=os.path.join(os.path.dirname(p=__file__), "../..")))
+
+import argparse
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+import lancedb
+from dotenv import load_dotenv
+from lancedb.table import Table
+from openai import OpenAI
+from utils.async_chat import (
+    AsyncChatConfig,
+    AsyncChatTurn,
+    get_async_client,
+    get_background_loop,
+    run_async,
+)
+from utils.chat_history import ChatHistoryStore
+from utils.context_window import get_conversation_window
+from utils.query_batcher import QueryBatchConfig
+from utils.reranking import RerankConfig
+from utils.retrieval import RetrievalConfig, SearchResult
+from utils.st_utils import get_context, stream_chat_response
+from utils.streaming import iterate_on_loop
+
+from configs import cfgs
+from src.app.index_report import percentile
+from src.app.load_test import make_questions
+
+load_dotenv()
+sync_client = OpenAI()
+
+Turn = Callable[[Table, ChatHistoryStore, str, str], Tuple[float, float]]
+
+
+def _search(table: Table) -> Callable[..., List[SearchResult]]:
+    return partial(
+        get_context,
+        table=table,
+        num_results=cfgs["VECTOR_DB"]["SEARCH"]["CONTEXT_RESULTS"],
+        retrieval=RetrievalConfig.from_configs(cfgs=cfgs),
+        rerank=RerankConfig.from_configs(cfgs=cfgs),
+        batching=QueryBatchConfig.from_configs(cfgs=cfgs),
+    )
+
+
+def sync_turn(
+    table: Table, store: ChatHistoryStore, session_id: str, question: str
+) -> Tuple[float, float]:
+    """
+    The blocking path: save the question, search, then stream the answer.
+
+    Returns:
+        Tuple[float, float]: Time to first token and total time, in ms
+    """
+    start: float = time.perf_counter()
+    message: Dict[str, str] = {"role": "user", "content": question}
+    store.append(table_name=table.name, session_id=session_id, message=message)
+    context: List[SearchResult] = _search(table=table)(query=question, vector=None)
+    first: float = 0.0
+    for _ in stream_chat_response(
+        client=sync_client,
+        model_name=cfgs["LLM"]["MODEL"],
+        messages=[message],
+        temperature=cfgs["LLM"]["TEMPERATURE"],
+        context=context,
+        window=get_conversation_window(window_cfgs=cfgs["LLM"]["CONTEXT_WINDOW"]),
+    ):
+        first = first or (time.perf_counter() - start) * 1000
+    return first, (time.perf_counter() - start) * 1000
+
+
+def async_turn(
+    table: Table, store: ChatHistoryStore, session_id: str, question: str
+) -> Tuple[float, float]:
+    """
+    The asyncio path, driven from the calling thread like a Streamlit session.
+
+    Returns:
+        Tuple[float, float]: Time to first token and total time, in ms
+    """
+    config: AsyncChatConfig = AsyncChatConfig.from_configs(cfgs=cfgs)
+    message: Dict[str, str] = {"role": "user", "content": question}
+    turn = AsyncChatTurn(
+        client=get_async_client(config=config),
+        config=config,
+        model_name=cfgs["LLM"]["MODEL"],
+        temperature=cfgs["LLM"]["TEMPERATURE"],
+        messages=[message],
+        window=get_conversation_window(window_cfgs=cfgs["LLM"]["CONTEXT_WINDOW"]),
+    )
+    vector: Any = run_async(
+        coro=turn.prepare(
+            tables=[table],
+            persist=partial(
+                store.append, table_name=table.name, session_id=session_id, message=message
+            ),
+            batching=QueryBatchConfig.from_configs(cfgs=cfgs),
+            retrieval=RetrievalConfig.from_configs(cfgs=cfgs),
+        )
+    )
+    run_async(coro=turn.retrieve(search=_search(table=table), vector=vector))
+    for _ in iterate_on_loop(agen=turn.stream(), loop=get_background_loop()):
+        pass
+    return turn.timings.get("first_token_ms", 0.0), turn.timings["total_ms"]
+
+
+PATHS: Dict[str, Turn] = {"sync": sync_turn, "async": async_turn}
+
+
+def build_report(
+    table: Table, store: ChatHistoryStore, num_turns: int, concurrency_values: List[int]
+) -> List[Dict[str, Any]]:
+    """
+    Compare the time to first token of both chat paths on distinct questions.
+
+    Args:
+        table: Table searched
+        store: History store receiving the questions, cleared afterwards
+        num_turns: Questions asked per path and concurrency
+        concurrency_values: Numbers of sessions asking at the same time
+
+    Returns:
+        List[Dict[str, Any]]: One row per path and concurrency
+    """
+    session_id: str = f"ttft-benchmark-{uuid.uuid4().hex}"
+    report: List[Dict[str, Any]] = []
+    try:
+        # Warm the clients, connection pools and index caches
+        for turn in PATHS.values():
+            turn(table, store, session_id, "warm-up question")
+        for i, concurrency in enumerate(concurrency_values):
+            for name, turn in PATHS.items():
+                questions: List[str] = make_questions(num_questions=num_turns, seed=100 * i)
+                questions = [f"{question} [{name}]" for question in questions]
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    samples: List[Tuple[float, float]] = list(
+                        pool.map(lambda q: turn(table, store, session_id, q), questions)
+                    )
+                first: List[float] = [sample[0] for sample in samples]
+                report.append(
+                    {
+                        "path": name,
+                        "concurrency": concurrency,
+                        "ttft_p50_ms": round(statistics.median(first), 1),
+                        "ttft_p95_ms": round(percentile(values=first, pct=95), 1),
+                        "total_p50_ms": round(statistics.median(s[1] for s in samples), 1),
+                    }
+                )
+    finally:
+        store.clear(table_name=table.name, session_id=session_id)
+    return report
+
+
+def main() -> None:
+    """Print the time to first token of the sync and async chat paths."""
+    parser = argparse.ArgumentParser(description="Time to first token, sync vs async chat")
+    parser.add_argument("--table", default=cfgs["VECTOR_DB"]["TABLE_NAME"])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--concurrency", default="1,8")
+    args: argparse.Namespace = parser.parse_args()
+
+    db: lancedb.DBConnection = lancedb.connect(uri=cfgs["VECTOR_DB"]["URI"])
+    report: List[Dict[str, Any]] = build_report(
+        table=db.open_table(name=args.table),
+        store=ChatHistoryStore(path=cfgs["CHAT_HISTORY"]["PATH"]),
+        num_turns=args.turns,
+        concurrency_values=[int(c) for c in args.concurrency.split(sep=",")],
+    )
+    for row in report:
+        print("  ".join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main()
+
+# Usage
+# uv run python src/app/ttft_benchmark.py --table docling --turns 50 --concurrency 1,8
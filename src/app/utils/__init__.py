@@ -1,25 +1,106 @@
-from .add import add
-from .sidebar_handler import handle_sidebar
+from typing import TYPE_CHECKING
+
+from .answer_cache import SemanticAnswerCache, get_answer_cache
+from .async_chat import AsyncChatConfig, AsyncChatTurn, get_async_client
+from .batch_embedder import BatchEmbedder
+from .chat_history import ChatHistoryStore, get_chat_history_store
+from .checkpoint import (
+    CheckpointManifest,
+    get_checkpoint_manifest,
+    plan_resume,
+    upsert_scope,
+)
+from .context_window import ConversationWindow, PromptBreakdown
+from .converters import ConverterRegistry, get_converter_registry
+from .crawler import SitemapCrawler, iter_site_pages
+from .embedding_cache import CachedEmbeddings, EmbeddingCache, get_embedding_cache
+from .retrieval import (
+    MetadataFilter,
+    RetrievalConfig,
+    SearchResult,
+    federated_search,
+    hybrid_search,
+)
+from .query_batcher import QueryBatchConfig, QueryEmbeddingCoalescer, get_query_coalescer
+from .reranking import RerankConfig, Reranker, get_reranker
 from .sitemap import get_sitemap_urls
 from .st_utils import (
+    append_chat_message,
     clean_table_name,
     get_chat_response,
     get_context,
+    get_session_id,
     init_db,
     load_chat_history,
-    save_chat_history,
+    stream_chat_response,
 )
 from .tokenizer import OpenAITokenizerWrapper
 
+if TYPE_CHECKING:
+    # Loaded lazily by __getattr__ below, imported here for type checkers only
+    from .ingest_jobs import IngestJobQueue, get_ingest_job_queue
+    from .sidebar_handler import handle_sidebar
+
+
+def __getattr__(name: str):
+    # The sidebar imports the ingestion pipeline, which itself imports from this
+    # package; loading it lazily lets ``src.app.embedding`` be imported first
+    # (e.g. by process-pool workers)
+    if name == "handle_sidebar":
+        from .sidebar_handler import handle_sidebar
+
+        return handle_sidebar
+    if name in ("IngestJobQueue", "get_ingest_job_queue"):
+        from . import ingest_jobs
+
+        return getattr(ingest_jobs, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__: list[str] = [
+    "SemanticAnswerCache",
+    "get_answer_cache",
+    "AsyncChatConfig",
+    "AsyncChatTurn",
+    "get_async_client",
+    "BatchEmbedder",
+    "ChatHistoryStore",
+    "get_chat_history_store",
+    "CheckpointManifest",
+    "get_checkpoint_manifest",
+    "plan_resume",
+    "upsert_scope",
+    "ConversationWindow",
+    "PromptBreakdown",
+    "ConverterRegistry",
+    "get_converter_registry",
+    "SitemapCrawler",
+    "iter_site_pages",
+    "IngestJobQueue",
+    "get_ingest_job_queue",
+    "CachedEmbeddings",
+    "EmbeddingCache",
+    "get_embedding_cache",
+    "MetadataFilter",
+    "RetrievalConfig",
+    "SearchResult",
+    "federated_search",
+    "hybrid_search",
+    "QueryBatchConfig",
+    "QueryEmbeddingCoalescer",
+    "get_query_coalescer",
+    "RerankConfig",
+    "Reranker",
+    "get_reranker",
     "get_sitemap_urls",
     "OpenAITokenizerWrapper",
     "handle_sidebar",
     "get_chat_response",
+    "stream_chat_response",
     "get_context",
     "init_db",
     "load_chat_history",
-    "save_chat_history",
+    "append_chat_message",
+    "get_session_id",
     "clean_table_name",
-    "add",
 ]
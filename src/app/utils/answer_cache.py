@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+# """
+# answer_cache.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from lancedb.table import Table
+from utils.retrieval import SearchResult
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """Scope within which cached answers can be reused."""
+
+    table: str
+    version: int
+    model: str
+    temperature_bucket: int
+
+
+@dataclass
+class CachedAnswer:
+    """A previously generated answer and what it was generated from."""
+
+    question: str
+    answer: str
+    context: List[SearchResult]
+    similarity: float
+
+
+def _dump_context(context: Sequence[SearchResult]) -> str:
+    return json.dumps([asdict(result) for result in context])
+
+
+def _load_context(data: str) -> List[SearchResult]:
+    try:
+        results: List[Dict[str, Any]] = json.loads(data)
+    except json.JSONDecodeError:
+        # Entries written before results were structured hold the prompt text
+        return [SearchResult(text=data, score=0.0)]
+    return [SearchResult(**{**result, "pages": tuple(result["pages"])}) for result in results]
+
+
+def answer_key(table: Table, model: str, temperature: float, bucket_size: float) -> AnswerKey:
+    """
+    Build the cache key of a chat turn.
+
+    The table version changes on every write, so answers generated before a
+    re-ingestion are never served afterwards. The table is first brought to
+    its latest version, as a cached handle does not see writes made through
+    other connections.
+
+    Args:
+        table: LanceDB table the answer is grounded in
+        model: Chat model name
+        temperature: Sampling temperature
+        bucket_size: Width of the temperature buckets sharing answers
+
+    Returns:
+        AnswerKey: Cache key
+    """
+    table.checkout_latest()
+    return AnswerKey(
+        table=table.name,
+        version=table.version,
+        model=model,
+        temperature_bucket=int(round(temperature / bucket_size)) if bucket_size else 0,
+    )
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    array: np.ndarray = np.asarray(vector, dtype=np.float32)
+    norm: float = float(np.linalg.norm(array))
+    return array / norm if norm else array
+
+
+class SemanticAnswerCache:
+    """Answers to earlier questions, looked up by question-embedding similarity.
+
+    Entries live in SQLite and expire after ``ttl_seconds``; beyond
+    ``max_entries`` the least recently used ones are evicted. The question
+    vectors of each key are kept in memory as one matrix, so a lookup is a
+    single matrix-vector product. Entries of older versions of a table are
+    purged the first time a newer version is looked up.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.95,
+        ttl_seconds: float = 86_400,
+        max_entries: int = 10_000,
+    ) -> None:
+        """Open (or create) the cache database.
+
+        Args:
+            path: Path of the SQLite file
+            threshold: Minimum cosine similarity for a question to count as a repeat
+            ttl_seconds: Lifetime of an answer
+            max_entries: Number of answers kept before LRU eviction kicks in
+        """
+        os.makedirs(name=os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path: str = path
+        self.threshold: float = threshold
+        self.ttl_seconds: float = ttl_seconds
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._vectors: Dict[AnswerKey, Tuple[List[int], np.ndarray]] = {}
+        self._conn = sqlite3.connect(database=path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                model TEXT NOT NULL,
+                temperature_bucket INTEGER NOT NULL,
+                question TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                context TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_key "
+            "ON answers (table_name, version, model, temperature_bucket)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_last_access ON answers (last_access)"
+        )
+        self._conn.commit()
+        self._size: int = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def _load(self, key: AnswerKey) -> Tuple[List[int], np.ndarray]:
+        if key not in self._vectors:
+            rows: List[Any] = self._conn.execute(
+                "SELECT id, vector FROM answers WHERE table_name = ? AND version = ? "
+                "AND model = ? AND temperature_bucket = ? AND created_at >= ?",
+                (
+                    key.table,
+                    key.version,
+                    key.model,
+                    key.temperature_bucket,
+                    time.time() - self.ttl_seconds,
+                ),
+            ).fetchall()
+            ids: List[int] = [row[0] for row in rows]
+            matrix: np.ndarray = (
+                np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                if rows
+                else np.empty((0, 0), dtype=np.float32)
+            )
+            self._vectors[key] = (ids, matrix)
+        return self._vectors[key]
+
+    def _purge_old_versions(self, key: AnswerKey) -> None:
+        if self._versions.get(key.table) == key.version:
+            return
+        self._versions[key.table] = key.version
+        deleted: int = self._conn.execute(
+            "DELETE FROM answers WHERE table_name = ? AND version != ?",
+            (key.table, key.version),
+        ).rowcount
+        self._conn.commit()
+        if deleted:
+            self._size -= deleted
+            self._vectors = {k: v for k, v in self._vectors.items() if k.table != key.table}
+            logger.info(msg=f"Invalidated {deleted} cached answers of {key.table}")
+
+    def lookup(self, key: AnswerKey, vector: Sequence[float]) -> Optional[CachedAnswer]:
+        """
+        Find the answer to the most similar earlier question.
+
+        Args:
+            key: Cache key of the current turn
+            vector: Embedding of the current question
+
+        Returns:
+            Optional[CachedAnswer]: Cached answer if a question within the threshold exists
+        """
+        with self._lock:
+            self._purge_old_versions(key=key)
+            ids, matrix = self._load(key=key)
+            if not ids:
+                self.misses += 1
+                return None
+
+            similarities: np.ndarray = matrix @ _unit(vector=vector)
+            best: int = int(np.argmax(similarities))
+            similarity: float = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            row: Optional[Any] = self._conn.execute(
+                "SELECT question, answer, context, created_at FROM answers WHERE id = ?",
+                (ids[best],),
+            ).fetchone()
+            if row is None or row[3] < time.time() - self.ttl_seconds:
+                # Evicted or expired since the vectors were loaded
+                self._vectors.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE answers SET last_access = ? WHERE id = ?", (time.time(), ids[best])
+            )
+            self._conn.commit()
+            self.hits += 1
+        return CachedAnswer(
+            question=row[0],
+            answer=row[1],
+            context=_load_context(data=row[2]),
+            similarity=similarity,
+        )
+
+    def store(
+        self,
+        key: AnswerKey,
+        question: str,
+        vector: Sequence[float],
+        answer: str,
+        context: Sequence[SearchResult],
+    ) -> None:
+        """
+        Remember an answer, evicting expired and least recently used entries if needed.
+
+        Args:
+            key: Cache key of the turn
+            question: User question
+            vector: Embedding of the question
+            answer: Generated answer
+            context: Retrieved chunks the answer was generated from
+        """
+        unit: np.ndarray = _unit(vector=vector)
+        now: float = time.time()
+        with self._lock:
+            self._purge_old_versions(key=key)
+            cursor: sqlite3.Cursor = self._conn.execute(
+                "INSERT INTO answers (table_name, version, model, temperature_bucket, question, "
+                "vector, answer, context, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key.table,
+                    key.version,
+                    key.model,
+                    key.temperature_bucket,
+                    question,
+                    unit.tobytes(),
+                    answer,
+                    _dump_context(context=context),
+                    now,
+                    now,
+                ),
+            )
+            self._size += 1
+            if cursor.lastrowid is None:
+                # Unknown row id: reload the vectors of the key on its next lookup
+                self._vectors.pop(key, None)
+            elif key in self._vectors:
+                ids, matrix = self._vectors[key]
+                matrix = np.vstack([matrix, unit]) if ids else unit[np.newaxis, :]
+                self._vectors[key] = ([*ids, cursor.lastrowid], matrix)
+            if self._size > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        expired: int = self._conn.execute(
+            "DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+        self._size -= expired
+        count: int = max(0, self._size - self.max_entries)
+        if count:
+            self._conn.execute(
+                "DELETE FROM answers WHERE id IN "
+                "(SELECT id FROM answers ORDER BY last_access LIMIT ?)",
+                (count,),
+            )
+            self._size -= count
+        self.evictions += expired + count
+        # Reload the vector matrices lazily rather than patching them
+        self._vectors.clear()
+        logger.info(msg=f"Evicted {expired + count} entries from answer cache {self.path}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size of the cache."""
+        lookups: int = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_caches: Dict[str, SemanticAnswerCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_answer_cache(cache_cfgs: Dict[str, Any]) -> SemanticAnswerCache:
+    """Return the process-wide answer cache described by ``LLM.CACHE``."""
+    key: str = os.path.abspath(cache_cfgs["PATH"])
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = SemanticAnswerCache(
+                path=cache_cfgs["PATH"],
+                threshold=cache_cfgs["SIMILARITY_THRESHOLD"],
+                ttl_seconds=cache_cfgs["TTL_SECONDS"],
+                max_entries=cache_cfgs["MAX_ENTRIES"],
+            )
+        return _caches[key]
+
+
+def get_answer_caches() -> List[SemanticAnswerCache]:
+    """Return every answer cache opened in this process."""
+    return list(_caches.values())
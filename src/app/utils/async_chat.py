@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+# """
+# async_chat.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import httpx
+from lancedb.table import Table
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from openai.types.chat import (
+    ChatCompletionAssistantMessageParam,
+    ChatCompletionMessageParam,
+    ChatCompletionSystemMessageParam,
+    ChatCompletionUserMessageParam,
+)
+from utils.context_window import ConversationWindow
+from utils.query_batcher import QueryBatchConfig, can_share_query_vector, get_query_coalescer
+from utils.retrieval import RetrievalConfig, SearchResult, embed_query
+from utils.st_utils import SYSTEM_PROMPT
+
+T = TypeVar("T")
+
+REWRITE_PROMPT: str = (
+    "Rewrite the last user question of the conversation as a standalone search query, "
+    "resolving pronouns and references to earlier turns. Reply with the query only."
+)
+
+
+@dataclass
+class AsyncChatConfig:
+    """Settings of the asyncio chat path (``LLM.ASYNC``)."""
+
+    enabled: bool = True
+    max_connections: int = 100
+    max_keepalive: int = 20
+    timeout: float = 60.0
+    rewrite_query: bool = False
+
+    @classmethod
+    def from_configs(cls, cfgs: Dict[str, Any]) -> "AsyncChatConfig":
+        """Build the settings from the application configuration."""
+        async_cfgs: Dict[str, Any] = cfgs["LLM"]["ASYNC"]
+        return cls(
+            enabled=async_cfgs["ENABLED"],
+            max_connections=async_cfgs["MAX_CONNECTIONS"],
+            max_keepalive=async_cfgs["MAX_KEEPALIVE"],
+            timeout=async_cfgs["TIMEOUT"],
+            rewrite_query=async_cfgs["REWRITE_QUERY"],
+        )
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop, running in a daemon thread.
+
+    Every session of the app runs its turns on this loop, so the HTTP
+    connections pooled by the async client, which belong to the loop they were
+    opened on, are shared by all of them.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-chat", daemon=True).start()
+        return _loop
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro=coro, loop=get_background_loop()).result()
+
+
+def _message_param(message: Dict[str, str]) -> ChatCompletionMessageParam:
+    # Typed API message of a {"role", "content"} history entry
+    if message["role"] == "system":
+        return ChatCompletionSystemMessageParam(role="system", content=message["content"])
+    if message["role"] == "assistant":
+        return ChatCompletionAssistantMessageParam(role="assistant", content=message["content"])
+    return ChatCompletionUserMessageParam(role="user", content=message["content"])
+
+
+_clients: Dict[Tuple[int, int, float], AsyncOpenAI] = {}
+_clients_lock = threading.Lock()
+
+
+def get_async_client(config: AsyncChatConfig) -> AsyncOpenAI:
+    """Return the process-wide ``AsyncOpenAI`` client with a pooled HTTP client."""
+    key: Tuple[int, int, float] = (config.max_connections, config.max_keepalive, config.timeout)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = AsyncOpenAI(
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=config.max_connections,
+                        max_keepalive_connections=config.max_keepalive,
+                    ),
+                    timeout=config.timeout,
+                )
+            )
+        return _clients[key]
+
+
+class FirstTokenStats:
+    """Time to first token of the answers, per chat path ("sync" or "async")."""
+
+    def __init__(self, window: int = 1000) -> None:
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self.window: int = window
+
+    def record(self, path: str, ttft_ms: float) -> None:
+        """Add the time to first token of a turn, measured from the question."""
+        with self._lock:
+            self._samples.setdefault(path, deque(maxlen=self.window)).append(ttft_ms)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Percentiles of the latest turns of each path."""
+        rows: List[Dict[str, Any]] = []
+        with self._lock:
+            samples: Dict[str, List[float]] = {
+                path: list(values) for path, values in self._samples.items()
+            }
+        for path, values in sorted(samples.items()):
+            ordered: List[float] = sorted(values)
+            rows.append(
+                {
+                    "path": path,
+                    "turns": len(values),
+                    "p50_ms": round(ordered[len(ordered) // 2], 1),
+                    "p90_ms": round(ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))], 1),
+                    "last_ms": round(values[-1], 1),
+                }
+            )
+        return rows
+
+
+_first_token_stats = FirstTokenStats()
+
+
+def get_first_token_stats() -> FirstTokenStats:
+    """Return the process-wide time to first token stats."""
+    return _first_token_stats
+
+
+class AsyncChatTurn:
+    """One question answered on the background loop, overlapping its independent steps.
+
+    ``prepare`` saves the question while it is rewritten (optionally) and
+    embedded, ``retrieve`` searches and opens the completion stream as soon as
+    the context is known, while the caller renders the results, and ``stream``
+    yields the answer. ``timings`` holds when each step finished, in ms since
+    the question was asked.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        config: AsyncChatConfig,
+        model_name: str,
+        temperature: float,
+        messages: List[Dict[str, str]],
+        window: Optional[ConversationWindow] = None,
+        started: Optional[float] = None,
+    ) -> None:
+        """Initialize the turn.
+
+        Args:
+            client: Async OpenAI client, see ``get_async_client``
+            config: Async path settings
+            model_name: Chat model
+            temperature: Sampling temperature
+            messages: Chat history ending with the question
+            window: Token budget for the context and history, the defaults if omitted
+            started: ``time.perf_counter()`` when the question was asked
+        """
+        self.client: AsyncOpenAI = client
+        self.config: AsyncChatConfig = config
+        self.model_name: str = model_name
+        self.temperature: float = temperature
+        self.messages: List[Dict[str, str]] = messages
+        self.window: ConversationWindow = window or ConversationWindow()
+        self.started: float = started if started is not None else time.perf_counter()
+        self.query: str = messages[-1]["content"]
+        self.context: List[SearchResult] = []
+        self.timings: Dict[str, float] = {}
+        self._stream: Optional[asyncio.Task] = None
+
+    def _elapsed(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+    async def _rewrite(self) -> str:
+        response: Any = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[
+                ChatCompletionSystemMessageParam(role="system", content=REWRITE_PROMPT),
+                *(_message_param(message=message) for message in self.messages),
+            ],
+            temperature=0.0,
+        )
+        return (response.choices[0].message.content or "").strip() or self.query
+
+    async def _embed(
+        self, tables: Sequence[Table], batching: QueryBatchConfig, retrieval: RetrievalConfig
+    ) -> Optional[List[float]]:
+        if not can_share_query_vector(tables=tables, retrieval=retrieval):
+            return None
+        if batching.enabled:
+            coalescer = get_query_coalescer(config=batching)
+            return await asyncio.wrap_future(coalescer.submit(table=tables[0], query=self.query))
+        return await asyncio.to_thread(embed_query, table=tables[0], query=self.query)
+
+    async def prepare(
+        self,
+        tables: Sequence[Table],
+        persist: Callable[[], Any],
+        batching: QueryBatchConfig,
+        retrieval: RetrievalConfig,
+    ) -> Optional[List[float]]:
+        """
+        Save the question, and rewrite and embed it, concurrently.
+
+        Args:
+            tables: Searched tables, the first one being the conversation's
+            persist: Saves the question to the chat history
+            batching: Query embedding coalescing settings
+            retrieval: Retrieval settings, embedding is skipped for full-text search
+
+        Returns:
+            Optional[List[float]]: Vector of the search query, None if the search
+            embeds it itself
+        """
+        saved: asyncio.Future = asyncio.ensure_future(asyncio.to_thread(persist))
+        if self.config.rewrite_query and len(self.messages) > 1:
+            self.query = await self._rewrite()
+            self.timings["rewrite_ms"] = self._elapsed()
+        vector: Optional[List[float]] = await self._embed(
+            tables=tables, batching=batching, retrieval=retrieval
+        )
+        self.timings["embed_ms"] = self._elapsed()
+        await saved
+        self.timings["prepare_ms"] = self._elapsed()
+        return vector
+
+    async def retrieve(
+        self, search: Callable[..., List[SearchResult]], vector: Optional[List[float]]
+    ) -> List[SearchResult]:
+        """
+        Search the context and open the completion stream right away.
+
+        Args:
+            search: ``get_context`` with everything bound but ``query`` and ``vector``
+            vector: Vector returned by ``prepare``
+
+        Returns:
+            List[SearchResult]: Context of the answer, best first
+        """
+        self.context = await asyncio.to_thread(search, query=self.query, vector=vector)
+        self.timings["search_ms"] = self._elapsed()
+        self._stream = asyncio.ensure_future(self._open_stream())
+        return self.context
+
+    async def _open_stream(self) -> Any:
+        # Assembling may summarize dropped turns with a blocking call
+        messages_with_context, _ = await asyncio.to_thread(
+            self.window.assemble,
+            system_prompt=SYSTEM_PROMPT,
+            context=[result.to_prompt() for result in self.context],
+            messages=self.messages,
+        )
+        return await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[_message_param(message=message) for message in messages_with_context],
+            temperature=self.temperature,
+            stream=True,
+        )
+
+    async def stream(self) -> AsyncIterator[str]:
+        """
+        Stream the answer opened by ``retrieve``.
+
+        Yields:
+            str: Text deltas of the answer
+        """
+        if self._stream is None:
+            self._stream = asyncio.ensure_future(self._open_stream())
+        stream: Any = await self._stream
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if "first_token_ms" not in self.timings:
+                        self.timings["first_token_ms"] = self._elapsed()
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+            self.timings["total_ms"] = self._elapsed()
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+# """
+# batch_embedder.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set
+
+import openai
+from openai import OpenAI
+from utils.embedding_cache import EmbeddingCache
+from utils.streaming import batched
+from utils.tokenizer import OpenAITokenizerWrapper
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+# Rows whose texts are tokenized together with tiktoken's threaded batch encoder
+_COUNT_BLOCK_SIZE = 256
+
+_DURATION_PART = re.compile(pattern=r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS: Dict[str, float] = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse an OpenAI rate-limit duration such as ``"6m0s"`` or ``"20ms"`` into seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts: List[Any] = _DURATION_PART.findall(string=value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+def retry_delay_from_headers(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait before retrying, as advertised by the rate-limit headers."""
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        delay: Optional[float] = parse_duration(value=headers.get(name))
+        if delay is not None:
+            return delay
+    return None
+
+
+@dataclass
+class EmbeddingBatch:
+    """Texts sent in a single embeddings request."""
+
+    texts: List[str] = field(default_factory=list)
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    # Tokens of each text, counted once while packing the batch
+    counts: List[int] = field(default_factory=list)
+    tokens: int = 0
+
+
+@dataclass
+class EmbedderStats:
+    """Counters of a ``BatchEmbedder``."""
+
+    requests: int = 0
+    texts: int = 0
+    tokens: int = 0
+    cached: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    wait_seconds: float = 0.0
+
+
+class BatchEmbedder:
+    """Embeds texts in token-budgeted batches with bounded concurrency.
+
+    Batches are sized with the tiktoken-based ``OpenAITokenizerWrapper`` so each
+    request stays under ``max_batch_tokens`` and ``max_batch_items``. At most
+    ``max_in_flight`` requests run at once. On a 429 or transient error all
+    workers back off together, for as long as the rate-limit headers ask or
+    with exponential backoff when they say nothing.
+
+    The client honours ``OPENAI_BASE_URL``/``base_url``, so it can be pointed at a
+    local stub server (see ``utils/openai_stub.py``).
+    """
+
+    def __init__(
+        self,
+        model: str,
+        ndims: int,
+        dimensions: Optional[int] = None,
+        max_batch_tokens: int = 100_000,
+        max_batch_items: int = 512,
+        max_in_flight: int = 4,
+        max_retries: int = 8,
+        max_backoff: float = 60.0,
+        base_url: Optional[str] = None,
+        cache: Optional[EmbeddingCache] = None,
+        client: Optional[OpenAI] = None,
+    ) -> None:
+        """Initialize the embedder.
+
+        Args:
+            model: Embedding model name
+            ndims: Dimension of the returned vectors (used as cache key)
+            dimensions: ``dimensions`` request parameter, if the model is shortened
+            max_batch_tokens: Token budget of a single request
+            max_batch_items: Maximum number of inputs per request
+            max_in_flight: Maximum number of concurrent requests
+            max_retries: Retries per batch before giving up
+            max_backoff: Upper bound of a single backoff pause in seconds
+            base_url: Base URL of the OpenAI-compatible endpoint
+            cache: Optional embedding cache consulted before any request
+            client: Preconfigured OpenAI client
+        """
+        self.model: str = model
+        self.ndims: int = ndims
+        self.dimensions: Optional[int] = dimensions
+        self.max_batch_tokens: int = max_batch_tokens
+        self.max_batch_items: int = max_batch_items
+        self.max_in_flight: int = max_in_flight
+        self.max_retries: int = max_retries
+        self.max_backoff: float = max_backoff
+        self.cache: Optional[EmbeddingCache] = cache
+        # Retries are handled here so they can be coordinated across workers
+        self.client: OpenAI = client or OpenAI(base_url=base_url, max_retries=0)
+        self.tokenizer = OpenAITokenizerWrapper()
+        self.stats = EmbedderStats()
+        self._lock = threading.Lock()
+        self._pause_until: float = 0.0
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens the embeddings endpoint will bill for ``text``."""
+        return self.tokenizer.count_tokens(text=text)
+
+    def make_batches(
+        self, rows: Iterable[Dict[str, Any]], text_key: str = "text"
+    ) -> Iterator[EmbeddingBatch]:
+        """Group rows into batches that respect the token and item budgets.
+
+        Args:
+            rows: Rows holding the text to embed
+            text_key: Key of the text in each row
+
+        Returns:
+            Iterator[EmbeddingBatch]: Batches in input order
+        """
+        batch = EmbeddingBatch()
+        for block in batched(iterable=rows, size=_COUNT_BLOCK_SIZE):
+            counts: List[int] = self.tokenizer.count_tokens_batch(
+                texts=[row[text_key] for row in block]
+            )
+            for row, tokens in zip(block, counts):
+                if batch.texts and (
+                    batch.tokens + tokens > self.max_batch_tokens
+                    or len(batch.texts) >= self.max_batch_items
+                ):
+                    yield batch
+                    batch = EmbeddingBatch()
+                batch.texts.append(row[text_key])
+                batch.rows.append(row)
+                batch.counts.append(tokens)
+                batch.tokens += tokens
+        if batch.texts:
+            yield batch
+
+    def _wait_for_slot(self) -> None:
+        with self._lock:
+            delay: float = self._pause_until - time.monotonic()
+        if delay > 0:
+            with self._lock:
+                self.stats.wait_seconds += delay
+            time.sleep(delay)
+
+    def _pause(self, delay: float) -> None:
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + delay)
+
+    def _backoff(self, attempt: int, headers: Optional[Mapping[str, str]]) -> float:
+        delay: Optional[float] = retry_delay_from_headers(headers=headers) if headers else None
+        if delay is None:
+            delay = min(self.max_backoff, 2**attempt) * (0.5 + random.random() / 2)
+        return min(delay, self.max_backoff)
+
+    def _request(self, texts: List[str], tokens: int) -> List[List[float]]:
+        kwargs: Dict[str, Any] = {"input": texts, "model": self.model}
+        if self.dimensions is not None:
+            kwargs["dimensions"] = self.dimensions
+
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_slot()
+            try:
+                raw: Any = self.client.embeddings.with_raw_response.create(**kwargs)
+            except openai.RateLimitError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay: float = self._backoff(attempt=attempt, headers=e.response.headers)
+                with self._lock:
+                    self.stats.rate_limited += 1
+                    self.stats.retries += 1
+                logger.warning(msg=f"Embeddings rate limited, backing off {delay:.2f}s")
+                self._pause(delay=delay)
+                continue
+            except (openai.APIConnectionError, openai.InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt=attempt, headers=None)
+                with self._lock:
+                    self.stats.retries += 1
+                logger.warning(msg=f"Embeddings request failed ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+
+            # Slow down before the budget runs out instead of waiting for a 429
+            remaining: Optional[str] = raw.headers.get("x-ratelimit-remaining-tokens")
+            if remaining is not None and remaining.isdigit() and int(remaining) < tokens:
+                reset: Optional[float] = parse_duration(
+                    value=raw.headers.get("x-ratelimit-reset-tokens")
+                )
+                if reset:
+                    self._pause(delay=min(reset, self.max_backoff))
+
+            response: Any = raw.parse()
+            with self._lock:
+                self.stats.requests += 1
+                self.stats.texts += len(texts)
+                self.stats.tokens += tokens
+            return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+        raise RuntimeError("unreachable")
+
+    def _embed_batch(self, batch: EmbeddingBatch) -> EmbeddingBatch:
+        vectors: List[Optional[List[float]]] = [None] * len(batch.texts)
+        if self.cache is not None:
+            vectors = self.cache.get_many(model=self.model, dim=self.ndims, texts=batch.texts)
+
+        missing: List[int] = [i for i, vector in enumerate(vectors) if vector is None]
+        with self._lock:
+            self.stats.cached += len(batch.texts) - len(missing)
+
+        if missing:
+            counts: Dict[str, int] = {batch.texts[i]: batch.counts[i] for i in missing}
+            unique_texts: List[str] = list(counts)
+            embedded: List[List[float]] = self._request(
+                texts=unique_texts, tokens=sum(counts.values())
+            )
+            if self.cache is not None:
+                self.cache.put_many(
+                    model=self.model, dim=self.ndims, texts=unique_texts, vectors=embedded
+                )
+            by_text: Dict[str, List[float]] = dict(zip(unique_texts, embedded))
+            for i in missing:
+                vectors[i] = by_text[batch.texts[i]]
+
+        for row, vector in zip(batch.rows, vectors):
+            row["vector"] = vector
+        return batch
+
+    def iter_embedded(
+        self, rows: Iterable[Dict[str, Any]], text_key: str = "text"
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Embed rows and yield them batch by batch as the requests complete.
+
+        The input is consumed lazily: at most ``max_in_flight`` batches are
+        pending at any time, so rows can be written while others are embedded.
+
+        Args:
+            rows: Rows holding the text to embed; a ``vector`` key is added to each
+            text_key: Key of the text in each row
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: Embedded rows, one list per request
+        """
+        batches: Iterator[EmbeddingBatch] = self.make_batches(rows=rows, text_key=text_key)
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            pending: Set[Future] = set()
+            exhausted: bool = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.max_in_flight:
+                    batch: Optional[EmbeddingBatch] = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(self._embed_batch, batch))
+                if not pending:
+                    break
+
+                done, pending = wait(fs=pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result().rows
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts, preserving their order.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List[List[float]]: One vector per text
+        """
+        rows: List[Dict[str, Any]] = [{"text": text} for text in texts]
+        for _ in self.iter_embedded(rows=rows):
+            pass
+        return [row["vector"] for row in rows]
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# """
+# chat_history.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+
+class ChatHistoryStore:
+    """Append-only chat history backed by SQLite in WAL mode.
+
+    Every message is one row keyed by table and session, so saving a turn is a
+    single insert instead of a rewrite of the whole conversation. WAL lets
+    readers proceed while another session writes, and SQLite serializes
+    concurrent writers across processes. A ``<table>_history.json`` file left
+    next to the database by the former JSON history is imported once, into
+    the first session that opens the table.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open (or create) the history database.
+
+        Args:
+            path: Path of the SQLite file
+        """
+        os.makedirs(name=os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path: str = path
+        self._lock = threading.Lock()
+        self._checked: Set[str] = set()
+        self._conn = sqlite3.connect(database=path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_conversation "
+            "ON messages (table_name, session_id, id)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS legacy_imports (
+                table_name TEXT PRIMARY KEY,
+                messages INTEGER NOT NULL,
+                imported_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def _import_legacy(self, table_name: str, session_id: str) -> None:
+        # Called with the lock held; the JSON file is read once per process and
+        # table, and the legacy_imports row keeps other processes from importing it again
+        if table_name in self._checked:
+            return
+        self._checked.add(table_name)
+        path: str = os.path.join(
+            os.path.dirname(os.path.abspath(self.path)), f"{table_name}_history.json"
+        )
+        if not os.path.isfile(path):
+            return
+        try:
+            with open(file=path, encoding="utf-8") as f:
+                history: Any = json.load(fp=f)
+        except (OSError, ValueError):
+            # The JSON history created empty files for tables without messages
+            history = []
+        messages: List[Dict[str, Any]] = [
+            message
+            for message in (history if isinstance(history, list) else [])
+            if isinstance(message, dict) and "role" in message and "content" in message
+        ]
+        now: float = time.time()
+        with self._conn:
+            if not self._conn.execute(
+                "INSERT OR IGNORE INTO legacy_imports (table_name, messages, imported_at) "
+                "VALUES (?, ?, ?)",
+                (table_name, len(messages), now),
+            ).rowcount:
+                return
+            self._conn.executemany(
+                "INSERT INTO messages (table_name, session_id, role, content, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (table_name, session_id, message["role"], message["content"], now)
+                    for message in messages
+                ],
+            )
+        if messages:
+            logger.info(msg=f"Imported {len(messages)} messages from {path}")
+
+    def append(self, table_name: str, session_id: str, message: Dict[str, str]) -> int:
+        """
+        Append a message to a conversation.
+
+        Args:
+            table_name: Table the conversation is about
+            session_id: Conversation (browser session) identifier
+            message: Message with ``role`` and ``content``
+
+        Returns:
+            int: Id of the stored message
+        """
+        with self._lock:
+            self._import_legacy(table_name=table_name, session_id=session_id)
+            cursor: sqlite3.Cursor = self._conn.execute(
+                "INSERT INTO messages (table_name, session_id, role, content, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (table_name, session_id, message["role"], message["content"], time.time()),
+            )
+            self._conn.commit()
+        if cursor.lastrowid is None:
+            raise sqlite3.DatabaseError("The inserted message has no row id")
+        return cursor.lastrowid
+
+    def load(
+        self,
+        table_name: str,
+        session_id: str,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Load the most recent messages of a conversation, oldest first.
+
+        Args:
+            table_name: Table the conversation is about
+            session_id: Conversation identifier
+            limit: Maximum number of messages, all of them if omitted
+            before_id: Only messages older than this id, to page backwards
+
+        Returns:
+            List[Dict[str, Any]]: Messages with ``id``, ``role`` and ``content``
+        """
+        query: str = (
+            "SELECT id, role, content FROM messages WHERE table_name = ? AND session_id = ?"
+        )
+        params: List[Any] = [table_name, session_id]
+        if before_id is not None:
+            query += " AND id < ?"
+            params.append(before_id)
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            self._import_legacy(table_name=table_name, session_id=session_id)
+            rows: List[Any] = self._conn.execute(query, params).fetchall()
+        return [{"id": id_, "role": role, "content": content} for id_, role, content in rows[::-1]]
+
+    def count(self, table_name: str, session_id: str) -> int:
+        """Number of messages in a conversation."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE table_name = ? AND session_id = ?",
+                (table_name, session_id),
+            ).fetchone()[0]
+
+    def clear(self, table_name: str, session_id: str) -> None:
+        """Delete a conversation."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM messages WHERE table_name = ? AND session_id = ?",
+                (table_name, session_id),
+            )
+            self._conn.commit()
+
+
+_stores: Dict[str, ChatHistoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_chat_history_store(path: str) -> ChatHistoryStore:
+    """Return the process-wide history store at ``path``."""
+    key: str = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ChatHistoryStore(path=path)
+        return _stores[key]
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+# """
+# checkpoint.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Bytes read at a time when hashing a local document
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def source_hash(source: str) -> str:
+    """
+    Fingerprint of a source, used to tell whether it changed since it was ingested.
+
+    Args:
+        source: Local path or URL
+
+    Returns:
+        str: SHA-256 of the file contents, empty for URLs whose content is only
+            known after fetching them
+    """
+    if not os.path.isfile(source):
+        return ""
+    digest = hashlib.sha256()
+    with open(file=source, mode="rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class SourceCheckpoint:
+    """Ingestion state of one source of a table."""
+
+    source: str
+    hash: str
+    status: str
+    chunk_ids: List[str] = field(default_factory=list)
+    tokens: int = 0
+    error: Optional[str] = None
+    updated_at: float = 0.0
+
+
+class CheckpointManifest:
+    """Per-source ingestion checkpoints of a table, backed by SQLite in WAL mode.
+
+    A source is recorded as ``done`` only once all of its chunks are stored, so
+    a run interrupted at any point can be resumed by skipping the done sources
+    whose hash did not change. Failed sources are recorded with their error and
+    retried on the next run.
+    """
+
+    def __init__(self, path: str, table_name: str) -> None:
+        """Open (or create) the manifest database.
+
+        Args:
+            path: Path of the SQLite file, shared by all tables
+            table_name: Table whose checkpoints are read and written
+        """
+        os.makedirs(name=os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path: str = path
+        self.table_name: str = table_name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database=path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sources (
+                table_name TEXT NOT NULL,
+                source TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (table_name, source)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self) -> Dict[str, SourceCheckpoint]:
+        """Checkpoints of every source of the table, keyed by source."""
+        with self._lock:
+            rows: List[Any] = self._conn.execute(
+                "SELECT source, hash, status, chunk_ids, tokens, error, updated_at "
+                "FROM sources WHERE table_name = ?",
+                (self.table_name,),
+            ).fetchall()
+        return {
+            row[0]: SourceCheckpoint(
+                source=row[0],
+                hash=row[1],
+                status=row[2],
+                chunk_ids=json.loads(row[3]),
+                tokens=row[4],
+                error=row[5],
+                updated_at=row[6],
+            )
+            for row in rows
+        }
+
+    def record(self, checkpoint: SourceCheckpoint) -> None:
+        """Store the state of a source, replacing the previous one."""
+        checkpoint.updated_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (table_name, source, hash, status, chunk_ids, "
+                "tokens, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.table_name,
+                    checkpoint.source,
+                    checkpoint.hash,
+                    checkpoint.status,
+                    json.dumps(checkpoint.chunk_ids),
+                    checkpoint.tokens,
+                    checkpoint.error,
+                    checkpoint.updated_at,
+                ),
+            )
+            self._conn.commit()
+
+    def reset(self) -> None:
+        """Forget every checkpoint of the table, e.g. after it was overwritten."""
+        with self._lock:
+            self._conn.execute("DELETE FROM sources WHERE table_name = ?", (self.table_name,))
+            self._conn.commit()
+
+    def forget(self, sources: List[str]) -> None:
+        """Forget the checkpoints of some sources, so the next run ingests them again."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM sources WHERE table_name = ? AND source = ?",
+                [(self.table_name, source) for source in sources],
+            )
+            self._conn.commit()
+
+
+def plan_resume(
+    manifest: CheckpointManifest, sources: List[str]
+) -> Tuple[List[str], List[SourceCheckpoint], Dict[str, str]]:
+    """
+    Split the sources of a run into those to ingest and those it can skip.
+
+    Args:
+        manifest: Checkpoints of the table
+        sources: Sources of the run
+
+    Returns:
+        Tuple[List[str], List[SourceCheckpoint], Dict[str, str]]: Sources to
+            ingest, checkpoints of the sources done by an earlier run and not
+            changed since, and the hash of every source
+    """
+    checkpoints: Dict[str, SourceCheckpoint] = manifest.load()
+    hashes: Dict[str, str] = {source: source_hash(source=source) for source in sources}
+    todo: List[str] = []
+    done: List[SourceCheckpoint] = []
+    for source in sources:
+        checkpoint: Optional[SourceCheckpoint] = checkpoints.get(source)
+        if checkpoint and checkpoint.status == "done" and checkpoint.hash == hashes[source]:
+            done.append(checkpoint)
+        else:
+            todo.append(source)
+    return todo, done, hashes
+
+
+def upsert_scope(manifest: CheckpointManifest, todo: List[str]) -> Tuple[Set[str], Set[str]]:
+    """
+    Split the stored chunks of a table into those an upsert of ``todo`` must keep
+    and those it may delete.
+
+    Only the chunks recorded for the sources ingested again can go stale. The
+    chunks of every other source done in the table are kept, whether or not it
+    is part of the run, and stored chunks unknown to the manifest are never
+    deleted.
+
+    Args:
+        manifest: Checkpoints of the table
+        todo: Sources the run ingests
+
+    Returns:
+        Tuple[Set[str], Set[str]]: Chunk ids to keep and chunk ids that may be
+            deleted when the run does not produce them again
+    """
+    checkpoints: Dict[str, SourceCheckpoint] = manifest.load()
+    pending: Set[str] = set(todo)
+    keep_ids: Set[str] = {
+        chunk_id
+        for source, checkpoint in checkpoints.items()
+        if source not in pending and checkpoint.status == "done"
+        for chunk_id in checkpoint.chunk_ids
+    }
+    stale_scope: Set[str] = {
+        chunk_id
+        for source in pending
+        if source in checkpoints
+        for chunk_id in checkpoints[source].chunk_ids
+    }
+    return keep_ids, stale_scope - keep_ids
+
+
+class CheckpointTracker:
+    """Marks sources as done once every one of their chunks is committed.
+
+    Documents are reported by the conversion stage before their rows reach the
+    writer, and rows are committed later in batches mixing several documents.
+    The tracker keeps the chunk ids still pending per source and records the
+    source in the manifest when the last of them is written or found already
+    stored.
+    """
+
+    def __init__(self, manifest: CheckpointManifest, hashes: Dict[str, str]) -> None:
+        """Initialize the tracker.
+
+        Args:
+            manifest: Manifest receiving the checkpoints
+            hashes: Hash of every source of the run
+        """
+        self.manifest: CheckpointManifest = manifest
+        self.hashes: Dict[str, str] = hashes
+        self.done: int = 0
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Set[str]] = {}
+        self._owners: Dict[str, List[str]] = {}
+        self._checkpoints: Dict[str, SourceCheckpoint] = {}
+
+    def document(
+        self, source: str, chunk_ids: List[str], tokens: int, error: Optional[str] = None
+    ) -> None:
+        """Register a converted (or failed) document before its rows are written."""
+        checkpoint = SourceCheckpoint(
+            source=source,
+            hash=self.hashes.get(source, ""),
+            status="failed" if error else "done",
+            chunk_ids=chunk_ids,
+            tokens=tokens,
+            error=error,
+        )
+        with self._lock:
+            if error or not chunk_ids:
+                self._finish(checkpoint=checkpoint)
+                return
+            self._checkpoints[source] = checkpoint
+            self._pending[source] = set(chunk_ids)
+            for chunk_id in chunk_ids:
+                self._owners.setdefault(chunk_id, []).append(source)
+
+    def committed(self, chunk_ids: List[str]) -> None:
+        """Account for stored chunks, recording the sources they complete."""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                for source in self._owners.pop(chunk_id, []):
+                    pending: Set[str] = self._pending[source]
+                    pending.discard(chunk_id)
+                    if not pending:
+                        del self._pending[source]
+                        self._finish(checkpoint=self._checkpoints.pop(source))
+
+    def deleted(self, chunk_ids: List[str]) -> None:
+        """Forget the sources whose recorded chunks were deleted as stale."""
+        deleted: Set[str] = set(chunk_ids)
+        sources: List[str] = [
+            source
+            for source, checkpoint in self.manifest.load().items()
+            if deleted.intersection(checkpoint.chunk_ids)
+        ]
+        if sources:
+            self.manifest.forget(sources=sources)
+
+    def _finish(self, checkpoint: SourceCheckpoint) -> None:
+        self.manifest.record(checkpoint=checkpoint)
+        if checkpoint.status == "done":
+            self.done += 1
+
+
+_manifests: Dict[str, CheckpointManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_checkpoint_manifest(path: str, table_name: str) -> CheckpointManifest:
+    """Return the process-wide manifest of ``table_name`` stored at ``path``."""
+    key: str = f"{os.path.abspath(path)}::{table_name}"
+    with _manifests_lock:
+        if key not in _manifests:
+            _manifests[key] = CheckpointManifest(path=path, table_name=table_name)
+        return _manifests[key]
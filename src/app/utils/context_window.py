@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# """
+# context_window.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.tokenizer import OpenAITokenizerWrapper
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+# Chat format overhead: tokens wrapping every message and priming the reply
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+SUMMARY_PROMPT = """Update the running summary of a conversation with the new turns below.
+Keep facts, names and open questions the user may refer back to. Answer with the summary only,
+in at most {max_tokens} tokens.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+"""
+
+SUMMARY_HEADER = "\n\nSummary of the earlier conversation:\n"
+
+Summarizer = Callable[[str, List[Dict[str, Any]]], str]
+
+
+@dataclass
+class PromptBreakdown:
+    """Token usage of an assembled prompt."""
+
+    system: int = 0
+    context: int = 0
+    summary: int = 0
+    history: int = 0
+    overhead: int = 0
+    total: int = 0
+    budget: int = 0
+    context_chunks: int = 0
+    dropped_chunks: int = 0
+    history_messages: int = 0
+    dropped_messages: int = 0
+
+
+class ConversationWindow:
+    """Fits the system prompt, retrieved context and recent turns into a token budget.
+
+    The context is capped at ``max_context_tokens`` by dropping its lowest-ranked
+    chunks. The rest of the budget is filled with the most recent messages;
+    older ones are dropped or, when a ``summarizer`` is given, folded into a
+    running summary that is only extended with turns dropped since the last
+    call. Token counts are stored on the message dicts, so history is
+    tokenized once however long the conversation gets.
+    """
+
+    def __init__(
+        self,
+        max_prompt_tokens: int = 12_000,
+        max_context_tokens: int = 6_000,
+        summary_max_tokens: int = 300,
+        summarizer: Optional[Summarizer] = None,
+    ) -> None:
+        """Initialize the window.
+
+        Args:
+            max_prompt_tokens: Budget of the whole prompt
+            max_context_tokens: Budget of the retrieved context
+            summary_max_tokens: Budget reserved for the summary of dropped turns
+            summarizer: Called with the current summary and newly dropped messages
+        """
+        self.max_prompt_tokens: int = max_prompt_tokens
+        self.max_context_tokens: int = max_context_tokens
+        self.summary_max_tokens: int = summary_max_tokens
+        self.summarizer: Optional[Summarizer] = summarizer
+        self.tokenizer = OpenAITokenizerWrapper()
+        self.summary: str = ""
+        self.summarized_upto: int = 0
+        self.last_breakdown: Optional[PromptBreakdown] = None
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens of ``text``."""
+        return self.tokenizer.count_tokens(text=text)
+
+    def message_tokens(self, message: Dict[str, Any]) -> int:
+        """Tokens of a message, counted once and cached on the message."""
+        if "tokens" not in message:
+            message["tokens"] = self.count_tokens(text=message["content"]) + TOKENS_PER_MESSAGE
+        return message["tokens"]
+
+    def fit_context(
+        self, chunks: Sequence[str], separator: str = "\n\n"
+    ) -> Tuple[str, int, int, int]:
+        """
+        Keep the highest-ranked context chunks that fit the context budget.
+
+        Args:
+            chunks: Formatted chunks, best first
+            separator: Written between the kept chunks
+
+        Returns:
+            Tuple[str, int, int, int]: Fitted context, its tokens, kept and dropped chunk counts
+        """
+        chunks = [chunk for chunk in chunks if chunk]
+        kept: List[str] = []
+        tokens: int = 0
+        separator_tokens: int = self.count_tokens(text=separator)
+        for chunk in chunks:
+            chunk_tokens: int = self.count_tokens(text=chunk) + (separator_tokens if kept else 0)
+            if tokens + chunk_tokens > self.max_context_tokens:
+                break
+            kept.append(chunk)
+            tokens += chunk_tokens
+        return separator.join(kept), tokens, len(kept), len(chunks) - len(kept)
+
+    def _summary_block(self) -> str:
+        return SUMMARY_HEADER + self.summary if self.summary else ""
+
+    def _update_summary(self, dropped: List[Dict[str, Any]]) -> None:
+        new: List[Dict[str, Any]] = [m for m in dropped if m.get("id", 0) > self.summarized_upto]
+        if not new or self.summarizer is None:
+            return
+        self.summary = self.summarizer(self.summary, new)
+        self.summarized_upto = max(m.get("id", 0) for m in new)
+
+    def assemble(
+        self, system_prompt: str, context: Sequence[str], messages: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, str]], PromptBreakdown]:
+        """
+        Build the messages sent to the chat completions endpoint.
+
+        Args:
+            system_prompt: Instructions, the context is appended to them
+            context: Retrieved chunks formatted for the prompt, best first
+            messages: Conversation, oldest first, ending with the current question
+
+        Returns:
+            Tuple[List[Dict[str, str]], PromptBreakdown]: API messages and their token usage
+        """
+        breakdown = PromptBreakdown(budget=self.max_prompt_tokens)
+        fitted_context, breakdown.context, breakdown.context_chunks, breakdown.dropped_chunks = (
+            self.fit_context(chunks=context)
+        )
+        breakdown.system = self.count_tokens(text=system_prompt)
+        breakdown.overhead = TOKENS_PER_MESSAGE + TOKENS_PER_REPLY
+
+        reserved: int = 0
+        if self.summarizer is not None:
+            reserved = max(
+                self.summary_max_tokens + self.count_tokens(text=SUMMARY_HEADER),
+                self.count_tokens(text=self._summary_block()),
+            )
+        available: int = (
+            self.max_prompt_tokens
+            - breakdown.system
+            - breakdown.context
+            - breakdown.overhead
+            - reserved
+        )
+
+        # Walk back from the current question; it is always kept
+        start: int = len(messages)
+        for i in range(len(messages) - 1, -1, -1):
+            tokens: int = self.message_tokens(message=messages[i])
+            if start < len(messages) and breakdown.history + tokens > available:
+                break
+            breakdown.history += tokens
+            start = i
+        recent: List[Dict[str, Any]] = messages[start:]
+        breakdown.history_messages = len(recent)
+        breakdown.dropped_messages = start
+
+        self._update_summary(dropped=messages[:start])
+        system: str = system_prompt + fitted_context
+        if self.summary:
+            summary_block: str = self._summary_block()
+            breakdown.summary = self.count_tokens(text=summary_block)
+            system += summary_block
+
+        breakdown.total = (
+            breakdown.system
+            + breakdown.context
+            + breakdown.summary
+            + breakdown.history
+            + breakdown.overhead
+        )
+        self.last_breakdown = breakdown
+        logger.info(msg=f"Prompt tokens: {breakdown}")
+
+        return [
+            {"role": "system", "content": system},
+            *({"role": m["role"], "content": m["content"]} for m in recent),
+        ], breakdown
+
+
+def make_summarizer(client: Any, model_name: str, max_tokens: int) -> Summarizer:
+    """
+    Summarizer that asks the chat model to extend the running summary.
+
+    Args:
+        client: OpenAI client
+        model_name: Chat model used for summaries
+        max_tokens: Length limit of the summary
+
+    Returns:
+        Summarizer: Callable taking the current summary and the newly dropped messages
+    """
+
+    def summarize(summary: str, messages: List[Dict[str, Any]]) -> str:
+        turns: str = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        response: Any = client.chat.completions.create(
+            model=model_name,
+            messages=[
+                {
+                    "role": "user",
+                    "content": SUMMARY_PROMPT.format(
+                        max_tokens=max_tokens, summary=summary or "(none)", turns=turns
+                    ),
+                }
+            ],
+            temperature=0,
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content or summary
+
+    return summarize
+
+
+def get_conversation_window(
+    window_cfgs: Dict[str, Any], client: Any = None, model_name: str = ""
+) -> ConversationWindow:
+    """
+    Build a window from the ``LLM.CONTEXT_WINDOW`` configuration.
+
+    Args:
+        window_cfgs: ``LLM.CONTEXT_WINDOW`` configuration
+        client: OpenAI client, needed when ``SUMMARIZE`` is on
+        model_name: Chat model used for summaries
+
+    Returns:
+        ConversationWindow: New window
+    """
+    summarizer: Optional[Summarizer] = None
+    if window_cfgs["SUMMARIZE"] and client is not None:
+        summarizer = make_summarizer(
+            client=client, model_name=model_name, max_tokens=window_cfgs["SUMMARY_MAX_TOKENS"]
+        )
+    return ConversationWindow(
+        max_prompt_tokens=window_cfgs["MAX_PROMPT_TOKENS"],
+        max_context_tokens=window_cfgs["MAX_CONTEXT_TOKENS"],
+        summary_max_tokens=window_cfgs["SUMMARY_MAX_TOKENS"],
+        summarizer=summarizer,
+    )
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# """
+# converters.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Union
+
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.document import ConversionResult
+from docling.datamodel.pipeline_options import EasyOcrOptions, PdfPipelineOptions
+from docling.document_converter import DocumentConverter, PdfFormatOption
+from docling_core.types.io import DocumentStream
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+ConverterKind = Literal["pdf", "html", "md", "any"]
+
+# Formats each converter kind accepts and the pipeline warmed up when it is built
+_KIND_FORMATS: Dict[str, List[InputFormat]] = {
+    "pdf": [InputFormat.PDF],
+    "html": [InputFormat.HTML],
+    "md": [InputFormat.MD],
+    "any": [e for e in InputFormat],
+}
+_KIND_WARMUP: Dict[str, InputFormat] = {
+    "pdf": InputFormat.PDF,
+    "html": InputFormat.HTML,
+    "md": InputFormat.MD,
+    "any": InputFormat.PDF,
+}
+
+
+@dataclass(frozen=True)
+class ConverterKey:
+    """Pipeline options a converter is built with."""
+
+    kind: str
+    do_ocr: bool
+
+
+@dataclass
+class _ConverterEntry:
+    converter: DocumentConverter
+    load_seconds: float
+    # Docling's PDF backends are not thread-safe, so conversions are serialized per converter
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    hits: int = 0
+    conversions: int = 0
+    convert_seconds: float = 0.0
+
+
+def kind_for_source(source: str) -> ConverterKind:
+    """Guess the converter kind from a file path or URL.
+
+    Args:
+        source: Path or URL of the document
+
+    Returns:
+        ConverterKind: Converter kind to request from the registry
+    """
+    lowered: str = source.lower().split(sep="?")[0]
+    if lowered.endswith(".pdf"):
+        return "pdf"
+    if lowered.endswith(".md"):
+        return "md"
+    if lowered.endswith((".html", ".htm")):
+        return "html"
+    return "any"
+
+
+class ConverterRegistry:
+    """Process-wide pool of warm ``DocumentConverter`` instances.
+
+    Converters are created lazily on first use, keyed by ``ConverterKey``, and
+    reused afterwards so the layout and table models are loaded only once per
+    process. The registry lives at module level, which keeps it alive across
+    Streamlit reruns and sessions, and it is safe to use from worker threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key_locks: Dict[ConverterKey, threading.Lock] = {}
+        self._entries: Dict[ConverterKey, _ConverterEntry] = {}
+
+    def _build(self, key: ConverterKey) -> _ConverterEntry:
+        start: float = time.perf_counter()
+        formats: List[InputFormat] = _KIND_FORMATS[key.kind]
+        format_options: Dict[InputFormat, Any] = {}
+        if InputFormat.PDF in formats:
+            format_options[InputFormat.PDF] = PdfFormatOption(
+                # Docling's default OCR engine, passed explicitly as the model requires it
+                pipeline_options=PdfPipelineOptions(do_ocr=key.do_ocr, ocr_options=EasyOcrOptions())
+            )
+
+        converter = DocumentConverter(allowed_formats=formats, format_options=format_options)
+        converter.initialize_pipeline(format=_KIND_WARMUP[key.kind])
+        load_seconds: float = time.perf_counter() - start
+
+        logger.info(msg=f"Loaded {key.kind} converter (ocr={key.do_ocr}) in {load_seconds:.2f}s")
+        return _ConverterEntry(converter=converter, load_seconds=load_seconds)
+
+    def _entry(self, kind: ConverterKind, do_ocr: bool) -> _ConverterEntry:
+        key = ConverterKey(kind=kind, do_ocr=do_ocr)
+        entry: _ConverterEntry | None = self._entries.get(key)
+        if entry is not None:
+            entry.hits += 1
+            return entry
+
+        with self._lock:
+            key_lock: threading.Lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Build outside the registry lock so other kinds are not blocked while models load
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._build(key=key)
+                self._entries[key] = entry
+            else:
+                entry.hits += 1
+        return entry
+
+    def get(self, kind: ConverterKind = "any", do_ocr: bool = True) -> DocumentConverter:
+        """Return the shared converter for the given options, building it if needed.
+
+        Callers that convert from several threads should prefer ``convert`` which
+        serializes access to the converter.
+
+        Args:
+            kind: Input format family the converter handles
+            do_ocr: Whether the PDF pipeline runs OCR
+
+        Returns:
+            DocumentConverter: Warm converter instance
+        """
+        return self._entry(kind=kind, do_ocr=do_ocr).converter
+
+    def convert(
+        self,
+        source: Union[str, DocumentStream],
+        kind: ConverterKind = "any",
+        do_ocr: bool = True,
+        **kwargs: Any,
+    ) -> ConversionResult:
+        """Convert a single source with the shared converter.
+
+        Args:
+            source: Path, URL or stream of the document
+            kind: Input format family the converter handles
+            do_ocr: Whether the PDF pipeline runs OCR
+            **kwargs: Passed through to ``DocumentConverter.convert``
+
+        Returns:
+            ConversionResult: Docling conversion result
+        """
+        entry: _ConverterEntry = self._entry(kind=kind, do_ocr=do_ocr)
+        with entry.lock:
+            start: float = time.perf_counter()
+            try:
+                return entry.converter.convert(source=source, **kwargs)
+            finally:
+                entry.conversions += 1
+                entry.convert_seconds += time.perf_counter() - start
+
+    def convert_all(
+        self,
+        sources: Iterable[Union[str, DocumentStream]],
+        kind: ConverterKind = "any",
+        do_ocr: bool = True,
+    ) -> Iterator[ConversionResult]:
+        """Convert several sources one by one, without failing on individual errors.
+
+        Args:
+            sources: Paths, URLs or streams of the documents
+            kind: Input format family the converter handles
+            do_ocr: Whether the PDF pipeline runs OCR
+
+        Returns:
+            Iterator[ConversionResult]: Conversion results in input order
+        """
+        for source in sources:
+            yield self.convert(source=source, kind=kind, do_ocr=do_ocr, raises_on_error=False)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Load-time and reuse metrics for every converter built so far.
+
+        ``saved_seconds`` estimates the warm-start savings: the load time that
+        would have been paid again by every reuse.
+        """
+        return [
+            {
+                "kind": key.kind,
+                "do_ocr": key.do_ocr,
+                "load_seconds": round(entry.load_seconds, 3),
+                "hits": entry.hits,
+                "conversions": entry.conversions,
+                "convert_seconds": round(entry.convert_seconds, 3),
+                "saved_seconds": round(entry.load_seconds * entry.hits, 3),
+            }
+            for key, entry in list(self._entries.items())
+        ]
+
+    def clear(self) -> None:
+        """Drop all cached converters (their models are released with them)."""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+
+_registry = ConverterRegistry()
+
+
+def get_converter_registry() -> ConverterRegistry:
+    """Return the process-wide converter registry."""
+    return _registry
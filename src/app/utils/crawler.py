@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+# """
+# crawler.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import formatdate
+from io import BytesIO
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+import httpx
+from docling_core.types.io import DocumentStream
+
+from utils.streaming import iterate_async, staged
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class SitemapEntry:
+    """A page listed in a sitemap."""
+
+    url: str
+    lastmod: Optional[float] = None
+
+
+@dataclass
+class FetchedPage:
+    """Outcome of fetching one page.
+
+    ``status`` is ``fetched`` (``content`` holds the body), ``not_modified``
+    (the page did not change since the last recorded fetch, ``content`` is
+    empty) or ``failed`` (``error`` says why).
+    """
+
+    url: str
+    status: str
+    content: bytes = b""
+    content_type: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    lastmod: Optional[float] = None
+    content_hash: str = ""
+    fetched_at: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def changed(self) -> bool:
+        return self.status == "fetched"
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit(sep="}", maxsplit=1)[-1]
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a sitemap ``<lastmod>`` (W3C datetime) into a UTC timestamp.
+
+    Args:
+        value: Date such as ``2024-05-01`` or ``2024-05-01T10:00:00+02:00``
+
+    Returns:
+        Optional[float]: Seconds since the epoch, None if missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        parsed: datetime = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_sitemap(content: bytes) -> Tuple[List[SitemapEntry], List[str]]:
+    """
+    Parse a sitemap or sitemap index, gzipped or not.
+
+    Args:
+        content: Body of the sitemap file
+
+    Returns:
+        Tuple[List[SitemapEntry], List[str]]: Page entries and child sitemap URLs
+
+    Raises:
+        ET.ParseError: If the content is not XML
+    """
+    if content.startswith(_GZIP_MAGIC):
+        content = gzip.decompress(data=content)
+    root: ET.Element = ET.fromstring(text=content)
+
+    entries: List[SitemapEntry] = []
+    children: List[str] = []
+    is_index: bool = _local_name(tag=root.tag) == "sitemapindex"
+    for element in root:
+        fields: Dict[str, str] = {
+            _local_name(tag=child.tag): (child.text or "").strip() for child in element
+        }
+        loc: str = fields.get("loc", "")
+        if not loc:
+            continue
+        if is_index:
+            children.append(loc)
+        else:
+            lastmod: Optional[float] = parse_lastmod(value=fields.get("lastmod"))
+            entries.append(SitemapEntry(url=loc, lastmod=lastmod))
+    return entries, children
+
+
+class CrawlState:
+    """Validators of previously ingested pages, backed by SQLite in WAL mode.
+
+    The sitemap ``lastmod``, the ``ETag``/``Last-Modified`` response headers and
+    a hash of the body are stored per URL, so a recrawl skips pages whose
+    ``lastmod`` did not advance and sends conditional requests for the others.
+    Validators are kept per ``scope`` (the target table): a page ingested into
+    one table must still be fetched for another.
+    """
+
+    def __init__(self, path: str, scope: str) -> None:
+        """Open (or create) the state database.
+
+        Args:
+            path: Path of the SQLite file, shared by all scopes
+            scope: Scope whose validators are read and written, e.g. a table name
+        """
+        os.makedirs(name=os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path: str = path
+        self.scope: str = scope
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database=path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                scope TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                lastmod REAL,
+                content_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (scope, url)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Validators stored for ``url``, None if it was never recorded."""
+        with self._lock:
+            row: Optional[Any] = self._conn.execute(
+                "SELECT etag, last_modified, lastmod, content_hash, fetched_at "
+                "FROM pages WHERE scope = ? AND url = ?",
+                (self.scope, url),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "lastmod": row[2],
+            "content_hash": row[3],
+            "fetched_at": row[4],
+        }
+
+    def retain(self, urls: Set[str]) -> int:
+        """Forget the validators of every page not in ``urls``; returns how many."""
+        with self._lock:
+            stored: List[str] = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT url FROM pages WHERE scope = ?", (self.scope,)
+                ).fetchall()
+            ]
+            forgotten: List[str] = [url for url in stored if url not in urls]
+            self._conn.executemany(
+                "DELETE FROM pages WHERE scope = ? AND url = ?",
+                [(self.scope, url) for url in forgotten],
+            )
+            self._conn.commit()
+        return len(forgotten)
+
+    def record(self, page: FetchedPage) -> None:
+        """Remember the validators of a page once it has been ingested."""
+        if not page.changed:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(scope, url, etag, last_modified, lastmod, content_hash, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.scope,
+                    page.url,
+                    page.etag,
+                    page.last_modified,
+                    page.lastmod,
+                    page.content_hash,
+                    page.fetched_at,
+                ),
+            )
+            self._conn.commit()
+
+
+class SitemapCrawler:
+    """Asynchronous sitemap crawler sharing one pooled HTTP client.
+
+    Sitemap indexes are expanded recursively and ``.xml.gz`` sitemaps are
+    decompressed. Pages are fetched concurrently, at most ``per_host`` at a
+    time from any single host, and yielded as they complete. With a
+    ``CrawlState``, pages whose sitemap ``lastmod`` did not advance are not
+    requested at all and the others are requested conditionally.
+
+    Use it as an async context manager::
+
+        async with SitemapCrawler() as crawler:
+            entries = await crawler.discover(sitemap_url=url)
+            async for page in crawler.crawl(entries=entries):
+                ...
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        per_host: int = 8,
+        timeout: float = 20.0,
+        max_depth: int = 3,
+        user_agent: str = "hybrid-rag-crawler",
+        state: Optional[CrawlState] = None,
+    ) -> None:
+        """Initialize the crawler.
+
+        Args:
+            max_connections: Size of the connection pool, and of the in-flight requests
+            per_host: Concurrent requests allowed per host
+            timeout: Timeout of every request, in seconds
+            max_depth: Nesting levels of sitemap indexes followed
+            user_agent: ``User-Agent`` header sent with every request
+            state: Validators of earlier crawls, enables lastmod skipping and
+                conditional requests
+        """
+        self.max_connections: int = max_connections
+        self.per_host: int = per_host
+        self.timeout: float = timeout
+        self.max_depth: int = max_depth
+        self.user_agent: str = user_agent
+        self.state: Optional[CrawlState] = state
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "SitemapCrawler":
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": self.user_agent},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host: str = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(value=self.per_host)
+        return self._host_limits[host]
+
+    async def _get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        if self._client is None:
+            raise RuntimeError("SitemapCrawler must be used as an async context manager")
+        async with self._host_limit(url=url):
+            return await self._client.get(url=url, headers=headers)
+
+    async def discover(self, sitemap_url: str) -> List[SitemapEntry]:
+        """
+        List the pages of a sitemap, following sitemap indexes.
+
+        Args:
+            sitemap_url: URL of the sitemap or sitemap index
+
+        Returns:
+            List[SitemapEntry]: Pages in sitemap order, without duplicates
+
+        Raises:
+            httpx.HTTPStatusError: If the top-level sitemap cannot be fetched
+            ET.ParseError: If the top-level sitemap is not XML
+        """
+        visited: Set[str] = set()
+
+        async def expand(url: str, depth: int) -> List[SitemapEntry]:
+            visited.add(url)
+            response: httpx.Response = await self._get(url=url)
+            response.raise_for_status()
+            entries, children = parse_sitemap(content=response.content)
+            children = [child for child in children if child not in visited]
+            if children and depth >= self.max_depth:
+                logger.warning(msg=f"Not following {len(children)} sitemaps nested in {url}")
+                return entries
+            visited.update(children)
+            results: List[Any] = await asyncio.gather(
+                *(expand(url=child, depth=depth + 1) for child in children),
+                return_exceptions=True,
+            )
+            for child, result in zip(children, results):
+                if isinstance(result, BaseException):
+                    # A broken child sitemap must not lose the rest of the site
+                    logger.warning(msg=f"Skipping sitemap {child}: {result}")
+                else:
+                    entries.extend(result)
+            return entries
+
+        entries: List[SitemapEntry] = await expand(url=sitemap_url, depth=0)
+        unique: Dict[str, SitemapEntry] = {}
+        for entry in entries:
+            unique.setdefault(entry.url, entry)
+        logger.info(msg=f"Found {len(unique)} pages in {sitemap_url}")
+        return list(unique.values())
+
+    async def fetch(self, entry: SitemapEntry) -> FetchedPage:
+        """
+        Fetch a page, conditionally when validators of an earlier fetch are known.
+
+        Args:
+            entry: Page to fetch
+
+        Returns:
+            FetchedPage: Body and validators, or why nothing was fetched
+        """
+        previous: Optional[Dict[str, Any]] = (
+            self.state.get(url=entry.url) if self.state is not None else None
+        )
+        if (
+            previous is not None
+            and entry.lastmod is not None
+            and previous["lastmod"] is not None
+            and entry.lastmod <= previous["lastmod"]
+        ):
+            return FetchedPage(url=entry.url, status="not_modified", lastmod=entry.lastmod)
+
+        headers: Dict[str, str] = {}
+        if previous is not None:
+            if previous["etag"]:
+                headers["If-None-Match"] = previous["etag"]
+            if previous["last_modified"]:
+                headers["If-Modified-Since"] = previous["last_modified"]
+            elif previous["fetched_at"]:
+                headers["If-Modified-Since"] = formatdate(
+                    timeval=previous["fetched_at"], usegmt=True
+                )
+
+        try:
+            response: httpx.Response = await self._get(url=entry.url, headers=headers)
+        except Exception as e:
+            # Not only HTTPError: a malformed <loc> raises InvalidURL, and one bad
+            # page must not abort the crawl of the others
+            return FetchedPage(url=entry.url, status="failed", error=f"{type(e).__name__}: {e}")
+        if response.status_code == 304:
+            return FetchedPage(url=entry.url, status="not_modified", lastmod=entry.lastmod)
+        if response.status_code != 200:
+            return FetchedPage(url=entry.url, status="failed", error=f"HTTP {response.status_code}")
+
+        content_hash: str = hashlib.sha256(response.content).hexdigest()
+        if previous is not None and previous["content_hash"] == content_hash:
+            # Servers without validators still resend identical pages
+            return FetchedPage(url=entry.url, status="not_modified", lastmod=entry.lastmod)
+        return FetchedPage(
+            url=entry.url,
+            status="fetched",
+            content=response.content,
+            content_type=response.headers.get("Content-Type", ""),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            lastmod=entry.lastmod,
+            content_hash=content_hash,
+            fetched_at=time.time(),
+        )
+
+    async def crawl(self, entries: List[SitemapEntry]) -> AsyncIterator[FetchedPage]:
+        """
+        Fetch pages concurrently and yield them in completion order.
+
+        At most ``max_connections`` requests are in flight, so bodies do not
+        pile up in memory when the consumer is slower than the network.
+
+        Args:
+            entries: Pages to fetch
+
+        Returns:
+            AsyncIterator[FetchedPage]: One result per entry
+        """
+        remaining: Iterator[SitemapEntry] = iter(entries)
+        pending: Set[asyncio.Task] = set()
+        try:
+            while True:
+                while len(pending) < self.max_connections:
+                    entry: Optional[SitemapEntry] = next(remaining, None)
+                    if entry is None:
+                        break
+                    pending.add(asyncio.create_task(self.fetch(entry=entry)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def sitemap_location(base_url: str, sitemap_filename: str = "sitemap.xml") -> str:
+    """URL of the sitemap of a website, ``sitemap_filename`` may be a full URL."""
+    base: str = base_url if base_url.endswith("/") else base_url + "/"
+    return urljoin(base=base, url=sitemap_filename)
+
+
+def get_crawler(crawler_cfgs: Dict[str, Any], state: Optional[CrawlState] = None) -> SitemapCrawler:
+    """
+    Build a crawler from the ``CRAWLER`` configuration.
+
+    Args:
+        crawler_cfgs: ``CRAWLER`` configuration
+        state: Validators of earlier crawls, to skip pages unchanged since then
+
+    Returns:
+        SitemapCrawler: New crawler, to be entered with ``async with``
+    """
+    return SitemapCrawler(
+        max_connections=crawler_cfgs["MAX_CONNECTIONS"],
+        per_host=crawler_cfgs["PER_HOST"],
+        timeout=crawler_cfgs["TIMEOUT"],
+        max_depth=crawler_cfgs["MAX_SITEMAP_DEPTH"],
+        user_agent=crawler_cfgs["USER_AGENT"],
+        state=state,
+    )
+
+
+def iter_site_pages(
+    sitemap_url: str, crawler_cfgs: Dict[str, Any], state: Optional[CrawlState] = None
+) -> Iterator[FetchedPage]:
+    """
+    Crawl a sitemap in the background and yield pages as they arrive.
+
+    The crawl runs on its own event loop in a background thread, ahead of the
+    consumer by at most ``QUEUE_SIZE`` pages, so conversion of one page
+    overlaps with fetching the next ones.
+
+    Args:
+        sitemap_url: URL of the sitemap or sitemap index
+        crawler_cfgs: ``CRAWLER`` configuration
+        state: Validators of earlier crawls, to skip pages unchanged since then
+
+    Returns:
+        Iterator[FetchedPage]: One result per page of the sitemap
+    """
+
+    async def pages() -> AsyncIterator[FetchedPage]:
+        async with get_crawler(crawler_cfgs=crawler_cfgs, state=state) as crawler:
+            entries: List[SitemapEntry] = await crawler.discover(sitemap_url=sitemap_url)
+            async for page in crawler.crawl(entries=entries):
+                yield page
+
+    return staged(
+        iterable=iterate_async(agen=pages()), maxsize=crawler_cfgs["QUEUE_SIZE"], name="crawl"
+    )
+
+
+def page_stream(page: FetchedPage) -> DocumentStream:
+    """
+    Wrap a fetched page for conversion without touching the disk.
+
+    Args:
+        page: Fetched page
+
+    Returns:
+        DocumentStream: In-memory stream named after the URL path, so Docling
+            detects its format
+    """
+    name: str = urlparse(page.url).path.rstrip("/").rsplit(sep="/", maxsplit=1)[-1] or "index"
+    if "pdf" in page.content_type:
+        suffix: str = ".pdf"
+    elif "markdown" in page.content_type:
+        suffix = ".md"
+    else:
+        suffix = ".html"
+    if not name.lower().endswith((suffix, ".htm")):
+        name += suffix
+    return DocumentStream(name=name, stream=BytesIO(initial_bytes=page.content))
+
+
+_states: Dict[str, CrawlState] = {}
+_states_lock = threading.Lock()
+
+
+def get_crawl_state(path: str, scope: str) -> CrawlState:
+    """Return the process-wide crawl state of ``scope`` stored at ``path``."""
+    key: str = f"{os.path.abspath(path)}::{scope}"
+    with _states_lock:
+        if key not in _states:
+            _states[key] = CrawlState(path=path, scope=scope)
+        return _states[key]
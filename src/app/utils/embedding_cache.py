@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# """
+# embedding_cache.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from lancedb.embeddings import get_registry
+from lancedb.embeddings.base import TextEmbeddingFunction
+from lancedb.embeddings.registry import register
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH_SIZE = 500
+
+
+def text_hash(text: str) -> str:
+    """Content address of a text in the embedding cache."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed, size-bounded embedding store backed by SQLite.
+
+    Entries are keyed by (model, dimension, sha256(text)) so a paragraph that
+    appears in many tables is embedded once per model. When the cache grows past
+    ``max_entries`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200_000) -> None:
+        """Open (or create) the cache database.
+
+        Args:
+            path: Path of the SQLite file
+            max_entries: Number of vectors kept before LRU eviction kicks in
+        """
+        os.makedirs(name=os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database=path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, dim, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+        self._size: int = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, dim: int, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Look up cached vectors.
+
+        Args:
+            model: Embedding model name
+            dim: Embedding dimension
+            texts: Texts to look up
+
+        Returns:
+            List[Optional[List[float]]]: Cached vector per text, ``None`` on a miss
+        """
+        hashes: List[str] = [text_hash(text=text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        unique: List[str] = list(dict.fromkeys(hashes))
+
+        with self._lock:
+            for start in range(0, len(unique), _SQL_BATCH_SIZE):
+                batch: List[str] = unique[start : start + _SQL_BATCH_SIZE]
+                placeholders: str = ", ".join("?" * len(batch))
+                rows: List[Any] = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND dim = ? AND text_hash IN ({placeholders})",
+                    (model, dim, *batch),
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+                # Refresh the LRU position of everything that was hit
+                hit_keys: List[str] = [key for key in batch if key in found]
+                if hit_keys:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_access = ? "
+                        f"WHERE model = ? AND dim = ? "
+                        f"AND text_hash IN ({', '.join('?' * len(hit_keys))})",
+                        (time.time(), model, dim, *hit_keys),
+                    )
+            self._conn.commit()
+
+            results: List[Optional[List[float]]] = [found.get(key) for key in hashes]
+            hits: int = sum(vector is not None for vector in results)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(
+        self,
+        model: str,
+        dim: int,
+        texts: Sequence[str],
+        vectors: Sequence[Optional[Sequence[float]]],
+    ) -> None:
+        """Store vectors, evicting the least recently used entries if needed.
+
+        Args:
+            model: Embedding model name
+            dim: Embedding dimension
+            texts: Embedded texts
+            vectors: Vector per text; ``None`` entries are not cached
+        """
+        now: float = time.time()
+        rows: List[Any] = [
+            (model, dim, text_hash(text=text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+            if vector is not None
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            before: int = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, dim, text_hash, vector, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            if self._conn.total_changes > before:
+                # Other processes write to the same file, so the size is counted
+                # inside this write transaction rather than tracked in memory
+                self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if self._size > self.max_entries:
+                    self._evict(count=self._size - self.max_entries)
+            self._conn.commit()
+
+    def _evict(self, count: int) -> None:
+        cursor: sqlite3.Cursor = self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_access LIMIT ?)",
+            (count,),
+        )
+        self._size -= cursor.rowcount
+        self.evictions += cursor.rowcount
+        logger.info(msg=f"Evicted {cursor.rowcount} entries from embedding cache {self.path}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size of the cache."""
+        lookups: int = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(path: str, max_entries: int = 200_000) -> EmbeddingCache:
+    """Return the process-wide cache stored at ``path``."""
+    key: str = os.path.abspath(path)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(path=path, max_entries=max_entries)
+        return _caches[key]
+
+
+def get_embedding_caches() -> List[EmbeddingCache]:
+    """Return every embedding cache opened in this process."""
+    return list(_caches.values())
+
+
+@register("cached")
+class CachedEmbeddings(TextEmbeddingFunction):
+    """LanceDB embedding function that memoizes another registry function.
+
+    The wrapped function is described by ``provider``/``name``/``dim`` so LanceDB
+    can rebuild it from the table metadata on ``open_table``. Queries issued
+    through ``table.search(text)`` therefore go through the same cache as ingestion.
+    """
+
+    provider: str = "openai"
+    name: str = "text-embedding-3-large"
+    dim: Optional[int] = None
+    cache_path: str = "vector_db/embedding_cache.sqlite"
+    max_entries: int = 200_000
+
+    def ndims(self) -> int:
+        return self._inner.ndims()
+
+    @cached_property
+    def _inner(self) -> Any:
+        kwargs: Dict[str, Any] = {"name": self.name}
+        if self.dim is not None:
+            kwargs["dim"] = self.dim
+        return get_registry().get(name=self.provider).create(**kwargs)
+
+    @cached_property
+    def _cache(self) -> EmbeddingCache:
+        return get_embedding_cache(path=self.cache_path, max_entries=self.max_entries)
+
+    def get_cache(self) -> EmbeddingCache:
+        """Return the cache backing this function."""
+        return self._cache
+
+    def get_inner(self) -> Any:
+        """Return the wrapped registry embedding function."""
+        return self._inner
+
+    def generate_embeddings(self, texts: Union[List[str], np.ndarray]) -> List[Any]:
+        """Return cached vectors and embed only the misses with the wrapped function."""
+        texts = [str(text) for text in texts]
+        dim: int = self.ndims()
+        vectors: List[Any] = self._cache.get_many(model=self.name, dim=dim, texts=texts)
+
+        missing: List[int] = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Embed each distinct missing text once
+            unique_texts: List[str] = list(dict.fromkeys(texts[i] for i in missing))
+            embedded: List[Any] = self._inner.generate_embeddings(unique_texts)
+            self._cache.put_many(model=self.name, dim=dim, texts=unique_texts, vectors=embedded)
+            by_text: Dict[str, Any] = dict(zip(unique_texts, embedded))
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        return vectors
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# """
+# indexing.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+from lancedb.table import Table
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+VECTOR_COLUMN = "vector"
+TEXT_COLUMN = "text"
+
+
+def get_index(table: Table, column: str) -> Optional[Any]:
+    """Return the index covering ``column``, if any.
+
+    Args:
+        table: LanceDB table
+        column: Indexed column name
+
+    Returns:
+        Optional[Any]: LanceDB ``IndexConfig`` or ``None``
+    """
+    for index in table.list_indices():
+        if column in index.columns:
+            return index
+    return None
+
+
+def default_num_sub_vectors(dim: int) -> int:
+    """Largest PQ sub-vector count giving sub-vectors of at least 16 dimensions."""
+    for num_sub_vectors in range(max(dim // 16, 1), 0, -1):
+        if dim % num_sub_vectors == 0:
+            return num_sub_vectors
+    return 1
+
+
+def create_vector_index(table: Table, num_rows: int, index_cfgs: Dict[str, Any]) -> None:
+    """Build (or rebuild) the ANN index on the vector column.
+
+    Args:
+        table: LanceDB table
+        num_rows: Current number of rows, used to size the partitions
+        index_cfgs: ``VECTOR_DB.INDEX`` configuration
+    """
+    dim: int = table.schema.field(VECTOR_COLUMN).type.list_size
+    num_partitions: int = index_cfgs["NUM_PARTITIONS"] or max(1, int(math.sqrt(num_rows)))
+    num_sub_vectors: int = index_cfgs["NUM_SUB_VECTORS"] or default_num_sub_vectors(dim=dim)
+
+    kwargs: Dict[str, Any] = {
+        "metric": index_cfgs["METRIC"],
+        "num_partitions": num_partitions,
+        "num_sub_vectors": num_sub_vectors,
+        "vector_column_name": VECTOR_COLUMN,
+        "index_type": index_cfgs["TYPE"],
+        "replace": True,
+    }
+    if index_cfgs["TYPE"].startswith("IVF_HNSW"):
+        kwargs["m"] = index_cfgs["HNSW_M"]
+        kwargs["ef_construction"] = index_cfgs["HNSW_EF_CONSTRUCTION"]
+
+    table.create_index(**kwargs)
+    logger.info(
+        msg=f"Built {index_cfgs['TYPE']} index on {table.name} "
+        f"({num_rows} rows, {num_partitions} partitions, {num_sub_vectors} sub-vectors)"
+    )
+
+
+def ensure_vector_index(table: Table, index_cfgs: Dict[str, Any]) -> str:
+    """Create the ANN index once the table is large enough and keep it current.
+
+    Tables below ``MIN_ROWS`` are left to exact search. Rows added after the
+    index was built are folded in incrementally with ``optimize()``. The index is
+    rebuilt only when the unindexed share passes ``REBUILD_RATIO``, since the IVF
+    partitions were trained on the old data.
+
+    Args:
+        table: LanceDB table
+        index_cfgs: ``VECTOR_DB.INDEX`` configuration
+
+    Returns:
+        str: Action taken ("disabled", "skipped", "created", "optimized", "rebuilt" or "current")
+    """
+    if not index_cfgs["ENABLED"]:
+        return "disabled"
+
+    num_rows: int = table.count_rows()
+    if num_rows < index_cfgs["MIN_ROWS"]:
+        return "skipped"
+
+    index: Optional[Any] = get_index(table=table, column=VECTOR_COLUMN)
+    if index is None:
+        create_vector_index(table=table, num_rows=num_rows, index_cfgs=index_cfgs)
+        return "created"
+
+    stats: Optional[Any] = table.index_stats(index_name=index.name)
+    if stats is None or stats.num_unindexed_rows == 0:
+        return "current"
+
+    if stats.num_unindexed_rows > index_cfgs["REBUILD_RATIO"] * max(stats.num_indexed_rows, 1):
+        create_vector_index(table=table, num_rows=num_rows, index_cfgs=index_cfgs)
+        return "rebuilt"
+
+    table.optimize()
+    logger.info(msg=f"Added {stats.num_unindexed_rows} rows to the index of {table.name}")
+    return "optimized"
+
+
+def ensure_fts_index(table: Table, fts_cfgs: Dict[str, Any]) -> str:
+    """Create the BM25 full-text index on the text column and keep it current.
+
+    The native Lance FTS index is used, so no extra dependency is needed. Like the
+    vector index, rows written after the index was built are folded in with
+    ``optimize()``; they stay searchable by a flat scan in the meantime.
+
+    Args:
+        table: LanceDB table
+        fts_cfgs: ``VECTOR_DB.FTS`` configuration
+
+    Returns:
+        str: Action taken ("disabled", "created", "optimized" or "current")
+    """
+    if not fts_cfgs["ENABLED"]:
+        return "disabled"
+
+    index: Optional[Any] = get_index(table=table, column=TEXT_COLUMN)
+    if index is None:
+        table.create_fts_index(
+            TEXT_COLUMN,
+            use_tantivy=False,
+            with_position=fts_cfgs["WITH_POSITION"],
+            replace=True,
+        )
+        logger.info(msg=f"Built full-text index on {table.name}.{TEXT_COLUMN}")
+        return "created"
+
+    stats: Optional[Any] = table.index_stats(index_name=index.name)
+    if stats is None or stats.num_unindexed_rows == 0:
+        return "current"
+
+    table.optimize()
+    logger.info(msg=f"Added {stats.num_unindexed_rows} rows to the full-text index of {table.name}")
+    return "optimized"
+
+
+def ensure_scalar_indexes(table: Table, scalar_cfgs: Dict[str, Any]) -> Dict[str, str]:
+    """Create the scalar indexes of the filter columns and keep them current.
+
+    Bitmap indexes suit low-cardinality columns such as file names, B-tree
+    indexes high-cardinality or range-queried ones such as URLs and page
+    numbers. Columns the table does not have (tables created before the filter
+    columns existed) are skipped; filters on them fall back to a scan.
+
+    Args:
+        table: LanceDB table
+        scalar_cfgs: ``VECTOR_DB.SCALAR_INDEX`` configuration
+
+    Returns:
+        Dict[str, str]: Action taken per column ("created", "optimized" or "current")
+    """
+    if not scalar_cfgs["ENABLED"] or table.count_rows() == 0:
+        return {}
+
+    actions: Dict[str, str] = {}
+    unindexed: int = 0
+    names: List[str] = table.schema.names
+    for column, index_type in scalar_cfgs["COLUMNS"].items():
+        if column not in names:
+            continue
+        index: Optional[Any] = get_index(table=table, column=column)
+        if index is None:
+            table.create_scalar_index(column, index_type=index_type, replace=True)
+            logger.info(msg=f"Built {index_type} index on {table.name}.{column}")
+            actions[column] = "created"
+            continue
+        stats: Optional[Any] = table.index_stats(index_name=index.name)
+        if stats is not None and stats.num_unindexed_rows:
+            unindexed = max(unindexed, stats.num_unindexed_rows)
+            actions[column] = "optimized"
+        else:
+            actions[column] = "current"
+
+    if unindexed:
+        # One optimize() call updates every index of the table
+        table.optimize()
+        logger.info(msg=f"Added {unindexed} rows to the scalar indexes of {table.name}")
+    return actions
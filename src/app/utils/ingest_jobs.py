@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+# """
+# ingest_jobs.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+from utils.checkpoint import (
+    CheckpointManifest,
+    CheckpointTracker,
+    get_checkpoint_manifest,
+    plan_resume,
+    upsert_scope,
+)
+from utils.sitemap import get_sitemap_urls
+
+from configs import cfgs
+from src.app.batch_ingestion import BatchIngestResult, DocumentReport, ingest_sources
+from src.app.embedding import IngestStats, ingest_website
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+# "documents": files or URLs; "website": the pages listed by the sitemap of ``sources[0]``
+JobKind = Literal["documents", "website"]
+
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+@dataclass
+class IngestJobConfig:
+    """Background ingestion settings (``INGESTION.JOBS``)."""
+
+    path: str = "vector_db/ingest_jobs.sqlite"
+    workers: int = 2
+    max_workers_per_job: Optional[int] = 2
+    max_pages_per_job: Optional[int] = None
+    heartbeat_seconds: float = 5.0
+    stale_seconds: float = 60.0
+    max_attempts: int = 3
+    upload_dir: str = "vector_db/uploads"
+    poll_seconds: float = 2.0
+
+    @classmethod
+    def from_configs(cls, cfgs: Dict[str, Any]) -> "IngestJobConfig":
+        """Build the settings from the application configuration."""
+        job_cfgs: Dict[str, Any] = cfgs["INGESTION"]["JOBS"]
+        return cls(
+            path=job_cfgs["PATH"],
+            workers=job_cfgs["WORKERS"],
+            max_workers_per_job=job_cfgs["MAX_WORKERS_PER_JOB"],
+            max_pages_per_job=job_cfgs["MAX_PAGES_PER_JOB"],
+            heartbeat_seconds=job_cfgs["HEARTBEAT_SECONDS"],
+            stale_seconds=job_cfgs["STALE_SECONDS"],
+            max_attempts=job_cfgs["MAX_ATTEMPTS"],
+            upload_dir=job_cfgs["UPLOAD_DIR"],
+            poll_seconds=job_cfgs["POLL_SECONDS"],
+        )
+
+
+@dataclass
+class IngestJob:
+    """State and progress of a background ingestion.
+
+    The counters describe the current attempt; a resumed attempt starts from
+    the pages its predecessors completed.
+    """
+
+    id: str
+    kind: JobKind
+    table: str
+    sources: List[str]
+    mode: str
+    # "workers", "max_pages", "converter", "sitemap_filename", "delete_sources"
+    options: Dict[str, Any] = field(default_factory=dict)
+    status: str = "queued"  # "queued", "running", "done", "failed" or "cancelled"
+    attempts: int = 0
+    pages_total: int = 0  # 0 while unknown, e.g. during an incremental crawl
+    pages_done: int = 0
+    pages_failed: int = 0
+    chunks: int = 0
+    chunks_written: int = 0
+    tokens: int = 0
+    error: Optional[str] = None
+    owner: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    heartbeat_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def progress(self) -> float:
+        """Share of the pages processed, 0 while their number is unknown."""
+        if self.status == "done":
+            return 1.0
+        if not self.pages_total:
+            return 0.0
+        return min(1.0, (self.pages_done + self.pages_failed) / self.pages_total)
+
+
+_COLUMNS: List[str] = [f.name for f in fields(IngestJob)]
+_JSON_COLUMNS = ("sources", "options")
+
+
+def _to_row(job: IngestJob) -> List[Any]:
+    values: Dict[str, Any] = {name: getattr(job, name) for name in _COLUMNS}
+    for name in _JSON_COLUMNS:
+        values[name] = json.dumps(values[name])
+    return [values[name] for name in _COLUMNS]
+
+
+def _from_row(row: Any) -> IngestJob:
+    values: Dict[str, Any] = dict(zip(_COLUMNS, row))
+    for name in _JSON_COLUMNS:
+        values[name] = json.loads(values[name])
+    return IngestJob(**values)
+
+
+def _cap(*limits: Optional[int]) -> Optional[int]:
+    present: List[int] = [limit for limit in limits if limit]
+    return min(present) if present else None
+
+
+class IngestJobQueue:
+    """Ingestion jobs persisted in SQLite (WAL mode) and run by a pool of threads.
+
+    Submitting only inserts a row, so callers such as a Streamlit script run
+    return at once and poll the job's progress. Workers claim the oldest queued
+    job of a table nobody is ingesting into; several tables are ingested in
+    parallel, each job in its own bounded process pool. Running jobs send
+    heartbeats, and a job whose process died (restart, crash) is queued again
+    and resumed from the checkpoint manifest in ``upsert`` mode, up to
+    ``max_attempts`` times. Several processes can share the database.
+    """
+
+    def __init__(self, config: IngestJobConfig) -> None:
+        """Open (or create) the job database; ``start`` launches the workers.
+
+        Args:
+            config: Database path, pool size, per-job limits and timings
+        """
+        os.makedirs(name=os.path.dirname(os.path.abspath(config.path)), exist_ok=True)
+        self.config: IngestJobConfig = config
+        # Host, PID and a token telling this process apart from an earlier one with the same PID
+        self.owner: str = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._running: Dict[str, IngestJob] = {}
+        self._listeners: List[Callable[[IngestJob], None]] = []
+        self._conn = sqlite3.connect(database=config.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                "table" TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                pages_total INTEGER NOT NULL,
+                pages_done INTEGER NOT NULL,
+                pages_failed INTEGER NOT NULL,
+                chunks INTEGER NOT NULL,
+                chunks_written INTEGER NOT NULL,
+                tokens INTEGER NOT NULL,
+                error TEXT,
+                owner TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                heartbeat_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+        )
+        self._conn.commit()
+
+    def start(self) -> None:
+        """Start the worker and heartbeat threads, once."""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.config.workers):
+                self._threads.append(
+                    threading.Thread(target=self._work, name=f"ingest-job-{i}", daemon=True)
+                )
+            self._threads.append(
+                threading.Thread(target=self._heartbeat, name="ingest-job-heartbeat", daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def add_listener(self, listener: Callable[[IngestJob], None]) -> None:
+        """Call ``listener`` with every job this process finishes running."""
+        self._listeners.append(listener)
+
+    def submit(
+        self,
+        kind: JobKind,
+        table: str,
+        sources: List[str],
+        mode: str,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> IngestJob:
+        """
+        Queue an ingestion.
+
+        Args:
+            kind: "documents" for files or URLs, "website" to crawl the sitemap of ``sources[0]``
+            table: Table to ingest into
+            sources: Document paths or URLs, or the base URL of the website
+            mode: Table creation mode ("create", "overwrite" or "upsert")
+            options: Per-job settings: ``workers`` (conversion processes, capped by
+                ``max_workers_per_job``), ``max_pages`` (capped by
+                ``max_pages_per_job``), ``converter`` kind, ``sitemap_filename``,
+                and ``delete_sources`` to remove uploaded files once finished
+
+        Returns:
+            IngestJob: The queued job
+        """
+        job = IngestJob(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            table=table,
+            sources=sources,
+            mode=mode,
+            options=options or {},
+        )
+        placeholders: str = ", ".join("?" for _ in _COLUMNS)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(_quoted(_COLUMNS))}) VALUES ({placeholders})",
+                _to_row(job=job),
+            )
+            self._conn.commit()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        """The job ``job_id``, None if unknown."""
+        with self._lock:
+            row: Any = self._conn.execute(
+                f"SELECT {', '.join(_quoted(_COLUMNS))} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return _from_row(row=row) if row else None
+
+    def list(self, limit: int = 20) -> List[IngestJob]:
+        """The latest jobs, newest first."""
+        with self._lock:
+            rows: List[Any] = self._conn.execute(
+                f"SELECT {', '.join(_quoted(_COLUMNS))} FROM jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [_from_row(row=row) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet; returns whether it was cancelled."""
+        with self._lock:
+            cursor: sqlite3.Cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of jobs per status, and those running in this process."""
+        with self._lock:
+            counts: List[Any] = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+            running: List[str] = sorted(self._running)
+        return {**{status: count for status, count in counts}, "running_here": running}
+
+    # Workers
+
+    def _work(self) -> None:
+        while True:
+            try:
+                job: Optional[IngestJob] = self._claim()
+            except sqlite3.Error as e:
+                logger.warning(msg=f"Could not claim an ingestion job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(timeout=self.config.heartbeat_seconds)
+                self._wakeup.clear()
+                continue
+            self._run(job=job)
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(self.config.heartbeat_seconds)
+            with self._lock:
+                ids: List[str] = list(self._running)
+                if ids:
+                    self._conn.execute(
+                        f"UPDATE jobs SET heartbeat_at = ? "
+                        f"WHERE id IN ({', '.join('?' for _ in ids)})",
+                        (time.time(), *ids),
+                    )
+                    self._conn.commit()
+
+    def _owner_gone(self, owner: Optional[str]) -> bool:
+        # Only processes of this host can be checked; others go stale instead
+        host, pid, token = (owner or "::").split(sep=":")
+        if host != socket.gethostname() or not pid:
+            return False
+        if int(pid) == os.getpid():
+            return token != self.owner.split(sep=":")[2]
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def _recover(self) -> None:
+        """Queue again the running jobs whose process died, or fail them after too many tries."""
+        now: float = time.time()
+        rows: List[Any] = self._conn.execute(
+            "SELECT id, owner, heartbeat_at, attempts FROM jobs WHERE status = 'running'"
+        ).fetchall()
+        for job_id, owner, heartbeat_at, attempts in rows:
+            if owner == self.owner:
+                continue
+            stale: bool = (heartbeat_at or 0) < now - self.config.stale_seconds
+            if not stale and not self._owner_gone(owner=owner):
+                continue
+            if attempts >= self.config.max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+                    "WHERE id = ? AND status = 'running' AND owner = ?",
+                    (f"Interrupted {attempts} times", now, job_id, owner),
+                )
+            else:
+                logger.info(msg=f"Ingestion job {job_id} was interrupted, queueing it again")
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', owner = NULL "
+                    "WHERE id = ? AND status = 'running' AND owner = ?",
+                    (job_id, owner),
+                )
+        self._conn.commit()
+
+    def _claim(self) -> Optional[IngestJob]:
+        with self._lock:
+            self._recover()
+            # One job per table at a time: they would share its checkpoints and indexes
+            row: Any = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND \"table\" NOT IN "
+                "(SELECT \"table\" FROM jobs WHERE status = 'running') "
+                "ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            now: float = time.time()
+            # Compare-and-set, so only one worker of any process gets the job
+            cursor: sqlite3.Cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, attempts = attempts + 1, "
+                "started_at = ?, heartbeat_at = ?, error = NULL "
+                "WHERE id = ? AND status = 'queued'",
+                (self.owner, now, now, row[0]),
+            )
+            self._conn.commit()
+        if cursor.rowcount != 1:
+            return None
+        job: Optional[IngestJob] = self.get(job_id=row[0])
+        if job is not None:
+            with self._lock:
+                self._running[job.id] = job
+        return job
+
+    def _save(self, job: IngestJob) -> None:
+        job.heartbeat_at = time.time()
+        assignments: str = ", ".join(f"{name} = ?" for name in _quoted(_COLUMNS[1:]))
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND owner = ?",
+                (*_to_row(job=job)[1:], job.id, self.owner),
+            )
+            self._conn.commit()
+
+    def _run(self, job: IngestJob) -> None:
+        # A resumed job keeps what the interrupted attempt stored
+        mode: str = job.mode if job.attempts == 1 else "upsert"
+        logger.info(msg=f"Ingestion job {job.id} into {job.table} started (attempt {job.attempts})")
+        try:
+            if job.kind == "website" and not cfgs["INGESTION"]["POOL"]["ENABLED"]:
+                self._crawl(job=job, mode=mode)
+            else:
+                self._ingest(job=job, mode=mode)
+            job.status = "done"
+        except Exception as e:
+            logger.exception(msg=f"Ingestion job {job.id} failed")
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+        job.finished_at = time.time()
+        self._save(job=job)
+        with self._lock:
+            self._running.pop(job.id, None)
+
+        if job.options.get("delete_sources"):
+            for source in job.sources:
+                shutil.rmtree(path=os.path.dirname(source), ignore_errors=True)
+        for listener in self._listeners:
+            listener(job)
+
+    def _ingest(self, job: IngestJob, mode: str) -> None:
+        sources: List[str] = job.sources
+        if job.kind == "website":
+            sources = get_sitemap_urls(
+                base_url=job.sources[0],
+                sitemap_filename=job.options.get("sitemap_filename", "sitemap.xml"),
+            )
+        max_pages: Optional[int] = _cap(job.options.get("max_pages"), self.config.max_pages_per_job)
+        if max_pages and len(sources) > max_pages:
+            logger.warning(msg=f"Job {job.id}: ingesting the first {max_pages} of {len(sources)}")
+            sources = sources[:max_pages]
+
+        manifest: CheckpointManifest = get_checkpoint_manifest(
+            path=cfgs["INGESTION"]["CHECKPOINT"]["PATH"], table_name=job.table
+        )
+        if mode != "upsert":
+            manifest.reset()
+        todo, done, hashes = plan_resume(manifest=manifest, sources=sources)
+        job.pages_total, job.pages_done, job.pages_failed = len(sources), len(done), 0
+        job.chunks = job.chunks_written = sum(len(checkpoint.chunk_ids) for checkpoint in done)
+        job.tokens = sum(checkpoint.tokens for checkpoint in done)
+        self._save(job=job)
+        if not todo:
+            return
+
+        # Documents of earlier jobs into the same table keep their chunks
+        keep_ids, stale_scope = upsert_scope(manifest=manifest, todo=todo)
+        tracker = CheckpointTracker(manifest=manifest, hashes=hashes)
+        written: int = job.chunks_written
+
+        def on_document(report: DocumentReport) -> None:
+            tracker.document(
+                source=report.source,
+                chunk_ids=report.chunk_ids,
+                tokens=report.tokens,
+                error=report.error,
+            )
+            if report.ok:
+                job.pages_done += 1
+            else:
+                job.pages_failed += 1
+            job.chunks += report.chunks
+            job.tokens += report.tokens
+            self._save(job=job)
+
+        def on_progress(stats: IngestStats) -> None:
+            job.chunks_written = written + stats.inserted + stats.unchanged
+            self._save(job=job)
+
+        workers: Optional[int] = _cap(
+            job.options.get("workers"),
+            cfgs["INGESTION"]["POOL"]["WORKERS"] or os.cpu_count(),
+            self.config.max_workers_per_job,
+        )
+        result: BatchIngestResult = ingest_sources(
+            sources=todo,
+            max_tokens=cfgs["LLM"]["MAX_TOKENS"],
+            db_path=cfgs["VECTOR_DB"]["URI"],
+            table_name=job.table,
+            llm_provider=cfgs["LLM"]["PROVIDER"],
+            embed_model=cfgs["EMBEDDINGS"]["MODEL"],
+            mode=mode,
+            workers=workers,
+            kind=job.options.get("converter"),
+            do_ocr=cfgs["CONVERSION"]["DO_OCR"],
+            on_progress=on_progress,
+            on_document=on_document,
+            keep_ids=keep_ids,
+            on_committed=tracker.committed,
+            stale_scope=stale_scope,
+            on_deleted=tracker.deleted,
+        )
+        job.chunks_written = written + result.stats.inserted + result.stats.unchanged
+        if result.failed:
+            first: DocumentReport = result.failed[0]
+            job.error = f"{len(result.failed)} pages failed, e.g. {first.source}: {first.error}"
+            if len(result.failed) == len(todo):
+                raise RuntimeError(job.error)
+
+    def _crawl(self, job: IngestJob, mode: str) -> None:
+        def on_progress(stats: IngestStats) -> None:
+            job.pages_done = stats.documents
+            job.pages_failed = stats.failed
+            job.chunks = stats.chunks
+            job.chunks_written = stats.inserted + stats.unchanged
+            self._save(job=job)
+
+        # Pages are fetched concurrently; in upsert mode only those changed since
+        # the last crawl, which also makes a resumed crawl skip the stored ones
+        on_progress(stats=IngestStats())
+        ingest_website(
+            base_url=job.sources[0],
+            max_tokens=cfgs["LLM"]["MAX_TOKENS"],
+            db_path=cfgs["VECTOR_DB"]["URI"],
+            table_name=job.table,
+            llm_provider=cfgs["LLM"]["PROVIDER"],
+            embed_model=cfgs["EMBEDDINGS"]["MODEL"],
+            sitemap_filename=job.options.get("sitemap_filename", "sitemap.xml"),
+            mode=mode,
+            on_progress=on_progress,
+        )
+
+
+def _quoted(names: List[str]) -> List[str]:
+    # "table" is an SQL keyword
+    return [f'"{name}"' for name in names]
+
+
+_queues: Dict[str, IngestJobQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_ingest_job_queue(config: IngestJobConfig) -> IngestJobQueue:
+    """Return the process-wide queue stored at ``config.path``, its workers started."""
+    key: str = os.path.abspath(config.path)
+    with _queues_lock:
+        if key not in _queues:
+            _queues[key] = IngestJobQueue(config=config)
+            _queues[key].start()
+        return _queues[key]
+
+
+def save_upload(config: IngestJobConfig, filename: str, data: bytes) -> str:
+    """
+    Store an uploaded file where its job can read it, even after a restart.
+
+    Args:
+        config: Queue settings holding the upload directory
+        filename: Original file name, kept so it ends up in the chunk metadata
+        data: File contents
+
+    Returns:
+        str: Path of the stored file, in a directory of its own
+    """
+    directory: str = os.path.join(config.upload_dir, uuid.uuid4().hex)
+    os.makedirs(name=directory, exist_ok=True)
+    path: str = os.path.join(directory, os.path.basename(filename))
+    with open(file=path, mode="wb") as f:
+        f.write(data)
+    return path
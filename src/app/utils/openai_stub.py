@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+# """
+# openai_stub.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import numpy as np
+
+MODEL_DIMS: Dict[str, int] = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+
+def fake_embedding(text: str, dims: int) -> np.ndarray:
+    """Deterministic float32 unit vector derived from the text."""
+    seed: int = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], byteorder="little")
+    vector: np.ndarray = np.random.default_rng(seed=seed).standard_normal(dims, np.float32)
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+
+def _encode_embedding(vector: np.ndarray, encoding_format: str) -> Any:
+    # The OpenAI client asks for base64 by default, which is much cheaper to
+    # serialize and parse than a list of floats
+    if encoding_format == "base64":
+        return base64.b64encode(vector.astype("<f4").tobytes()).decode()
+    return vector.tolist()
+
+
+class StubState:
+    """Shared counters and failure injection settings of the stub server."""
+
+    def __init__(
+        self,
+        latency_ms: float,
+        rate_limit_every: int,
+        retry_after_ms: int,
+        token_ms: float = 5.0,
+        answer_tokens: int = 40,
+    ) -> None:
+        self.latency_ms: float = latency_ms
+        self.rate_limit_every: int = rate_limit_every
+        self.retry_after_ms: int = retry_after_ms
+        self.token_ms: float = token_ms
+        self.answer_tokens: int = answer_tokens
+        self.counter = itertools.count(start=1)
+        self.lock = threading.Lock()
+        self.requests: int = 0
+        self.inputs: int = 0
+        self.rate_limited: int = 0
+        self.chat_requests: int = 0
+        self.chat_in_flight: int = 0
+        self.max_chat_in_flight: int = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Mimics the parts of the OpenAI HTTP API used by the app."""
+
+    state: StubState
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str]) -> None:
+        payload: bytes = json.dumps(obj=body).encode()
+        self.send_response(code=status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/stats":
+            state: StubState = self.state
+            self._send_json(
+                status=200,
+                body={
+                    "requests": state.requests,
+                    "inputs": state.inputs,
+                    "rate_limited": state.rate_limited,
+                    "chat_requests": state.chat_requests,
+                    "max_chat_in_flight": state.max_chat_in_flight,
+                },
+                headers={},
+            )
+            return
+        self._send_json(status=404, body={"error": {"message": "not found"}}, headers={})
+
+    def do_POST(self) -> None:
+        length: int = int(self.headers.get("Content-Length", 0))
+        request: Dict[str, Any] = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.rstrip("/").endswith("/embeddings"):
+            self._handle_embeddings(request=request)
+            return
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            self._handle_chat(request=request)
+            return
+        self._send_json(status=404, body={"error": {"message": "not found"}}, headers={})
+
+    def _handle_embeddings(self, request: Dict[str, Any]) -> None:
+        state: StubState = self.state
+        with state.lock:
+            number: int = next(state.counter)
+
+        if state.rate_limit_every and number % state.rate_limit_every == 0:
+            with state.lock:
+                state.rate_limited += 1
+            self._send_json(
+                status=429,
+                body={"error": {"message": "Rate limit reached", "type": "requests"}},
+                headers={
+                    "retry-after-ms": str(state.retry_after_ms),
+                    "x-ratelimit-remaining-requests": "0",
+                    "x-ratelimit-reset-requests": f"{state.retry_after_ms}ms",
+                },
+            )
+            return
+
+        time.sleep(state.latency_ms / 1000)
+        inputs: Any = request.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        model: str = request.get("model", "text-embedding-3-large")
+        dims: int = request.get("dimensions") or MODEL_DIMS.get(model, 1536)
+        encoding_format: str = request.get("encoding_format") or "float"
+
+        with state.lock:
+            state.requests += 1
+            state.inputs += len(inputs)
+
+        tokens: int = sum(len(str(text).split()) for text in inputs)
+        self._send_json(
+            status=200,
+            body={
+                "object": "list",
+                "model": model,
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": i,
+                        "embedding": _encode_embedding(
+                            vector=fake_embedding(text=str(text), dims=dims),
+                            encoding_format=encoding_format,
+                        ),
+                    }
+                    for i, text in enumerate(inputs)
+                ],
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+            headers={
+                "x-ratelimit-remaining-requests": "10000",
+                "x-ratelimit-remaining-tokens": "10000000",
+                "x-ratelimit-reset-tokens": "0s",
+            },
+        )
+
+    def _handle_chat(self, request: Dict[str, Any]) -> None:
+        state: StubState = self.state
+        with state.lock:
+            state.chat_requests += 1
+            state.chat_in_flight += 1
+            state.max_chat_in_flight = max(state.max_chat_in_flight, state.chat_in_flight)
+        try:
+            messages: List[Dict[str, Any]] = request.get("messages", [])
+            question: str = str(messages[-1].get("content", "")) if messages else ""
+            # Deterministic answer echoing the question, long enough to stream
+            words: List[str] = (question.split() or ["stub"]) * state.answer_tokens
+            tokens: List[str] = [f"{word} " for word in words[: state.answer_tokens]]
+            model: str = request.get("model", "gpt-4o-mini")
+            prompt_tokens: int = sum(len(str(m.get("content", "")).split()) for m in messages)
+
+            time.sleep(state.latency_ms / 1000)
+            if not request.get("stream"):
+                time.sleep(state.token_ms * len(tokens) / 1000)
+                self._send_json(
+                    status=200,
+                    body={
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": "".join(tokens)},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {
+                            "prompt_tokens": prompt_tokens,
+                            "completion_tokens": len(tokens),
+                            "total_tokens": prompt_tokens + len(tokens),
+                        },
+                    },
+                    headers={},
+                )
+                return
+
+            self.send_response(code=200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            deltas: List[Dict[str, Any]] = [{"role": "assistant", "content": ""}]
+            deltas.extend({"content": token} for token in tokens)
+            for i, delta in enumerate(deltas):
+                last: bool = i == len(deltas) - 1
+                chunk: Dict[str, Any] = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "delta": delta, "finish_reason": "stop" if last else None}
+                    ],
+                }
+                self.wfile.write(f"data: {json.dumps(obj=chunk)}\n\n".encode())
+                self.wfile.flush()
+                if i:
+                    time.sleep(state.token_ms / 1000)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading the stream
+            pass
+        finally:
+            with state.lock:
+                state.chat_in_flight -= 1
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    latency_ms: float = 20.0,
+    rate_limit_every: int = 0,
+    retry_after_ms: int = 200,
+    token_ms: float = 5.0,
+    answer_tokens: int = 40,
+) -> ThreadingHTTPServer:
+    """Create the stub server; call ``serve_forever`` (or run it in a thread) to start it.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+        latency_ms: Artificial latency of every successful request
+        rate_limit_every: Answer every N-th embeddings request with a 429 (0 disables)
+        retry_after_ms: Value of the ``retry-after-ms`` header on 429 responses
+        token_ms: Delay between two streamed chat completion tokens
+        answer_tokens: Number of tokens of every chat completion
+
+    Returns:
+        ThreadingHTTPServer: Configured server
+    """
+    handler = type(
+        "BoundStubHandler",
+        (StubHandler,),
+        {"state": StubState(latency_ms, rate_limit_every, retry_after_ms, token_ms, answer_tokens)},
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main() -> None:
+    """Run the stub server from the command line."""
+    parser = argparse.ArgumentParser(description="Local stub of the OpenAI HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--retry-after-ms", type=int, default=200)
+    parser.add_argument("--token-ms", type=float, default=5.0)
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    args: argparse.Namespace = parser.parse_args()
+
+    server: ThreadingHTTPServer = serve(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        rate_limit_every=args.rate_limit_every,
+        retry_after_ms=args.retry_after_ms,
+        token_ms=args.token_ms,
+        answer_tokens=args.answer_tokens,
+    )
+    print(f"OpenAI stub listening on http://{args.host}:{server.server_port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
+
+# Usage
+# uv run python src/app/utils/openai_stub.py --port 8765 --rate-limit-every 5
+# OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub uv run streamlit run src/app/app.py
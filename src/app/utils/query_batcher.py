@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# """
+# query_batcher.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from lancedb.table import Table
+from utils.retrieval import RetrievalConfig, embed_queries, embed_query, embedder_key
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+
+@dataclass
+class QueryBatchConfig:
+    """Query embedding coalescing settings (``EMBEDDINGS.QUERY_BATCH``)."""
+
+    enabled: bool = True
+    max_size: int = 64
+    max_wait_ms: float = 10.0
+    max_in_flight: int = 4
+    stats_window: int = 10_000
+
+    @classmethod
+    def from_configs(cls, cfgs: Dict[str, Any]) -> "QueryBatchConfig":
+        """Build the settings from the application configuration."""
+        batch_cfgs: Dict[str, Any] = cfgs["EMBEDDINGS"]["QUERY_BATCH"]
+        return cls(
+            enabled=batch_cfgs["ENABLED"],
+            max_size=batch_cfgs["MAX_SIZE"],
+            max_wait_ms=batch_cfgs["MAX_WAIT_MS"],
+            max_in_flight=batch_cfgs["MAX_IN_FLIGHT"],
+            stats_window=batch_cfgs["STATS_WINDOW"],
+        )
+
+
+@dataclass
+class _PendingBatch:
+    table: Table
+    deadline: float
+    futures: Dict[str, Future] = field(default_factory=dict)
+    submitted: Dict[str, float] = field(default_factory=dict)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered: List[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class QueryEmbeddingCoalescer:
+    """Gathers the queries of concurrent callers into one embeddings request.
+
+    The first query of a batch waits at most ``max_wait_ms`` for others using
+    the same embedding function; a batch holding ``max_size`` distinct queries
+    is sent at once. A dispatcher thread flushes the batches whose wait is
+    over, and up to ``max_in_flight`` batches are embedded concurrently.
+    Identical queries in a batch are embedded once.
+    """
+
+    def __init__(self, config: QueryBatchConfig) -> None:
+        """Initialize the coalescer; the dispatcher thread starts with the first query.
+
+        Args:
+            config: Batch size, wait and concurrency settings
+        """
+        self.config: QueryBatchConfig = config
+        self._cond = threading.Condition()
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._dispatcher: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.max_in_flight, thread_name_prefix="query-embed"
+        )
+        self.queries: int = 0
+        self.batches: int = 0
+        self.largest: int = 0
+        self.failures: int = 0
+        self._latencies: Deque[float] = deque(maxlen=config.stats_window)
+        self._embed_ms: Deque[float] = deque(maxlen=config.stats_window)
+
+    def submit(self, table: Table, query: str) -> Future:
+        """
+        Queue ``query`` for embedding with the embedding function of ``table``.
+
+        Returns:
+            Future: Resolves to the query vector; wrap it with ``asyncio.wrap_future``
+            to await it from an event loop
+        """
+        key: str = embedder_key(table=table)
+        now: float = time.perf_counter()
+        with self._cond:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch, name="query-embed-dispatcher", daemon=True
+                )
+                self._dispatcher.start()
+            batch: Optional[_PendingBatch] = self._pending.get(key)
+            if batch is None:
+                batch = self._pending[key] = _PendingBatch(
+                    table=table, deadline=now + self.config.max_wait_ms / 1000
+                )
+                self._cond.notify()
+            if query not in batch.futures:
+                batch.futures[query] = Future()
+                batch.submitted[query] = now
+            future: Future = batch.futures[query]
+            self.queries += 1
+            if len(batch.futures) >= self.config.max_size:
+                del self._pending[key]
+                self._executor.submit(self._embed, batch)
+        return future
+
+    def embed(self, table: Table, query: str) -> List[float]:
+        """Embed ``query``, blocking until its batch is embedded."""
+        return self.submit(table=table, query=query).result()
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                now: float = time.perf_counter()
+                due: List[str] = [
+                    key for key, batch in self._pending.items() if batch.deadline <= now
+                ]
+                if not due:
+                    self._cond.wait(
+                        timeout=min(batch.deadline for batch in self._pending.values()) - now
+                    )
+                    continue
+                batches: List[_PendingBatch] = [self._pending.pop(key) for key in due]
+            for batch in batches:
+                self._executor.submit(self._embed, batch)
+
+    def _embed(self, batch: _PendingBatch) -> None:
+        queries: List[str] = list(batch.futures)
+        start: float = time.perf_counter()
+        try:
+            vectors: List[List[float]] = embed_queries(table=batch.table, queries=queries)
+        except Exception as e:
+            logger.warning(msg=f"Embedding a batch of {len(queries)} queries failed: {e}")
+            with self._cond:
+                self.failures += 1
+            for future in batch.futures.values():
+                future.set_exception(e)
+            return
+
+        done: float = time.perf_counter()
+        with self._cond:
+            self.batches += 1
+            self.largest = max(self.largest, len(queries))
+            self._embed_ms.append((done - start) * 1000)
+            self._latencies.extend((done - batch.submitted[query]) * 1000 for query in queries)
+        for query, vector in zip(queries, vectors):
+            batch.futures[query].set_result(vector)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch sizes and latency percentiles over the last ``stats_window`` queries."""
+        with self._cond:
+            latencies: List[float] = list(self._latencies)
+            embed_ms: List[float] = list(self._embed_ms)
+            queries, batches = self.queries, self.batches
+        return {
+            "queries": queries,
+            "batches": batches,
+            "avg_batch": round(queries / batches, 2) if batches else 0.0,
+            "largest_batch": self.largest,
+            "failures": self.failures,
+            "p50_ms": round(_percentile(values=latencies, pct=50), 2),
+            "p99_ms": round(_percentile(values=latencies, pct=99), 2),
+            "embed_p50_ms": round(_percentile(values=embed_ms, pct=50), 2),
+        }
+
+
+_coalescers: Dict[Tuple[int, float, int], QueryEmbeddingCoalescer] = {}
+_coalescers_lock = threading.Lock()
+
+
+def get_query_coalescer(config: QueryBatchConfig) -> QueryEmbeddingCoalescer:
+    """Return the process-wide coalescer described by ``config``."""
+    key: Tuple[int, float, int] = (config.max_size, config.max_wait_ms, config.max_in_flight)
+    with _coalescers_lock:
+        if key not in _coalescers:
+            _coalescers[key] = QueryEmbeddingCoalescer(config=config)
+        return _coalescers[key]
+
+
+def get_query_coalescers() -> List[QueryEmbeddingCoalescer]:
+    """Return every coalescer created in this process."""
+    return list(_coalescers.values())
+
+
+def embed_query_batched(
+    table: Table, query: str, config: Optional[QueryBatchConfig] = None
+) -> List[float]:
+    """
+    Embed a query through the process-wide coalescer, or directly when batching is off.
+
+    Args:
+        table: Table whose embedding function embeds the query
+        query: Query text
+        config: Coalescing settings, no coalescing if omitted or disabled
+
+    Returns:
+        List[float]: Query vector
+    """
+    if config is None or not config.enabled:
+        return embed_query(table=table, query=query)
+    return get_query_coalescer(config=config).embed(table=table, query=query)
+
+
+def can_share_query_vector(
+    tables: Sequence[Table], retrieval: Optional[RetrievalConfig] = None
+) -> bool:
+    """Whether one query vector serves every table: a vector search with one embedding function."""
+    if (retrieval or RetrievalConfig()).mode == "fts":
+        return False
+    return len({embedder_key(table=table) for table in tables}) == 1
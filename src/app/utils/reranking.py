@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+# """
+# reranking.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import abc
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.embedding_cache import text_hash
+from utils.retrieval import SearchResult
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass
+class RerankConfig:
+    """Reranking settings (``VECTOR_DB.RERANK``)."""
+
+    enabled: bool = False
+    provider: str = "cross-encoder"  # "cross-encoder" or "bm25"
+    model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    candidates: int = 50
+    batch_size: int = 32
+    max_length: int = 512
+    cache_size: int = 100_000
+
+    @classmethod
+    def from_configs(cls, cfgs: Dict[str, Any]) -> "RerankConfig":
+        """Build the settings from the application configuration."""
+        rerank_cfgs: Dict[str, Any] = cfgs["VECTOR_DB"]["RERANK"]
+        return cls(
+            enabled=rerank_cfgs["ENABLED"],
+            provider=rerank_cfgs["PROVIDER"],
+            model=rerank_cfgs["MODEL"],
+            candidates=rerank_cfgs["CANDIDATES"],
+            batch_size=rerank_cfgs["BATCH_SIZE"],
+            max_length=rerank_cfgs["MAX_LENGTH"],
+            cache_size=rerank_cfgs["CACHE_SIZE"],
+        )
+
+
+class Reranker(abc.ABC):
+    """Reorders retrieved chunks by a relevance score computed against the query.
+
+    Scores are memoized in an LRU keyed by (query hash, chunk id), so a repeated
+    or regenerated question only scores chunks it has not seen. Subclasses
+    implement ``score``; those whose scores depend on the whole candidate set
+    set ``relative`` and are cached per candidate set instead.
+    """
+
+    name: str = "reranker"
+    # Whether a score depends on the other candidates, not just on (query, chunk)
+    relative: bool = False
+
+    def __init__(self, cache_size: int = 100_000) -> None:
+        """Initialize the reranker.
+
+        Args:
+            cache_size: Number of (query, chunk) scores kept in memory
+        """
+        self.cache_size: int = cache_size
+        self._cache: OrderedDict[Tuple[str, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.total_ms: float = 0.0
+        self.last_ms: float = 0.0
+
+    @abc.abstractmethod
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        """Relevance of each text to the query, higher is better."""
+
+    def rerank(
+        self, query: str, results: Sequence[SearchResult], top_n: int
+    ) -> Tuple[List[SearchResult], Dict[str, float]]:
+        """
+        Keep the ``top_n`` results most relevant to the query.
+
+        Args:
+            query: User question
+            results: Retrieved candidates
+            top_n: Number of results to keep
+
+        Returns:
+            Tuple[List[SearchResult], Dict[str, float]]: Best results first, their
+            ``score`` replaced by the reranker score, and the rerank duration in
+            ms with the cache hits and the number of chunks scored
+        """
+        start: float = time.perf_counter()
+        chunk_keys: List[str] = [
+            result.chunk_id or text_hash(text=result.text) for result in results
+        ]
+        digest = hashlib.sha256(query.encode(encoding="utf-8"))
+        if self.relative:
+            for chunk_key in sorted(chunk_keys):
+                digest.update(b"\0" + chunk_key.encode(encoding="utf-8"))
+        query_hash: str = digest.hexdigest()
+        keys: List[Tuple[str, str]] = [(query_hash, chunk_key) for chunk_key in chunk_keys]
+
+        with self._lock:
+            scores: List[Optional[float]] = [self._cache.get(key) for key in keys]
+            for key, score in zip(keys, scores):
+                if score is not None:
+                    self._cache.move_to_end(key)
+        missing: List[int] = [i for i, score in enumerate(scores) if score is None]
+        if missing and self.relative:
+            # Scoring a subset would compute its statistics on that subset alone
+            missing = list(range(len(results)))
+        if missing:
+            computed: List[float] = self.score(
+                query=query, texts=[results[i].text for i in missing]
+            )
+            with self._lock:
+                for i, score in zip(missing, computed):
+                    scores[i] = score
+                    self._cache[keys[i]] = score
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        ranked: List[Tuple[float, SearchResult]] = sorted(
+            ((score, result) for score, result in zip(scores, results) if score is not None),
+            key=lambda pair: pair[0],
+            reverse=True,
+        )
+        reranked: List[SearchResult] = [
+            replace(result, score=score) for score, result in ranked[:top_n]
+        ]
+        elapsed: float = round((time.perf_counter() - start) * 1000, 2)
+        with self._lock:
+            self.calls += 1
+            self.hits += len(results) - len(missing)
+            self.misses += len(missing)
+            self.total_ms += elapsed
+            self.last_ms = elapsed
+
+        timings: Dict[str, float] = {
+            "rerank_ms": elapsed,
+            "cache_hits": len(results) - len(missing),
+            "scored": len(missing),
+        }
+        logger.info(msg=f"{self.name} reranked {len(results)} candidates to {top_n} {timings}")
+        return reranked, timings
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency and cache counters of the reranker."""
+        lookups: int = self.hits + self.misses
+        return {
+            "reranker": self.name,
+            "calls": self.calls,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "last_ms": self.last_ms,
+            "cached_scores": len(self._cache),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class BM25Reranker(Reranker):
+    """BM25 over the candidate set, with no model to load.
+
+    Term statistics come from the candidates themselves, which is enough to
+    promote chunks sharing rare query terms over ones that only matched in
+    embedding space.
+    """
+
+    name: str = "bm25"
+    relative: bool = True
+
+    def __init__(self, cache_size: int = 100_000, k1: float = 1.5, b: float = 0.75) -> None:
+        """Initialize the reranker.
+
+        Args:
+            cache_size: Number of (query, chunk) scores kept in memory
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        super().__init__(cache_size=cache_size)
+        self.k1: float = k1
+        self.b: float = b
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        documents: List[Counter] = [Counter(_WORD.findall(text.lower())) for text in texts]
+        if not documents:
+            return []
+        lengths: List[int] = [sum(document.values()) for document in documents]
+        average: float = sum(lengths) / len(lengths) or 1.0
+        terms: List[str] = list(dict.fromkeys(_WORD.findall(query.lower())))
+        frequencies: Dict[str, int] = {
+            term: sum(1 for document in documents if term in document) for term in terms
+        }
+        idf: Dict[str, float] = {
+            term: math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            for term, df in frequencies.items()
+        }
+
+        scores: List[float] = []
+        for document, length in zip(documents, lengths):
+            norm: float = self.k1 * (1 - self.b + self.b * length / average)
+            scores.append(
+                sum(
+                    idf[term] * document[term] * (self.k1 + 1) / (document[term] + norm)
+                    for term in terms
+                    if term in document
+                )
+            )
+        return scores
+
+
+class CrossEncoderReranker(Reranker):
+    """Local cross-encoder scoring each (query, chunk) pair on the CPU.
+
+    The model is a HuggingFace sequence classification checkpoint such as
+    ``cross-encoder/ms-marco-MiniLM-L-6-v2``, loaded once per process.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 32,
+        max_length: int = 512,
+        cache_size: int = 100_000,
+    ) -> None:
+        """Load the model.
+
+        Args:
+            model_name: HuggingFace model name or local path
+            batch_size: Pairs scored per forward pass
+            max_length: Token limit of a (query, chunk) pair, longer chunks are truncated
+            cache_size: Number of (query, chunk) scores kept in memory
+        """
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        super().__init__(cache_size=cache_size)
+        self.name = model_name
+        self.batch_size: int = batch_size
+        self.max_length: int = max_length
+        self._torch: Any = torch
+        self._tokenizer: Any = AutoTokenizer.from_pretrained(model_name)
+        self._model: Any = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self._model.eval()
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        scores: List[float] = []
+        for offset in range(0, len(texts), self.batch_size):
+            batch: List[str] = list(texts[offset : offset + self.batch_size])
+            inputs: Any = self._tokenizer(
+                [query] * len(batch),
+                batch,
+                padding=True,
+                truncation="only_second",
+                max_length=self.max_length,
+                return_tensors="pt",
+            )
+            with self._torch.inference_mode():
+                logits: Any = self._model(**inputs).logits
+            # Single-logit models output the relevance directly, others a class distribution
+            if logits.shape[-1] == 1:
+                scores.extend(logits[:, 0].tolist())
+            else:
+                scores.extend(logits.softmax(dim=-1)[:, -1].tolist())
+        return scores
+
+
+_rerankers: Dict[Tuple[str, str], Reranker] = {}
+_rerankers_lock = threading.Lock()
+
+
+def get_reranker(config: RerankConfig) -> Reranker:
+    """
+    Return the process-wide reranker described by ``config``.
+
+    A cross-encoder that cannot be loaded (no network access to download it,
+    missing weights) falls back to BM25 so questions are still answered.
+    """
+    key: Tuple[str, str] = (config.provider, config.model)
+    with _rerankers_lock:
+        if key not in _rerankers:
+            if config.provider == "cross-encoder":
+                try:
+                    _rerankers[key] = CrossEncoderReranker(
+                        model_name=config.model,
+                        batch_size=config.batch_size,
+                        max_length=config.max_length,
+                        cache_size=config.cache_size,
+                    )
+                except (ImportError, OSError, ValueError) as e:
+                    logger.warning(msg=f"Cannot load {config.model} ({e}), reranking with BM25")
+                    _rerankers[key] = BM25Reranker(cache_size=config.cache_size)
+            elif config.provider == "bm25":
+                _rerankers[key] = BM25Reranker(cache_size=config.cache_size)
+            else:
+                raise ValueError(f"Unknown reranker: {config.provider}")
+        return _rerankers[key]
+
+
+def get_rerankers() -> List[Reranker]:
+    """Return every reranker created in this process."""
+    return list(_rerankers.values())
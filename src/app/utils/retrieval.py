@@ -0,0 +1,764 @@
+# -*- coding: utf-8 -*-
+# """
+# retrieval.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from lancedb.table import LanceTable, Table
+from utils.indexing import TEXT_COLUMN, VECTOR_COLUMN, get_index
+
+logger: logging.Logger = logging.getLogger(name="app.logs")
+
+# Columns of every search result, the metadata fields flattened out of the struct.
+# The vector is never read: at 3072 dimensions it is 12 KB per row
+RESULT_SCHEMA = pa.schema(
+    [
+        pa.field("text", pa.string()),
+        pa.field("chunk_id", pa.string()),
+        pa.field("filename", pa.string()),
+        pa.field("page_numbers", pa.list_(pa.int64())),
+        pa.field("title", pa.string()),
+        pa.field("source_url", pa.string()),
+    ]
+)
+METADATA_FIELDS: Tuple[str, ...] = ("filename", "page_numbers", "title", "source_url")
+DISTANCE_COLUMN = "_distance"
+FTS_SCORE_COLUMN = "_score"
+SCORE_COLUMN = "_relevance_score"
+
+# Column naming the table of each result of a search across several tables
+TABLE_COLUMN = "table"
+
+# Pages listed in a page-range filter on tables without page_start/page_end
+MAX_PAGE_SPAN = 1000
+
+
+@dataclass
+class RetrievalConfig:
+    """Query-time retrieval settings (``VECTOR_DB.SEARCH``)."""
+
+    mode: str = "hybrid"  # "vector", "fts" or "hybrid"
+    fusion: str = "rrf"  # "rrf" or "weighted"
+    rrf_k: int = 60
+    vector_weight: float = 0.5
+    fts_weight: float = 0.5
+    candidates: int = 20
+    metric: str = "L2"
+    nprobes: Optional[int] = None
+    refine_factor: Optional[int] = None
+    federated_workers: int = 8
+
+    @classmethod
+    def from_configs(cls, cfgs: Dict[str, Any]) -> "RetrievalConfig":
+        """Build the settings from the application configuration."""
+        search_cfgs: Dict[str, Any] = cfgs["VECTOR_DB"]["SEARCH"]
+        return cls(
+            mode=search_cfgs["MODE"],
+            fusion=search_cfgs["FUSION"],
+            rrf_k=search_cfgs["RRF_K"],
+            vector_weight=search_cfgs["VECTOR_WEIGHT"],
+            fts_weight=search_cfgs["FTS_WEIGHT"],
+            candidates=search_cfgs["CANDIDATES"],
+            metric=cfgs["VECTOR_DB"]["INDEX"]["METRIC"],
+            nprobes=search_cfgs["NPROBES"],
+            refine_factor=search_cfgs["REFINE_FACTOR"],
+            federated_workers=search_cfgs["FEDERATED_WORKERS"],
+        )
+
+
+@dataclass(slots=True)
+class SearchResult:
+    """A retrieved chunk with its score and provenance, used for prompts and display."""
+
+    text: str
+    score: float
+    filename: Optional[str] = None
+    pages: Tuple[int, ...] = ()
+    title: Optional[str] = None
+    source_url: Optional[str] = None
+    table: Optional[str] = None
+    chunk_id: Optional[str] = None
+
+    @property
+    def source(self) -> str:
+        """Citation of the chunk: its URL or file name, then its pages."""
+        parts: List[str] = [self.source_url or self.filename or "Unknown source"]
+        if self.pages:
+            parts.append("p. " + ", ".join(str(page) for page in self.pages))
+        return " - ".join(parts)
+
+    def to_prompt(self) -> str:
+        """The chunk as written into the prompt, followed by its source."""
+        prompt: str = f"{self.text}\nSource: {self.source}"
+        if self.title:
+            prompt += f"\nTitle: {self.title}"
+        if self.table:
+            prompt += f"\nTable: {self.table}"
+        return prompt
+
+
+def _scores(results: pa.Table) -> List[float]:
+    # Higher is better: fused relevance, BM25 score or similarity from the distance
+    if SCORE_COLUMN in results.column_names:
+        return results.column(SCORE_COLUMN).to_pylist()
+    if FTS_SCORE_COLUMN in results.column_names:
+        return results.column(FTS_SCORE_COLUMN).to_pylist()
+    if DISTANCE_COLUMN in results.column_names:
+        distances: Any = results.column(DISTANCE_COLUMN).cast(pa.float64())
+        return pc.divide(1.0, pc.add(distances, 1.0)).to_pylist()  # type: ignore
+    return [0.0] * results.num_rows
+
+
+def to_search_results(results: pa.Table) -> List[SearchResult]:
+    """Convert search results, best first, to ``SearchResult`` objects column by column."""
+    num_rows: int = results.num_rows
+    tables: List[Optional[str]] = (
+        results.column(TABLE_COLUMN).to_pylist()
+        if TABLE_COLUMN in results.column_names
+        else [None] * num_rows
+    )
+    return [
+        SearchResult(
+            text=text,
+            score=score,
+            filename=filename,
+            pages=tuple(pages or ()),
+            title=title,
+            source_url=source_url,
+            table=table,
+            chunk_id=chunk_id,
+        )
+        for text, chunk_id, filename, pages, title, source_url, score, table in zip(
+            *(results.column(name).to_pylist() for name in RESULT_SCHEMA.names),
+            _scores(results=results),
+            tables,
+        )
+    ]
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _projection(table: Table) -> List[str]:
+    # Columns read by a search; the metadata struct is small and flattened in Arrow
+    names: List[str] = table.schema.names
+    return [name for name in ("text", "chunk_id", "metadata") if name in names]
+
+
+def _result_schema(score_column: str, with_table: bool = False) -> pa.Schema:
+    schema: pa.Schema = RESULT_SCHEMA.append(pa.field(score_column, pa.float32()))
+    return schema.append(pa.field(TABLE_COLUMN, pa.string())) if with_table else schema
+
+
+def _conform(results: pa.Table, score_column: str) -> pa.Table:
+    # Same flat columns and types whatever the table, so results of several tables
+    # concatenate; tables created before chunk ids or page metadata get nulls
+    columns: Dict[str, Any] = {name: results.column(name) for name in results.column_names}
+    if "metadata" in columns:
+        metadata: Any = columns.pop("metadata")
+        for name in METADATA_FIELDS:
+            if metadata.type.get_field_index(name) >= 0:
+                columns[name] = pc.struct_field(metadata, name)  # type: ignore
+    schema: pa.Schema = _result_schema(score_column=score_column)
+    return pa.Table.from_arrays(
+        [
+            columns[field.name].cast(field.type)
+            if field.name in columns
+            else pa.nulls(results.num_rows, type=field.type)
+            for field in schema
+        ],
+        schema=schema,
+    )
+
+
+def _keys(results: pa.Table) -> List[str]:
+    # Chunk id, or the text for tables created before chunk ids
+    return pc.coalesce(results.column("chunk_id"), results.column("text")).to_pylist()  # type: ignore
+
+
+def _gather(
+    ranked_lists: Sequence[pa.Table], entries: List[List[Any]], score_column: str
+) -> pa.Table:
+    # Rows picked by (list, row) from several result sets, with their new score
+    payload_columns: List[str] = [
+        name for name in ranked_lists[0].column_names if not name.startswith("_")
+    ]
+    payloads: List[pa.Table] = [results.select(payload_columns) for results in ranked_lists]
+    offsets: List[int] = [0]
+    for payload in payloads[:-1]:
+        offsets.append(offsets[-1] + payload.num_rows)
+    indices: List[int] = [offsets[list_index] + row for _, list_index, row in entries]
+    return (
+        pa.concat_tables(payloads)
+        .take(pa.array(indices, type=pa.int64()))
+        .append_column(
+            pa.field(score_column, pa.float32()),
+            pa.array([score for score, _, _ in entries], type=pa.float32()),
+        )
+    )
+
+
+def has_metadata_field(table: Table, name: str) -> bool:
+    """Whether the ``metadata`` struct of a table has the field ``name``."""
+    names: List[str] = table.schema.names
+    return "metadata" in names and table.schema.field("metadata").type.get_field_index(name) >= 0
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+@dataclass
+class MetadataFilter:
+    """Restrictions on the chunks a search may return.
+
+    The filter becomes a SQL predicate applied by LanceDB before the vector and
+    full-text searches, so the requested number of results is always filled
+    from matching chunks. It uses the top-level filter columns and their
+    scalar indexes when the table has them, and the ``metadata`` struct
+    otherwise.
+    """
+
+    filenames: List[str] = field(default_factory=list)
+    titles: List[str] = field(default_factory=list)
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    url_prefix: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return bool(
+            self.filenames
+            or self.titles
+            or self.page_from is not None
+            or self.page_to is not None
+            or self.url_prefix
+        )
+
+    def to_where(self, table: Table) -> Optional[str]:
+        """
+        Build the predicate for ``table``.
+
+        Args:
+            table: LanceDB table the filter is applied to
+
+        Returns:
+            Optional[str]: SQL predicate, None if nothing is filtered
+        """
+        names: List[str] = table.schema.names
+
+        def column(name: str) -> str:
+            return name if name in names else f"metadata.{name}"
+
+        clauses: List[str] = []
+        if self.filenames:
+            values: str = ", ".join(_quote(value=name) for name in self.filenames)
+            clauses.append(f"{column(name='filename')} IN ({values})")
+        if self.titles:
+            values = ", ".join(_quote(value=title) for title in self.titles)
+            clauses.append(f"{column(name='title')} IN ({values})")
+        if self.url_prefix:
+            clauses.append(
+                f"starts_with({column(name='source_url')}, {_quote(value=self.url_prefix)})"
+            )
+        if self.page_from is not None or self.page_to is not None:
+            clauses.extend(self._page_clauses(names=names))
+        return " AND ".join(f"({clause})" for clause in clauses) or None
+
+    def _page_clauses(self, names: List[str]) -> List[str]:
+        # Chunks overlapping the range: each chunk spans page_start..page_end
+        if "page_start" in names:
+            clauses: List[str] = []
+            if self.page_to is not None:
+                clauses.append(f"page_start <= {int(self.page_to)}")
+            if self.page_from is not None:
+                clauses.append(f"page_end >= {int(self.page_from)}")
+            return clauses
+        # Older tables only have the page list, matched against the listed pages
+        first: int = int(self.page_from) if self.page_from is not None else 1
+        last: int = int(self.page_to) if self.page_to is not None else first + MAX_PAGE_SPAN
+        pages: str = ", ".join(str(page) for page in range(first, last + 1))
+        return [f"array_has_any(metadata.page_numbers, [{pages}])"]
+
+
+def get_filter_values(table: Table, name: str) -> List[str]:
+    """
+    Distinct values of a filter field, e.g. the file names to offer in a filter.
+
+    Args:
+        table: LanceDB table
+        name: Field name, read from the top-level filter column when it exists
+
+    Returns:
+        List[str]: Sorted distinct non-null values
+    """
+    dataset: Any = cast(LanceTable, table).to_lance()
+    if name in table.schema.names:
+        values: Any = dataset.to_table(columns=[name]).column(name)
+    elif has_metadata_field(table=table, name=name):
+        metadata: Any = dataset.to_table(columns=["metadata"]).column("metadata")
+        values = pc.struct_field(metadata, name)  # type: ignore
+    else:
+        return []
+    return sorted(value for value in values.unique().to_pylist() if value is not None)
+
+
+def embed_query(table: Table, query: str) -> List[float]:
+    """Embed a query with the embedding function stored in the table metadata."""
+    function: Any = table.embedding_functions[VECTOR_COLUMN].function
+    return list(function.compute_query_embeddings(query)[0])
+
+
+def embed_queries(table: Table, queries: Sequence[str]) -> List[List[float]]:
+    """Embed several queries in one call of the table's embedding function."""
+    function: Any = table.embedding_functions[VECTOR_COLUMN].function
+    return [list(vector) for vector in function.compute_query_embeddings(list(queries))]
+
+
+def vector_search(
+    table: Table,
+    vector: List[float],
+    limit: int,
+    config: RetrievalConfig,
+    where: Optional[str] = None,
+) -> pa.Table:
+    """
+    Nearest neighbours of a query vector.
+
+    Args:
+        table: LanceDB table
+        vector: Query vector
+        limit: Number of results
+        config: Retrieval settings (metric, ``nprobes``, ``refine_factor``)
+        where: SQL filter applied before the search
+
+    Returns:
+        pa.Table: Rows with the ``RESULT_SCHEMA`` columns ordered by ascending ``_distance``
+    """
+    search: Any = table.search(vector, vector_column_name=VECTOR_COLUMN)
+    search = search.metric(config.metric).select(_projection(table=table)).limit(limit)
+    if config.nprobes:
+        search = search.nprobes(config.nprobes)
+    if config.refine_factor:
+        search = search.refine_factor(config.refine_factor)
+    if where:
+        search = search.where(where, prefilter=True)
+    return _conform(results=search.to_arrow(), score_column=DISTANCE_COLUMN)
+
+
+def fts_search(table: Table, query: str, limit: int, where: Optional[str] = None) -> pa.Table:
+    """
+    BM25 search over the full-text index of the text column.
+
+    Args:
+        table: LanceDB table with a full-text index
+        query: Search query
+        limit: Number of results
+        where: SQL filter applied before the search
+
+    Returns:
+        pa.Table: Rows with the ``RESULT_SCHEMA`` columns ordered by descending ``_score``
+    """
+    search: Any = table.search(query, query_type="fts", fts_columns=TEXT_COLUMN)
+    search = search.select(_projection(table=table)).limit(limit)
+    if where:
+        search = search.where(where, prefilter=True)
+    return _conform(results=search.to_arrow(), score_column=FTS_SCORE_COLUMN)
+
+
+def reciprocal_rank_fusion(ranked_lists: List[Tuple[pa.Table, float]], k: int = 60) -> pa.Table:
+    """
+    Fuse ranked lists with weighted reciprocal rank fusion.
+
+    Each row scores ``sum(weight / (k + rank))`` over the lists it appears in, so
+    only ranks matter and BM25 and vector scores need no calibration.
+
+    Args:
+        ranked_lists: (results, weight) pairs, results best first
+        k: Rank offset damping the influence of the top ranks
+
+    Returns:
+        pa.Table: Distinct rows, best first, with a ``_relevance_score``
+    """
+    # key -> [score, list, row] of the first occurrence of the chunk
+    fused: Dict[str, List[Any]] = {}
+    for list_index, (results, weight) in enumerate(ranked_lists):
+        for rank, key in enumerate(_keys(results=results), start=1):
+            entry: Optional[List[Any]] = fused.get(key)
+            if entry is None:
+                entry = fused[key] = [0.0, list_index, rank - 1]
+            entry[0] += weight / (k + rank)
+    return _gather(
+        ranked_lists=[results for results, _ in ranked_lists],
+        entries=sorted(fused.values(), key=lambda entry: entry[0], reverse=True),
+        score_column=SCORE_COLUMN,
+    )
+
+
+def _normalize(scores: List[float], higher_is_better: bool) -> List[float]:
+    if not scores:
+        return []
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [1.0] * len(scores)
+    normalized: List[float] = [(score - low) / (high - low) for score in scores]
+    return normalized if higher_is_better else [1.0 - score for score in normalized]
+
+
+def weighted_fusion(
+    vector_results: pa.Table,
+    fts_results: pa.Table,
+    vector_weight: float,
+    fts_weight: float,
+) -> pa.Table:
+    """
+    Fuse vector and BM25 results with a weighted sum of min-max normalized scores.
+
+    Args:
+        vector_results: Vector results with ``_distance``
+        fts_results: Full-text results with ``_score``
+        vector_weight: Weight of the vector similarity
+        fts_weight: Weight of the BM25 score
+
+    Returns:
+        pa.Table: Distinct rows, best first, with a ``_relevance_score``
+    """
+    fused: Dict[str, List[Any]] = {}
+    for list_index, (results, scores, weight) in enumerate(
+        (
+            (
+                vector_results,
+                _normalize(
+                    scores=vector_results.column(DISTANCE_COLUMN).to_pylist(),
+                    higher_is_better=False,
+                ),
+                vector_weight,
+            ),
+            (
+                fts_results,
+                _normalize(
+                    scores=fts_results.column(FTS_SCORE_COLUMN).to_pylist(),
+                    higher_is_better=True,
+                ),
+                fts_weight,
+            ),
+        )
+    ):
+        for row, (key, score) in enumerate(zip(_keys(results=results), scores)):
+            entry: Optional[List[Any]] = fused.get(key)
+            if entry is None:
+                entry = fused[key] = [0.0, list_index, row]
+            entry[0] += weight * score
+    return _gather(
+        ranked_lists=[vector_results, fts_results],
+        entries=sorted(fused.values(), key=lambda entry: entry[0], reverse=True),
+        score_column=SCORE_COLUMN,
+    )
+
+
+def _search_mode(table: Table, config: RetrievalConfig) -> str:
+    if config.mode != "vector" and get_index(table=table, column=TEXT_COLUMN) is None:
+        logger.warning(msg=f"{table.name} has no full-text index, using vector search")
+        return "vector"
+    return config.mode
+
+
+def _retrieve(
+    table: Table,
+    query: str,
+    mode: str,
+    limit: int,
+    config: RetrievalConfig,
+    where: Optional[str],
+    vector: Optional[List[float]],
+    timings: Dict[str, float],
+) -> Tuple[pa.Table, pa.Table]:
+    # Candidates of each retriever, best first, recording the duration of each stage
+    candidates: int = max(config.candidates, limit) if mode == "hybrid" else limit
+    vector_results: pa.Table = _result_schema(score_column=DISTANCE_COLUMN).empty_table()
+    fts_results: pa.Table = _result_schema(score_column=FTS_SCORE_COLUMN).empty_table()
+
+    if mode in ("vector", "hybrid"):
+        start: float = time.perf_counter()
+        if vector is None:
+            vector = embed_query(table=table, query=query)
+            timings["embed_ms"] = _elapsed_ms(start=start)
+
+        start = time.perf_counter()
+        vector_results = vector_search(
+            table=table, vector=vector, limit=candidates, config=config, where=where
+        )
+        timings["vector_ms"] = _elapsed_ms(start=start)
+
+    if mode in ("fts", "hybrid"):
+        start = time.perf_counter()
+        fts_results = fts_search(table=table, query=query, limit=candidates, where=where)
+        timings["fts_ms"] = _elapsed_ms(start=start)
+    return vector_results, fts_results
+
+
+def _fuse(
+    mode: str, vector_results: pa.Table, fts_results: pa.Table, config: RetrievalConfig
+) -> pa.Table:
+    if mode == "vector":
+        return vector_results
+    if mode == "fts":
+        return fts_results
+    if config.fusion == "weighted":
+        return weighted_fusion(
+            vector_results=vector_results,
+            fts_results=fts_results,
+            vector_weight=config.vector_weight,
+            fts_weight=config.fts_weight,
+        )
+    return reciprocal_rank_fusion(
+        ranked_lists=[(vector_results, config.vector_weight), (fts_results, config.fts_weight)],
+        k=config.rrf_k,
+    )
+
+
+def hybrid_search(
+    table: Table,
+    query: str,
+    limit: int,
+    config: Optional[RetrievalConfig] = None,
+    where: Optional[str] = None,
+    vector: Optional[List[float]] = None,
+) -> Tuple[pa.Table, Dict[str, float]]:
+    """
+    Retrieve chunks with vector search, BM25 full-text search or both fused.
+
+    In hybrid mode each retriever returns ``max(candidates, limit)`` rows which
+    are fused with reciprocal rank fusion or weighted scores and cut to
+    ``limit``. Tables without a full-text index fall back to vector search.
+    Results stay in Arrow and only the ``RESULT_SCHEMA`` columns are read.
+
+    Args:
+        table: LanceDB table
+        query: Search query
+        limit: Number of results
+        config: Retrieval settings, the defaults if omitted
+        where: SQL filter applied before both searches, e.g. ``MetadataFilter.to_where``
+        vector: Query embedding computed by the caller, embedded here if omitted
+
+    Returns:
+        Tuple[pa.Table, Dict[str, float]]: Results best first with their score
+        column, and the duration in ms of each stage (embed, vector, fts,
+        fusion, total)
+    """
+    config = config or RetrievalConfig()
+    mode: str = _search_mode(table=table, config=config)
+    timings: Dict[str, float] = {}
+    total_start: float = time.perf_counter()
+    vector_results, fts_results = _retrieve(
+        table=table,
+        query=query,
+        mode=mode,
+        limit=limit,
+        config=config,
+        where=where,
+        vector=vector,
+        timings=timings,
+    )
+
+    start: float = time.perf_counter()
+    results: pa.Table = _fuse(
+        mode=mode, vector_results=vector_results, fts_results=fts_results, config=config
+    ).slice(offset=0, length=limit)
+    timings["fusion_ms"] = _elapsed_ms(start=start)
+    timings["total_ms"] = _elapsed_ms(start=total_start)
+
+    logger.info(
+        msg=f"{mode} search on {table.name}: {results.num_rows} results "
+        f"({vector_results.num_rows} vector, {fts_results.num_rows} fts candidates) {timings}"
+    )
+    return results, timings
+
+
+_search_pools: Dict[int, ThreadPoolExecutor] = {}
+_search_pools_lock = threading.Lock()
+
+
+def _get_search_pool(max_workers: int) -> ThreadPoolExecutor:
+    # Threads are reused across queries; LanceDB releases the GIL while searching
+    with _search_pools_lock:
+        if max_workers not in _search_pools:
+            _search_pools[max_workers] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="federated-search"
+            )
+        return _search_pools[max_workers]
+
+
+def embedder_key(table: Table) -> str:
+    """Identity of a table's embedding function; tables sharing it share query vectors."""
+    function: Any = table.embedding_functions[VECTOR_COLUMN].function
+    settings: str = json.dumps(function.safe_model_dump(), sort_keys=True, default=str)
+    return f"{type(function).__name__}:{settings}"
+
+
+def _with_table(results: pa.Table, table: Table) -> pa.Table:
+    return results.append_column(
+        pa.field(TABLE_COLUMN, pa.string()),
+        pa.repeat(pa.scalar(table.name, type=pa.string()), results.num_rows),
+    )
+
+
+def _min_max(results: pa.Table, score_column: str, descending: bool) -> pa.Table:
+    # Scores of one table rescaled to [0, 1] in the same direction, the best at 1 (or 0)
+    normalized: List[float] = _normalize(
+        scores=results.column(score_column).to_pylist(), higher_is_better=descending
+    )
+    scores: List[float] = normalized if descending else [1.0 - score for score in normalized]
+    index: int = results.schema.get_field_index(score_column)
+    score_field: pa.Field = results.schema.field(index)
+    return results.set_column(index, score_field, pa.array(scores, type=score_field.type))
+
+
+def _merge(parts: List[pa.Table], score_column: str, descending: bool) -> pa.Table:
+    # Results of several tables ranked together, each chunk kept once at its best rank
+    if not parts:
+        return _result_schema(score_column=score_column, with_table=True).empty_table()
+    merged: pa.Table = pa.concat_tables(parts).sort_by(
+        [(score_column, "descending" if descending else "ascending")]
+    )
+    first: Dict[str, int] = {}
+    for row, key in enumerate(_keys(results=merged)):
+        first.setdefault(key, row)
+    return merged.take(pa.array(list(first.values()), type=pa.int64()))
+
+
+def federated_search(
+    tables: Sequence[Table],
+    query: str,
+    limit: int,
+    config: Optional[RetrievalConfig] = None,
+    filters: Optional[MetadataFilter] = None,
+    vector: Optional[List[float]] = None,
+) -> Tuple[pa.Table, Dict[str, float]]:
+    """
+    Search several tables concurrently and merge their results.
+
+    The query is embedded once per distinct embedding function, normally once
+    for all tables, then the retrievers of every table run on a shared thread
+    pool so the latency stays close to that of the slowest table. The vector
+    candidates of all tables are ranked together by distance and the BM25
+    candidates by score, and the two global lists are fused as in
+    ``hybrid_search``, so tables are ranked against each other instead of
+    being interleaved. BM25 scores, and the distances of tables embedded by
+    different functions, are min-max normalized per table first, as their raw
+    values are not comparable. A table whose search fails is logged and left out.
+
+    Args:
+        tables: LanceDB tables to search
+        query: Search query
+        limit: Number of results
+        config: Retrieval settings, the defaults if omitted
+        filters: Restrictions compiled into a predicate for each table
+        vector: Query embedding computed by the caller for tables sharing one
+            embedding function, embedded here if omitted
+
+    Returns:
+        Tuple[pa.Table, Dict[str, float]]: Distinct results best first with
+        the ``table`` they come from, and the duration in ms of each stage
+        (embed, search, fusion, total) and of the search of each table
+    """
+    config = config or RetrievalConfig()
+    pool: ThreadPoolExecutor = _get_search_pool(max_workers=config.federated_workers)
+    timings: Dict[str, float] = {}
+    total_start: float = time.perf_counter()
+
+    keys: List[Optional[str]] = [None] * len(tables)
+    vectors: Dict[str, List[float]] = {}
+    if vector is not None:
+        keys = ["query"] * len(tables)
+        vectors = {"query": vector}
+    elif config.mode != "fts":
+        start: float = time.perf_counter()
+        embedders: Dict[str, Table] = {}
+        for index, table in enumerate(tables):
+            key: str = embedder_key(table=table)
+            embedders.setdefault(key, table)
+            keys[index] = key
+        embeddings: Dict[str, Future] = {
+            key: pool.submit(embed_query, table=table, query=query)
+            for key, table in embedders.items()
+        }
+        vectors = {key: future.result() for key, future in embeddings.items()}
+        timings["embed_ms"] = _elapsed_ms(start=start)
+
+    def search(table: Table, key: Optional[str]) -> Tuple[str, pa.Table, pa.Table, float]:
+        start: float = time.perf_counter()
+        mode: str = _search_mode(table=table, config=config)
+        vector_results, fts_results = _retrieve(
+            table=table,
+            query=query,
+            mode=mode,
+            limit=limit,
+            config=config,
+            where=filters.to_where(table=table) if filters else None,
+            vector=vectors.get(key) if key else None,
+            timings={},
+        )
+        return (
+            mode,
+            _with_table(results=vector_results, table=table),
+            _with_table(results=fts_results, table=table),
+            _elapsed_ms(start=start),
+        )
+
+    start = time.perf_counter()
+    searches: List[Future] = [
+        pool.submit(search, table=table, key=key) for table, key in zip(tables, keys)
+    ]
+    modes: List[str] = []
+    vector_parts: List[pa.Table] = []
+    fts_parts: List[pa.Table] = []
+    for table, future in zip(tables, searches):
+        try:
+            table_mode, vector_results, fts_results, elapsed = future.result()
+        except Exception as e:
+            logger.warning(msg=f"Federated search skipped {table.name}: {e}")
+            continue
+        modes.append(table_mode)
+        vector_parts.append(vector_results)
+        fts_parts.append(fts_results)
+        timings[f"{table.name}_ms"] = elapsed
+    timings["search_ms"] = _elapsed_ms(start=start)
+
+    start = time.perf_counter()
+    # Tables falling back to vector search make a full-text query a hybrid one
+    mode: str = config.mode if set(modes) <= {config.mode} else "hybrid"
+    # BM25 statistics are per table, and distances only compare within one embedding space
+    if len(set(keys)) > 1:
+        vector_parts = [
+            _min_max(results=part, score_column=DISTANCE_COLUMN, descending=False)
+            for part in vector_parts
+        ]
+    fts_parts = [
+        _min_max(results=part, score_column=FTS_SCORE_COLUMN, descending=True) for part in fts_parts
+    ]
+    vector_results = _merge(parts=vector_parts, score_column=DISTANCE_COLUMN, descending=False)
+    fts_results = _merge(parts=fts_parts, score_column=FTS_SCORE_COLUMN, descending=True)
+    results: pa.Table = _fuse(
+        mode=mode, vector_results=vector_results, fts_results=fts_results, config=config
+    ).slice(offset=0, length=limit)
+    timings["fusion_ms"] = _elapsed_ms(start=start)
+    timings["total_ms"] = _elapsed_ms(start=total_start)
+
+    logger.info(
+        msg=f"Federated {mode} search on {len(tables)} tables: {results.num_rows} results "
+        f"({vector_results.num_rows} vector, {fts_results.num_rows} fts candidates) {timings}"
+    )
+    return results, timings
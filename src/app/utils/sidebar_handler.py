@@ -6,21 +6,31 @@
 # """
 
 import os
-import tempfile
-from typing import Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import ParseResult, urlparse
 
 import lancedb
 import requests
 import streamlit as st
-from docling_core.types.doc.document import DoclingDocument
 from lancedb.table import Table
 from streamlit.runtime.uploaded_file_manager import UploadedFile
-from utils.st_utils import clean_table_name, init_db, load_chat_history
+from utils.answer_cache import get_answer_caches
+from utils.async_chat import get_first_token_stats
+from utils.converters import get_converter_registry
+from utils.embedding_cache import get_embedding_caches
+from utils.ingest_jobs import (
+    IngestJob,
+    IngestJobConfig,
+    IngestJobQueue,
+    JobKind,
+    get_ingest_job_queue,
+    save_upload,
+)
+from utils.query_batcher import get_query_coalescers
+from utils.reranking import get_rerankers
+from utils.st_utils import clean_table_name, init_db
 
 from configs import cfgs
-from src.app.embedding import create_embeddings
-from src.app.extraction import extract_from_sitemap, extract_html, extract_pdf
 
 
 def handle_existing_database() -> Optional[Table]:
@@ -47,6 +57,16 @@ def handle_existing_database() -> Optional[Table]:
     if selected_table:
         table: Table = init_db(db_uri=cfgs["VECTOR_DB"]["URI"], table_name=selected_table)
         st.sidebar.success(body=f"Connected to table: {selected_table}")
+
+        # Further tables are searched concurrently with the selected one
+        also_search: List[str] = st.sidebar.multiselect(
+            label="Also search",
+            options=[name for name in available_tables if name != selected_table],
+            help="Answer from several document tables at once",
+        )
+        st.session_state.extra_tables = [
+            init_db(db_uri=cfgs["VECTOR_DB"]["URI"], table_name=name) for name in also_search
+        ]
         return table
     return None
 
@@ -57,32 +77,21 @@ def handle_pdf_upload() -> Optional[Table]:
     if not uploaded_file:
         return None
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        tmp_path: str = tmp_file.name
-
     if not st.sidebar.button(label="Process PDF"):
         return None
 
-    with st.spinner(text="Processing PDF..."):
-        markdown_content, _ = extract_pdf(pdf_path=tmp_path)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".md") as md_file:
-            md_file.write(markdown_content.encode())
-            md_path: str = md_file.name
-
-        table_name: str = f"pdf_{clean_table_name(name=uploaded_file.name)}"
-        table: Table = create_embeddings(
-            source_path=md_path,
-            max_tokens=cfgs["LLM"]["MAX_TOKENS"],
-            db_path=cfgs["VECTOR_DB"]["URI"],
-            table_name=table_name,
-            llm_provider=cfgs["LLM"]["PROVIDER"],
-            embed_model=cfgs["EMBEDDINGS"]["MODEL"],
-            mode="overwrite",
-        )
-        load_chat_history(file_name=table.name)
-        st.sidebar.success(body=f"PDF processed successfully! Table name: {table_name}")
-        return table
+    # The file is kept where the job can read it, even after a restart
+    config: IngestJobConfig = IngestJobConfig.from_configs(cfgs=cfgs)
+    pdf_path: str = save_upload(
+        config=config, filename=uploaded_file.name, data=uploaded_file.getvalue()
+    )
+    submit_ingest_job(
+        kind="documents",
+        table_name=f"pdf_{clean_table_name(name=uploaded_file.name)}",
+        sources=[pdf_path],
+        options={"converter": "pdf", "delete_sources": True},
+    )
+    return None
 
 
 def handle_url_input() -> Optional[Table]:
@@ -116,35 +125,22 @@ def handle_url_input() -> Optional[Table]:
         )
         return None
 
-    with st.spinner(text="Processing URL..."):
-        domain: str = parsed_url.netloc
-        if domain.startswith("www."):
-            domain = domain[4:]
-
-        for tld in cfgs["COMMON_TLDS"]:
-            if domain.endswith(tld):
-                domain = domain[: -len(tld)]
-                break
-
-        table_name: str = f"url_{clean_table_name(name=domain)}"
-        markdown_content: str = extract_html(html_path=url)
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".md") as tmp_file:
-            tmp_file.write(markdown_content.encode())
-            tmp_path: str = tmp_file.name
-
-        table: Table = create_embeddings(
-            source_path=tmp_path,
-            max_tokens=cfgs["LLM"]["MAX_TOKENS"],
-            db_path=cfgs["VECTOR_DB"]["URI"],
-            table_name=table_name,
-            llm_provider=cfgs["LLM"]["PROVIDER"],
-            embed_model=cfgs["EMBEDDINGS"]["MODEL"],
-            mode="overwrite",
-        )
-        load_chat_history(file_name=table.name)
-        st.sidebar.success(body=f"URL processed successfully! Table name: {table_name}")
-        return table
+    domain: str = parsed_url.netloc
+    if domain.startswith("www."):
+        domain = domain[4:]
+
+    for tld in cfgs["COMMON_TLDS"]:
+        if domain.endswith(tld):
+            domain = domain[: -len(tld)]
+            break
+
+    submit_ingest_job(
+        kind="documents",
+        table_name=f"url_{clean_table_name(name=domain)}",
+        sources=[url],
+        options={"converter": "html"},
+    )
+    return None
 
 
 def handle_website_extraction() -> Optional[Table]:
@@ -180,38 +176,169 @@ def handle_website_extraction() -> Optional[Table]:
         st.sidebar.error(body=f"Could not reach {sitemap_url}. Please check the website URL.")
         return None
 
-    with st.spinner(text="Processing Website..."):
-        domain: str = parsed_url.netloc
-        if domain.startswith("www."):
-            domain: str = domain[4:]
+    domain: str = parsed_url.netloc
+    if domain.startswith("www."):
+        domain: str = domain[4:]
+
+    for tld in cfgs["COMMON_TLDS"]:
+        if domain.endswith(tld):
+            domain = domain[: -len(tld)]
+            break
+
+    # With INGESTION.POOL.ENABLED pages are converted in parallel worker processes,
+    # otherwise fetched concurrently and, in upsert mode, only if changed since the last run
+    submit_ingest_job(
+        kind="website",
+        table_name=f"site_{clean_table_name(name=domain)}",
+        sources=[base_url],
+        options={"sitemap_filename": sitemap_filename},
+    )
+    return None
 
-        for tld in cfgs["COMMON_TLDS"]:
-            if domain.endswith(tld):
-                domain = domain[: -len(tld)]
-                break
 
-        table_name: str = f"site_{clean_table_name(name=domain)}"
-        docs: List[DoclingDocument] = extract_from_sitemap(
-            base_url=base_url, sitemap_filename=sitemap_filename
-        )
-        combined_content: str = "\n\n".join([doc.export_to_markdown() for doc in docs])
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".md") as tmp_file:
-            tmp_file.write(combined_content.encode())
-            tmp_path: str = tmp_file.name
-
-        table: Table = create_embeddings(
-            source_path=tmp_path,
-            max_tokens=cfgs["LLM"]["MAX_TOKENS"],
-            db_path=cfgs["VECTOR_DB"]["URI"],
-            table_name=table_name,
-            llm_provider=cfgs["LLM"]["PROVIDER"],
-            embed_model=cfgs["EMBEDDINGS"]["MODEL"],
-            mode="overwrite",
-        )
-        load_chat_history(file_name=table.name)
-        st.sidebar.success(body=f"Website processed successfully! Table name: {table_name}")
-        return table
+def submit_ingest_job(
+    kind: JobKind, table_name: str, sources: List[str], options: Dict[str, Any]
+) -> IngestJob:
+    """
+    Queue an ingestion in the background; its table opens once the job is done.
+
+    Args:
+        kind: "documents" or "website"
+        table_name: Table to ingest into
+        sources: Document paths or URLs, or the base URL of the website
+        options: Per-job settings, see ``IngestJobQueue.submit``
+
+    Returns:
+        IngestJob: The queued job
+    """
+    queue: IngestJobQueue = get_ingest_job_queue(config=IngestJobConfig.from_configs(cfgs=cfgs))
+    job: IngestJob = queue.submit(
+        kind=kind,
+        table=table_name,
+        sources=sources,
+        mode=cfgs["VECTOR_DB"]["MODE"],
+        options=options,
+    )
+    st.session_state.ingest_job_id = job.id
+    st.sidebar.info(body=f"Ingestion into {table_name} queued, you can keep chatting meanwhile.")
+    return job
+
+
+def open_finished_job() -> Optional[Table]:
+    """Open the table of this session's latest job once it is done."""
+    job_id: Optional[str] = st.session_state.get("ingest_job_id")
+    if not job_id:
+        return None
+    queue: IngestJobQueue = get_ingest_job_queue(config=IngestJobConfig.from_configs(cfgs=cfgs))
+    job: Optional[IngestJob] = queue.get(job_id=job_id)
+    if job is not None and not job.finished:
+        return None
+
+    del st.session_state.ingest_job_id
+    if job is None:
+        return None
+    if job.status != "done":
+        st.sidebar.error(body=f"Ingestion into {job.table} {job.status}: {job.error or ''}")
+        return None
+    if job.error:
+        st.sidebar.warning(body=job.error)
+    st.sidebar.success(body=f"Documents processed successfully! Table name: {job.table}")
+    table: Table = init_db(db_uri=cfgs["VECTOR_DB"]["URI"], table_name=job.table)
+    # The cached handle may predate the job, which wrote through its own connection
+    table.checkout_latest()
+    return table
+
+
+@st.fragment(run_every=cfgs["INGESTION"]["JOBS"]["POLL_SECONDS"])
+def _ingest_job_list() -> None:
+    queue: IngestJobQueue = get_ingest_job_queue(config=IngestJobConfig.from_configs(cfgs=cfgs))
+    jobs: List[IngestJob] = queue.list(limit=10)
+    if not jobs:
+        return
+
+    with st.expander(label="Ingestion jobs", expanded=not all(job.finished for job in jobs)):
+        for job in jobs:
+            pages: str = f"{job.pages_done}/{job.pages_total or '?'}"
+            st.progress(
+                value=job.progress,
+                text=f"{job.table} · {job.status} · {pages} pages · {job.chunks} chunks "
+                f"({job.chunks_written} stored) · {job.tokens} tokens",
+            )
+            if job.error:
+                st.caption(body=job.error)
+            if job.status == "queued" and st.button(label="Cancel", key=f"cancel-{job.id}"):
+                queue.cancel(job_id=job.id)
+
+    # Rerun the whole script so that the table of this session's job is opened
+    job_id: Optional[str] = st.session_state.get("ingest_job_id")
+    if any(job.id == job_id and job.finished for job in jobs):
+        st.rerun()
+
+
+def display_ingest_jobs() -> None:
+    """List the latest ingestion jobs with their progress, refreshed in the background."""
+    with st.sidebar:
+        _ingest_job_list()
+
+
+def display_converter_stats() -> None:
+    """Show load-time and reuse metrics of the shared document converters."""
+    stats: List[Dict[str, Any]] = get_converter_registry().stats()
+    if not stats:
+        return
+
+    with st.sidebar.expander(label="Converter stats"):
+        st.dataframe(data=stats, hide_index=True)
+
+
+def display_embedding_cache_stats() -> None:
+    """Show hit/miss counters of the on-disk embedding caches."""
+    stats: List[Dict[str, Any]] = [cache.stats() for cache in get_embedding_caches()]
+    if not stats:
+        return
+
+    with st.sidebar.expander(label="Embedding cache stats"):
+        st.dataframe(data=stats, hide_index=True)
+
+
+def display_answer_cache_stats() -> None:
+    """Show hit/miss counters of the semantic answer caches."""
+    stats: List[Dict[str, Any]] = [cache.stats() for cache in get_answer_caches()]
+    if not stats:
+        return
+
+    with st.sidebar.expander(label="Answer cache stats"):
+        st.dataframe(data=stats, hide_index=True)
+
+
+def display_reranker_stats() -> None:
+    """Show latency and score cache counters of the rerankers."""
+    stats: List[Dict[str, Any]] = [reranker.stats() for reranker in get_rerankers()]
+    if not stats:
+        return
+
+    with st.sidebar.expander(label="Reranker stats"):
+        st.dataframe(data=stats, hide_index=True)
+
+
+def display_query_batching_stats() -> None:
+    """Show batch sizes and latency percentiles of the query embedding coalescers."""
+    stats: List[Dict[str, Any]] = [coalescer.stats() for coalescer in get_query_coalescers()]
+    if not stats:
+        return
+
+    with st.sidebar.expander(label="Query embedding batching"):
+        st.dataframe(data=stats, hide_index=True)
+
+
+def display_first_token_stats() -> None:
+    """Show the time to first token of the answers, per chat path."""
+    stats: List[Dict[str, Any]] = get_first_token_stats().stats()
+    if not stats:
+        return
+
+    with st.sidebar.expander(label="Time to first token"):
+        st.dataframe(data=stats, hide_index=True)
 
 
 def handle_sidebar() -> Optional[Table]:
@@ -225,6 +352,8 @@ def handle_sidebar() -> Optional[Table]:
         st.session_state.table_name = None
     if "table" not in st.session_state:
         st.session_state.table = None  # Persist table reference
+    # Only set by "Use Existing Database", for the current run
+    st.session_state.extra_tables = []
 
     input_type: str = st.sidebar.selectbox(
         label="Select Input Type",
@@ -247,10 +376,21 @@ def handle_sidebar() -> Optional[Table]:
         table = handle_url_input()
     elif input_type == "Extract Website":
         table = handle_website_extraction()
+    table = table or open_finished_job()
 
     # Save table in session state only if it's valid
     if table and table.name:
         st.session_state.table = table
         st.session_state.table_name = table.name
 
+    display_ingest_jobs()
+
+    if cfgs["UI"]["SHOW_STATS"]:
+        display_converter_stats()
+        display_embedding_cache_stats()
+        display_answer_cache_stats()
+        display_reranker_stats()
+        display_query_batching_stats()
+        display_first_token_stats()
+
     return st.session_state.table  # Ensure table reference is returned
@@ -5,16 +5,28 @@
 # @ Author: Mazhar
 # """
 
+import asyncio
 import xml.etree.ElementTree as ET
-from typing import List, Literal
-from urllib.parse import urljoin
+from typing import List
 
-import requests
+import httpx
+from utils.crawler import SitemapEntry, get_crawler, sitemap_location
+
+from configs import cfgs
+
+
+async def _discover(sitemap_url: str) -> List[SitemapEntry]:
+    async with get_crawler(crawler_cfgs=cfgs["CRAWLER"]) as crawler:
+        return await crawler.discover(sitemap_url=sitemap_url)
 
 
 def get_sitemap_urls(base_url: str, sitemap_filename: str = "sitemap.xml") -> List[str]:
     """Fetches and parses a sitemap XML file to extract URLs.
 
+    Sitemap indexes are followed recursively and gzipped sitemaps are
+    decompressed (see ``SitemapCrawler.discover``). Must not be called from a
+    running event loop; use the crawler directly there.
+
     Args:
         base_url: The base URL of the website
         sitemap_filename: The filename of the sitemap (default: sitemap.xml)
@@ -27,41 +39,17 @@ def get_sitemap_urls(base_url: str, sitemap_filename: str = "sitemap.xml") -> Li
         ValueError: If there's an error fetching (except 404) or parsing the sitemap
     """
     try:
-        sitemap_url: str = urljoin(base=base_url, url=sitemap_filename)
-
-        # Check if sitemap exists first
-        head_response: requests.Response = requests.head(
-            url=sitemap_url, timeout=10, allow_redirects=True
+        entries: List[SitemapEntry] = asyncio.run(
+            _discover(
+                sitemap_url=sitemap_location(base_url=base_url, sitemap_filename=sitemap_filename)
+            )
         )
+        return [entry.url for entry in entries]
 
+    except httpx.HTTPStatusError:
         # Return just the base URL if sitemap doesn't exist
-        if head_response.status_code != 200:
-            return [base_url.rstrip("/")]
-
-        # Fetch sitemap content only if it exists
-        response: requests.Response = requests.get(url=sitemap_url, timeout=10)
-        response.raise_for_status()
-
-        # Parse XML content
-        root: ET.Element = ET.fromstring(text=response.content)
-
-        # Handle different XML namespaces that sitemaps might use
-        namespaces: dict[str, str] | Literal[""] = (
-            {"ns": root.tag.split(sep="}")[0].strip("{")} if "}" in root.tag else ""
-        )
-
-        # Extract URLs using namespace if present
-        if namespaces:
-            urls: List[str | None] = [
-                elem.text for elem in root.findall(path=".//ns:loc", namespaces=namespaces)
-            ]
-        else:
-            urls = [elem.text for elem in root.findall(path=".//loc")]
-
-        # Filter out None values and return only valid URLs
-        return [url for url in urls if url is not None]
-
-    except requests.RequestException as e:
+        return [base_url.rstrip("/")]
+    except httpx.HTTPError as e:
         raise ValueError(f"Failed to fetch sitemap: {str(object=e)}")
     except ET.ParseError as e:
         raise ValueError(f"Failed to parse sitemap XML: {str(object=e)}")
@@ -5,16 +5,30 @@
 # @ Author: Mazhar
 # ""
 
-import json
 import os
-from typing import Any, Dict, List
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
 
 import lancedb
-import numpy as np
 import streamlit as st
 from lancedb.table import Table
 from openai import OpenAI, Stream
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
+from utils.chat_history import ChatHistoryStore, get_chat_history_store
+from utils.context_window import ConversationWindow
+from utils.embedding_cache import CachedEmbeddings  # registers the "cached" embedding function
+from utils.query_batcher import QueryBatchConfig, can_share_query_vector, embed_query_batched
+from utils.reranking import RerankConfig, get_reranker
+from utils.retrieval import (
+    MetadataFilter,
+    RetrievalConfig,
+    SearchResult,
+    federated_search,
+    hybrid_search,
+    to_search_results,
+)
+
+from configs import cfgs
 
 
 # Initialize LanceDB connection
@@ -36,42 +50,126 @@ def init_db(db_uri: str, table_name: str) -> Table:
     return db.open_table(name=table_name)
 
 
-def get_context(query: str, table, num_results: int = 3) -> str:
+def get_context(
+    query: str,
+    table,
+    num_results: int = 3,
+    retrieval: Optional[RetrievalConfig] = None,
+    filters: Optional[MetadataFilter] = None,
+    tables: Optional[Sequence[Table]] = None,
+    rerank: Optional[RerankConfig] = None,
+    vector: Optional[List[float]] = None,
+    batching: Optional[QueryBatchConfig] = None,
+) -> List[SearchResult]:
     """Search the database for relevant context.
 
+    With reranking enabled, ``rerank.candidates`` results are retrieved and the
+    ``num_results`` most relevant to the query according to the reranker kept.
+
     Args:
         query: User's question
         table: LanceDB table object
         num_results: Number of results to return
+        retrieval: Retrieval mode, fusion and ANN settings
+        filters: Restrictions on filename, title, pages or URL, applied before the search
+        tables: Other tables searched together with ``table``, each result then
+            naming its table
+        rerank: Reranking settings, no reranking if omitted
+        vector: Query embedding computed by the caller, embedded here if omitted
+        batching: Query embedding coalescing, shared with the concurrent sessions
+            of the process; each search embeds its own query if omitted
 
     Returns:
-        str: Concatenated context from relevant chunks with source information
+        List[SearchResult]: Relevant chunks, best first, with their source information
     """
-    results: Any = table.search(query).limit(num_results).to_pandas()
-    contexts: list[str] = []
+    limit: int = (
+        max(num_results, rerank.candidates)
+        if rerank is not None and rerank.enabled
+        else num_results
+    )
+    if (
+        vector is None
+        and batching is not None
+        and batching.enabled
+        and can_share_query_vector(tables=[table, *(tables or [])], retrieval=retrieval)
+    ):
+        vector = embed_query_batched(table=table, query=query, config=batching)
+    if tables:
+        results, _ = federated_search(
+            tables=[table, *tables],
+            query=query,
+            limit=limit,
+            config=retrieval,
+            filters=filters,
+            vector=vector,
+        )
+    else:
+        where: Optional[str] = filters.to_where(table=table) if filters else None
+        results, _ = hybrid_search(
+            table=table, query=query, limit=limit, config=retrieval, where=where, vector=vector
+        )
+    candidates: List[SearchResult] = to_search_results(results=results)
+    if rerank is None or not rerank.enabled:
+        return candidates
+    reranked, _ = get_reranker(config=rerank).rerank(
+        query=query, results=candidates, top_n=num_results
+    )
+    return reranked
+
+
+SYSTEM_PROMPT: str = """You are a helpful assistant that answers questions based on the provided context.
+    Use only the information from the context to answer questions. If you're unsure or the context
+    doesn't contain the relevant information, say so.
+    
+    Context:
+    """
+
+
+def stream_chat_response(
+    client,
+    model_name: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    context: Sequence[SearchResult],
+    window: Optional[ConversationWindow] = None,
+) -> Iterator[str]:
+    """Stream the model's answer, one text delta at a time.
 
-    for _, row in results.iterrows():
-        # Extract metadata
-        filename: Any = row["metadata"]["filename"]
-        page_numbers: Any = row["metadata"]["page_numbers"]
-        title: Any = row["metadata"]["title"]
+    Args:
+        messages: Chat history ending with the question
+        context: Retrieved chunks, best first
+        window: Token budget for the context and history, the defaults if omitted
 
-        # Build source citation
-        source_parts: List[Any] = []
-        if filename:
-            source_parts.append(filename)
-        # Check if page_numbers exists and is not empty
-        if isinstance(page_numbers, (list, np.ndarray)) and len(page_numbers) > 0:
-            page_str = ", ".join(str(p) for p in page_numbers)
-            source_parts.append(f"p. {page_str}")
+    Yields:
+        str: Text deltas of the answer
+    """
+    window = window or ConversationWindow()
+    messages_with_context, _ = window.assemble(
+        system_prompt=SYSTEM_PROMPT,
+        context=[result.to_prompt() for result in context],
+        messages=messages,
+    )
 
-        source: str = f"\nSource: {' - '.join(source_parts)}"
-        if title:
-            source += f"\nTitle: {title}"
+    stream: Stream[ChatCompletionChunk] = client.chat.completions.create(
+        model=model_name,
+        messages=messages_with_context,
+        temperature=temperature,
+        stream=True,
+    )
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # Stops the download when the consumer gives up early
+        stream.close()
 
-        contexts.append(f"{row['text']}{source}")
 
-    return "\n\n".join(contexts)
+def _notify_first(deltas: Iterator[str], callback: Callable[[], Any]) -> Iterator[str]:
+    for i, delta in enumerate(deltas):
+        if i == 0:
+            callback()
+        yield delta
 
 
 def get_chat_response(
@@ -79,94 +177,94 @@ def get_chat_response(
     model_name: str,
     messages: List[Dict[str, str]],
     temperature: float,
-    context: str,
+    context: Sequence[SearchResult],
+    window: Optional[ConversationWindow] = None,
+    on_first_token: Optional[Callable[[], Any]] = None,
 ) -> str:
     """Get streaming response from OpenAI API.
 
     Args:
         messages: Chat history
-        context: Retrieved context from database
+        context: Retrieved chunks, best first
+        window: Token budget for the context and history, the defaults if omitted
+        on_first_token: Called when the first text delta arrives
 
     Returns:
         str: Model's response
     """
-    system_prompt: str = f"""You are a helpful assistant that answers questions based on the provided context.
-    Use only the information from the context to answer questions. If you're unsure or the context
-    doesn't contain the relevant information, say so.
-    
-    Context:
-    {context}
-    """
-
-    messages_with_context: List[Any] = [
-        {"role": "system", "content": system_prompt},
-        *messages,
-    ]
-
-    # Create the streaming response
-    stream: Stream[ChatCompletionChunk] = client.chat.completions.create(
-        model=model_name,
-        messages=messages_with_context,
+    deltas: Iterator[str] = stream_chat_response(
+        client=client,
+        model_name=model_name,
+        messages=messages,
         temperature=temperature,
-        stream=True,
+        context=context,
+        window=window,
     )
+    if on_first_token is not None:
+        deltas = _notify_first(deltas=deltas, callback=on_first_token)
 
     # Use Streamlit's built-in streaming capability
-    response: str = "".join(st.write_stream(stream=stream))
+    response: str = "".join(st.write_stream(stream=deltas))
     return response
 
 
+def get_session_id() -> str:
+    """Identifier of the browser session, kept in the URL so it survives reloads.
+
+    Returns:
+        str: Session identifier
+    """
+    if "session" not in st.query_params:
+        st.query_params["session"] = uuid.uuid4().hex
+    return st.query_params["session"]
+
+
+def get_history_store() -> ChatHistoryStore:
+    """Return the chat history store configured in ``CHAT_HISTORY``."""
+    return get_chat_history_store(
+        path=os.path.join(os.path.dirname(p=__file__), "../../../", cfgs["CHAT_HISTORY"]["PATH"])
+    )
+
+
 # Load chat history
-def load_chat_history(file_name: str = "") -> List[Dict[str, str]]:
-    """Load chat history for specific table.
+def load_chat_history(
+    table_name: str,
+    session_id: str,
+    limit: Optional[int] = None,
+    before_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Load the most recent messages of a session's chat about a table.
 
     Args:
         table_name: Name of the table to load history for
+        session_id: Browser session identifier
+        limit: Maximum number of messages, all of them if omitted
+        before_id: Only load messages older than this id (paging backwards)
 
     Returns:
-        List[Dict[str, str]]: Chat history for the table
+        List[Dict[str, Any]]: Messages oldest first, each with ``id``, ``role`` and ``content``
     """
-    # Create chat histories directory if it doesn't exist
-    history_dir: str = os.path.join(os.path.dirname(p=__file__), "../../../", "chat_histories")
-    os.makedirs(name=history_dir, exist_ok=True)
-
-    # Create table-specific history file path
-    history_file: str = os.path.join(
-        history_dir, f"{clean_table_name(name=file_name)}_history.json"
+    return get_history_store().load(
+        table_name=clean_table_name(name=table_name),
+        session_id=session_id,
+        limit=limit,
+        before_id=before_id,
     )
 
-    if not os.path.exists(path=history_file):
-        # Create an empty file if it doesn't exist
-        open(history_file, "w").close()  # 'w' mode creates the file if it's missing
-
-    try:
-        with open(file=history_file, mode="r") as f:
-            return json.load(fp=f)
-    except json.JSONDecodeError:
-        # Handle case where the file is empty or contains invalid JSON
-        return []  # Return empty list
-
 
 # Save chat history
-def save_chat_history(file_name: str = "", messages: List[Dict[str, str]] = []) -> None:
-    """Save chat history for specific table.
+def append_chat_message(table_name: str, session_id: str, message: Dict[str, Any]) -> None:
+    """Append one message to a session's chat about a table.
 
     Args:
-        file_name: Name of the file to save history for
-        messages: Chat messages to save
+        table_name: Name of the table the chat is about
+        session_id: Browser session identifier
+        message: Message with ``role`` and ``content``; its stored ``id`` is added
     """
-    # Create chat histories directory if it doesn't exist
-    history_dir: str = os.path.join(os.path.dirname(p=__file__), "../../../", "chat_histories")
-    os.makedirs(name=history_dir, exist_ok=True)
-
-    # Create table-specific history file path
-    history_file: str = os.path.join(
-        history_dir, f"{clean_table_name(name=file_name)}_history.json"
+    message["id"] = get_history_store().append(
+        table_name=clean_table_name(name=table_name), session_id=session_id, message=message
     )
 
-    with open(file=history_file, mode="w") as f:
-        json.dump(obj=messages, fp=f)
-
 
 def clean_table_name(name: str) -> str:
     """Clean and format table name.
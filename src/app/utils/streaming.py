@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# """
+# streaming.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import asyncio
+import queue
+import threading
+from typing import Any, AsyncIterator, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, error: BaseException) -> None:
+        self.error: BaseException = error
+
+
+def staged(iterable: Iterable[T], maxsize: int = 256, name: str = "stage") -> Iterator[T]:
+    """Run ``iterable`` in a background thread behind a bounded queue.
+
+    The producer blocks once ``maxsize`` items are waiting, so memory stays flat
+    however large the input is. Exceptions raised by the producer are re-raised
+    in the consumer, and closing the consumer stops the producer.
+
+    Args:
+        iterable: Upstream stage
+        maxsize: Number of items buffered between the two stages
+        name: Thread name, useful in stack dumps
+
+    Returns:
+        Iterator[T]: Items of ``iterable`` in order
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item=item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put(item=item):
+                    return
+        except BaseException as e:
+            put(item=_StageError(error=e))
+            return
+        put(item=_DONE)
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item: Any = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group items into lists of at most ``size`` items."""
+    batch: List[T] = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iterate_async(agen: AsyncIterator[T]) -> Iterator[T]:
+    """Drive an async iterator from synchronous code on a private event loop.
+
+    The loop only runs while the next item is awaited, so wrapping the result in
+    ``staged`` keeps concurrent tasks of ``agen`` progressing in the background
+    until the buffer is full.
+
+    Args:
+        agen: Async iterator, e.g. an async generator
+
+    Returns:
+        Iterator[T]: Items of ``agen`` in order
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        aclose: Any = getattr(agen, "aclose", None)
+        if aclose is not None:
+            loop.run_until_complete(aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def iterate_on_loop(agen: AsyncIterator[T], loop: asyncio.AbstractEventLoop) -> Iterator[T]:
+    """Drive an async iterator on an event loop running in another thread.
+
+    Unlike ``iterate_async`` the loop outlives the iteration, so what is bound
+    to it, such as pooled HTTP connections, is reused by the next iterations.
+
+    Args:
+        agen: Async iterator, e.g. an async generator
+        loop: Running event loop
+
+    Returns:
+        Iterator[T]: Items of ``agen`` in order
+    """
+
+    async def next_item() -> T:
+        return await agen.__anext__()
+
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(coro=next_item(), loop=loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        aclose: Any = getattr(agen, "aclose", None)
+        if aclose is not None:
+            asyncio.run_coroutine_threadsafe(coro=aclose(), loop=loop).result()
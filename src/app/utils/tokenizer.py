@@ -1,12 +1,61 @@
-from typing import Dict, List, Tuple, Optional, Self
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple, Optional, Self, Sequence, Union
 
 from tiktoken import Encoding, get_encoding
-from transformers.tokenization_utils_base import PreTrainedTokenizerBase
+from transformers.tokenization_utils_base import (
+    EncodedInput,
+    PreTokenizedInput,
+    PreTrainedTokenizerBase,
+    TextInput,
+)
+
+# Token counts memoized per (encoding, text digest); keying by digest keeps the
+# cache at a few MB however long the counted texts are
+TOKEN_COUNT_CACHE_SIZE = 65_536
+
+_counts: OrderedDict[Tuple[str, bytes], int] = OrderedDict()
+_counts_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(name: str) -> Encoding:
+    return get_encoding(encoding_name=name)
+
+
+def _count_tokens(encoding_name: str, text: str) -> int:
+    key: Tuple[str, bytes] = (
+        encoding_name,
+        hashlib.blake2b(text.encode(encoding="utf-8"), digest_size=16).digest(),
+    )
+    with _counts_lock:
+        count: Optional[int] = _counts.get(key)
+        if count is not None:
+            _counts.move_to_end(key)
+            return count
+    count = len(_get_encoding(name=encoding_name).encode_ordinary(text=text))
+    with _counts_lock:
+        _counts[key] = count
+        if len(_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _counts.popitem(last=False)
+    return count
+
+
+@lru_cache(maxsize=None)
+def _vocab(vocab_size: int) -> Dict[str, int]:
+    return {str(object=i): i for i in range(vocab_size)}
 
 
 # Create a wrapper class to make OpenAI's tokenizer compatible with the HybridChunker interface
 class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
-    """Minimal wrapper for OpenAI's tokenizer."""
+    """Minimal wrapper for OpenAI's tokenizer.
+
+    Besides the HuggingFace interface, it exposes a fast path working on integer
+    ids: ``encode``, the memoized ``count_tokens`` and the multi-threaded
+    ``count_tokens_batch``.
+    """
 
     def __init__(self, model_name: str = "cl100k_base", max_length: int = 8191, **kwargs) -> None:
         """Initialize the tokenizer.
@@ -16,14 +65,38 @@ class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
             max_length: Maximum sequence length
         """
         super().__init__(model_max_length=max_length, **kwargs)
-        self.tokenizer: Encoding = get_encoding(encoding_name=model_name)
+        self.model_name: str = model_name
+        self.tokenizer: Encoding = _get_encoding(name=model_name)
         self._vocab_size: int = self.tokenizer.max_token_value
 
     def tokenize(
         self, text: str, pair: Optional[str] = None, add_special_tokens: bool = True, **kwargs
     ) -> List[str]:
         """Main method used by HybridChunker."""
-        return [str(object=t) for t in self.tokenizer.encode(text=text)]
+        return list(map(str, self.tokenizer.encode_ordinary(text=text)))
+
+    def encode(
+        self, text: Union[TextInput, PreTokenizedInput, EncodedInput], *args: Any, **kwargs: Any
+    ) -> List[int]:
+        """Token ids of ``text``, used by semchunk to split oversized chunks.
+
+        Only plain text is supported; the pair, padding and truncation options
+        of the HuggingFace interface do not apply to tiktoken and are ignored.
+        """
+        if not isinstance(text, str):
+            raise TypeError(f"Expected a string to encode, got {type(text).__name__}")
+        return self.tokenizer.encode_ordinary(text=text)
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens of ``text``, memoized in an LRU cache."""
+        return _count_tokens(encoding_name=self.model_name, text=text)
+
+    def count_tokens_batch(self, texts: Sequence[str], num_threads: int = 8) -> List[int]:
+        """Number of tokens of each text, encoded in parallel by tiktoken's thread pool."""
+        batch: List[List[int]] = self.tokenizer.encode_ordinary_batch(
+            text=list(texts), num_threads=num_threads
+        )
+        return [len(ids) for ids in batch]
 
     def _tokenize(self, text: str) -> List[str]:
         return self.tokenize(text=text)
@@ -35,7 +108,11 @@ class OpenAITokenizerWrapper(PreTrainedTokenizerBase):
         return str(object=index)
 
     def get_vocab(self) -> Dict[str, int]:
-        return {str(object=k): v for k, v in enumerate(iterable=range(self.vocab_size))}
+        return _vocab(vocab_size=self.vocab_size)
+
+    def token_byte_values(self) -> List[bytes]:
+        """Byte values of the vocabulary, used by semchunk to bound token lengths."""
+        return self.tokenizer.token_byte_values()
 
     @property
     def vocab_size(self) -> int:
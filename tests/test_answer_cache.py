@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# """
+# test_answer_cache.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+from pathlib import Path
+
+import lancedb
+import pyarrow as pa
+from utils.answer_cache import answer_key
+
+
+def test_answer_key_follows_writes_from_other_connections(tmp_path: Path) -> None:
+    writer = lancedb.connect(uri=str(tmp_path)).create_table(
+        name="docs", data=pa.table({"text": ["first"]})
+    )
+    # Like the handle the app keeps in st.cache_resource
+    cached = lancedb.connect(uri=str(tmp_path)).open_table(name="docs")
+    before = answer_key(table=cached, model="gpt-4o-mini", temperature=0.0, bucket_size=0.1)
+
+    writer.add(data=pa.table({"text": ["second"]}))
+    after = answer_key(table=cached, model="gpt-4o-mini", temperature=0.0, bucket_size=0.1)
+
+    assert after.version == writer.version
+    assert after != before
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# """
+# test_batch_embedder.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import threading
+from typing import Iterator, List
+
+import numpy as np
+import pytest
+from openai import OpenAI
+from utils.batch_embedder import BatchEmbedder, parse_duration
+from utils.openai_stub import fake_embedding, serve
+
+MODEL = "text-embedding-3-small"
+RETRY_AFTER_MS = 150
+
+
+@pytest.fixture
+def stub_url() -> Iterator[str]:
+    # Every third embeddings request is answered with a 429 and retry-after-ms
+    server = serve(port=0, latency_ms=1, rate_limit_every=3, retry_after_ms=RETRY_AFTER_MS)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def make_embedder(base_url: str) -> BatchEmbedder:
+    return BatchEmbedder(
+        model=MODEL,
+        ndims=1536,
+        max_batch_items=4,
+        max_in_flight=2,
+        client=OpenAI(base_url=base_url, api_key="stub", max_retries=0),
+    )
+
+
+def test_parse_duration() -> None:
+    assert parse_duration(value="6m0s") == 360.0
+    assert parse_duration(value="20ms") == pytest.approx(0.02)
+    assert parse_duration(value="1.5") == 1.5
+    assert parse_duration(value="soon") is None
+
+
+def test_backs_off_on_rate_limits_and_keeps_order(stub_url: str) -> None:
+    embedder: BatchEmbedder = make_embedder(base_url=stub_url)
+    texts: List[str] = [f"chunk number {i}" for i in range(22)]
+
+    vectors: List[List[float]] = embedder.embed(texts=texts)
+
+    assert len(vectors) == len(texts)
+    for text, vector in zip(texts, vectors):
+        np.testing.assert_allclose(vector, fake_embedding(text=text, dims=1536), atol=1e-6)
+
+    stats = embedder.stats
+    assert stats.requests == 6  # 22 texts in batches of 4
+    assert stats.rate_limited >= 2
+    assert stats.retries == stats.rate_limited
+    # Workers wait for the advertised retry-after instead of retrying at once
+    assert stats.wait_seconds >= RETRY_AFTER_MS / 1000 * 0.9
+
+
+def test_counts_tokens_once_per_text(stub_url: str) -> None:
+    embedder: BatchEmbedder = make_embedder(base_url=stub_url)
+    texts: List[str] = ["alpha beta", "gamma", "alpha beta", "delta epsilon zeta"]
+    expected: int = sum(embedder.count_tokens(text=text) for text in dict.fromkeys(texts))
+
+    counted: List[int] = []
+    count_batch = embedder.tokenizer.count_tokens_batch
+
+    def spy(texts: List[str], num_threads: int = 8) -> List[int]:
+        counts: List[int] = count_batch(texts=texts, num_threads=num_threads)
+        counted.extend(counts)
+        return counts
+
+    embedder.tokenizer.count_tokens_batch = spy  # type: ignore[method-assign]
+    embedder.tokenizer.count_tokens = None  # type: ignore[assignment]  # must not be called
+    embedder.embed(texts=texts)
+
+    assert len(counted) == len(texts)
+    assert embedder.stats.tokens == expected
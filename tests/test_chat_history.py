@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# """
+# test_chat_history.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import json
+from pathlib import Path
+from typing import Dict, List
+
+from utils.chat_history import ChatHistoryStore
+
+LEGACY: List[Dict[str, str]] = [
+    {"role": "user", "content": "What is LanceDB?"},
+    {"role": "assistant", "content": "An embedded vector database."},
+]
+
+
+def test_append_returns_increasing_ids(tmp_path: Path) -> None:
+    store = ChatHistoryStore(path=str(tmp_path / "chat_history.sqlite"))
+    first: int = store.append(table_name="docs", session_id="s1", message=LEGACY[0])
+    second: int = store.append(table_name="docs", session_id="s1", message=LEGACY[1])
+
+    assert second > first
+    assert [message["id"] for message in store.load(table_name="docs", session_id="s1")] == [
+        first,
+        second,
+    ]
+
+
+def test_imports_legacy_json_history_once(tmp_path: Path) -> None:
+    (tmp_path / "docs_history.json").write_text(json.dumps(LEGACY), encoding="utf-8")
+    # The JSON history created empty files for tables without messages
+    (tmp_path / "empty_history.json").write_text("", encoding="utf-8")
+    path: str = str(tmp_path / "chat_history.sqlite")
+
+    store = ChatHistoryStore(path=path)
+    loaded = store.load(table_name="docs", session_id="first")
+    assert [(m["role"], m["content"]) for m in loaded] == [
+        (m["role"], m["content"]) for m in LEGACY
+    ]
+    assert store.load(table_name="docs", session_id="second") == []
+    assert store.load(table_name="empty", session_id="first") == []
+
+    # Another process (or a restart) does not import the file again
+    restarted = ChatHistoryStore(path=path)
+    assert restarted.load(table_name="docs", session_id="third") == []
+    assert restarted.count(table_name="docs", session_id="first") == len(LEGACY)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# """
+# test_checkpoint.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+from pathlib import Path
+
+import pytest
+from utils.checkpoint import (
+    CheckpointManifest,
+    CheckpointTracker,
+    SourceCheckpoint,
+    upsert_scope,
+)
+
+
+@pytest.fixture
+def manifest(tmp_path: Path) -> CheckpointManifest:
+    manifest = CheckpointManifest(path=str(tmp_path / "checkpoints.sqlite"), table_name="docs")
+    for source, status, chunk_ids in [
+        ("a.pdf", "done", ["a1", "a2", "shared"]),
+        ("b.pdf", "done", ["b1", "shared"]),
+        ("c.pdf", "done", ["c1"]),
+        ("d.pdf", "failed", []),
+    ]:
+        manifest.record(
+            checkpoint=SourceCheckpoint(source=source, hash="", status=status, chunk_ids=chunk_ids)
+        )
+    return manifest
+
+
+def test_upsert_scope_keeps_sources_outside_the_run(manifest: CheckpointManifest) -> None:
+    keep_ids, stale_scope = upsert_scope(manifest=manifest, todo=["a.pdf", "new.pdf"])
+
+    # c.pdf is not part of the run but its chunks must survive it
+    assert keep_ids == {"b1", "shared", "c1"}
+    # Only a.pdf's own chunks can go stale, not the one it shares with b.pdf
+    assert stale_scope == {"a1", "a2"}
+
+
+def test_tracker_forgets_sources_whose_chunks_were_deleted(
+    manifest: CheckpointManifest,
+) -> None:
+    tracker = CheckpointTracker(manifest=manifest, hashes={"a.pdf": "h"})
+    tracker.document(source="a.pdf", chunk_ids=["a3"], tokens=5)
+    tracker.committed(chunk_ids=["a3"])
+    tracker.deleted(chunk_ids=["a1", "c1"])
+
+    checkpoints = manifest.load()
+    assert checkpoints["a.pdf"].chunk_ids == ["a3"]
+    assert "c.pdf" not in checkpoints
+    assert set(checkpoints) == {"a.pdf", "b.pdf", "d.pdf"}
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# """
+# test_chunking.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+from collections import Counter
+from typing import List
+
+import pytest
+from docling_core.types.doc.document import DoclingDocument
+from docling_core.types.doc.labels import DocItemLabel
+from utils import tokenizer
+from utils.tokenizer import OpenAITokenizerWrapper
+
+from src.app.chunking import initialize_chunker
+
+PARAGRAPH = "LanceDB keeps vectors and scalar columns in the same versioned dataset."
+
+
+def test_chunker_encodes_each_span_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    document = DoclingDocument(name="repeated")
+    for section in range(3):
+        document.add_heading(text=f"Section {section}")
+        for _ in range(8):
+            document.add_text(label=DocItemLabel.PARAGRAPH, text=PARAGRAPH)
+
+    encoding = OpenAITokenizerWrapper().tokenizer
+    encoded: List[str] = []
+    encode_ordinary = encoding.encode_ordinary
+
+    def spy(text: str) -> List[int]:
+        encoded.append(text)
+        return encode_ordinary(text=text)
+
+    monkeypatch.setattr(encoding, "encode_ordinary", spy)
+    monkeypatch.setattr(tokenizer, "_counts", type(tokenizer._counts)())
+
+    chunks = list(initialize_chunker(max_tokens=64).chunk(dl_doc=document))
+
+    assert chunks
+    # Merging peers counts the same paragraph and windows many times, but the
+    # token counts come from the cache after the first encoding
+    assert encoded.count(PARAGRAPH) == 1
+    assert max(Counter(encoded).values()) == 1
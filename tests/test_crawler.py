@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# """
+# test_crawler.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import asyncio
+import gzip
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import pytest
+from utils.crawler import CrawlState, FetchedPage, SitemapCrawler, SitemapEntry
+
+URLSET = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</urlset>'
+URL = "<url><loc>{base}{path}</loc>{lastmod}</url>"
+
+
+class Site:
+    """A small website: a sitemap index, a gzipped and a plain child sitemap."""
+
+    def __init__(self) -> None:
+        self.base: str = ""
+        self.lastmods: Dict[str, str] = {"/a.html": "2026-01-01", "/b.html": "2026-01-01"}
+        self.etag: str = '"c-v1"'
+        self.requests: Counter = Counter()
+        self.conditional: Dict[str, str] = {}
+        # Raw <loc> values added to more.xml
+        self.extra_locs: List[str] = []
+
+    def urlset(self, paths: List[str]) -> bytes:
+        urls: str = "".join(
+            URL.format(
+                base=self.base,
+                path=path,
+                lastmod=f"<lastmod>{self.lastmods[path]}</lastmod>"
+                if path in self.lastmods
+                else "",
+            )
+            for path in paths
+        )
+        return URLSET.format(urls).encode()
+
+    def respond(self, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        self.requests[path] += 1
+        if path == "/sitemap.xml":
+            index: str = (
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f"<sitemap><loc>{self.base}/pages.xml.gz</loc></sitemap>"
+                f"<sitemap><loc>{self.base}/more.xml</loc></sitemap>"
+                "</sitemapindex>"
+            )
+            return 200, {"Content-Type": "application/xml"}, index.encode()
+        if path == "/pages.xml.gz":
+            body: bytes = gzip.compress(data=self.urlset(paths=["/a.html", "/b.html"]))
+            return 200, {"Content-Type": "application/gzip"}, body
+        if path == "/more.xml":
+            body = self.urlset(paths=["/c.html"])
+            for loc in self.extra_locs:
+                body = body.replace(b"</urlset>", f"<url><loc>{loc}</loc></url></urlset>".encode())
+            return 200, {"Content-Type": "application/xml"}, body
+        if path == "/c.html":
+            # No lastmod in the sitemap: only the ETag tells it did not change
+            if "If-None-Match" in headers:
+                self.conditional[path] = headers["If-None-Match"]
+                if headers["If-None-Match"] == self.etag:
+                    return 304, {"ETag": self.etag}, b""
+            page: bytes = f"<html><body>c {self.etag}</body></html>".encode()
+            return 200, {"Content-Type": "text/html", "ETag": self.etag}, page
+        if path in self.lastmods:
+            page = f"<html><body>{path} {self.lastmods[path]}</body></html>".encode()
+            return 200, {"Content-Type": "text/html"}, page
+        return 404, {}, b""
+
+
+@pytest.fixture
+def site() -> Iterator[Site]:
+    site = Site()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            status, headers, body = site.respond(path=self.path, headers=dict(self.headers))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    site.base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield site
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(site: Site, state: CrawlState) -> Tuple[List[SitemapEntry], Dict[str, FetchedPage]]:
+    async def run() -> Tuple[List[SitemapEntry], Dict[str, FetchedPage]]:
+        async with SitemapCrawler(max_connections=4, per_host=2, state=state) as crawler:
+            entries: List[SitemapEntry] = await crawler.discover(
+                sitemap_url=f"{site.base}/sitemap.xml"
+            )
+            pages: Dict[str, FetchedPage] = {}
+            async for page in crawler.crawl(entries=entries):
+                pages[page.url.removeprefix(site.base)] = page
+            return entries, pages
+
+    return asyncio.run(run())
+
+
+def test_discovers_pages_through_index_and_gzipped_sitemap(site: Site, tmp_path: Path) -> None:
+    state = CrawlState(path=str(tmp_path / "crawl.sqlite"), scope="docs")
+    entries, pages = crawl(site=site, state=state)
+
+    assert [entry.url.removeprefix(site.base) for entry in entries] == [
+        "/a.html",
+        "/b.html",
+        "/c.html",
+    ]
+    assert entries[0].lastmod is not None and entries[2].lastmod is None
+    assert {path: page.status for path, page in pages.items()} == dict.fromkeys(
+        ["/a.html", "/b.html", "/c.html"], "fetched"
+    )
+    assert pages["/c.html"].etag == site.etag
+
+
+def test_recrawl_skips_unchanged_pages(site: Site, tmp_path: Path) -> None:
+    state = CrawlState(path=str(tmp_path / "crawl.sqlite"), scope="docs")
+    _, pages = crawl(site=site, state=state)
+    for page in pages.values():
+        state.record(page=page)
+    site.requests.clear()
+    site.lastmods["/b.html"] = "2026-02-01"
+
+    _, pages = crawl(site=site, state=state)
+
+    # lastmod did not advance: a.html is not requested at all
+    assert pages["/a.html"].status == "not_modified"
+    assert site.requests["/a.html"] == 0
+    # lastmod advanced: b.html is fetched again
+    assert pages["/b.html"].status == "fetched"
+    assert site.requests["/b.html"] == 1
+    # No lastmod: c.html is requested conditionally and the server answers 304
+    assert pages["/c.html"].status == "not_modified"
+    assert site.requests["/c.html"] == 1
+    assert site.conditional["/c.html"] == site.etag
+
+
+def test_malformed_loc_fails_only_its_page(site: Site, tmp_path: Path) -> None:
+    site.extra_locs = ["http://127.0.0.1:80a/bad.html"]
+    state = CrawlState(path=str(tmp_path / "crawl.sqlite"), scope="docs")
+
+    _, pages = crawl(site=site, state=state)
+
+    bad: FetchedPage = pages["http://127.0.0.1:80a/bad.html"]
+    assert bad.status == "failed" and bad.error is not None and "InvalidURL" in bad.error
+    paths: List[str] = ["/a.html", "/b.html", "/c.html"]
+    assert {path: pages[path].status for path in paths} == dict.fromkeys(paths, "fetched")
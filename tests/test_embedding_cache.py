@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# """
+# test_embedding_cache.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import sqlite3
+from pathlib import Path
+from typing import List
+
+from utils.embedding_cache import EmbeddingCache
+
+MODEL = "text-embedding-3-small"
+
+
+def put(cache: EmbeddingCache, texts: List[str]) -> None:
+    cache.put_many(model=MODEL, dim=2, texts=texts, vectors=[[1.0, 0.0]] * len(texts))
+
+
+def stored(path: str) -> int:
+    with sqlite3.connect(database=path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+def test_eviction_counts_entries_written_by_other_processes(tmp_path: Path) -> None:
+    path: str = str(tmp_path / "embedding_cache.sqlite")
+    # Two connections to one file, like pool workers and the server
+    first = EmbeddingCache(path=path, max_entries=4)
+    second = EmbeddingCache(path=path, max_entries=4)
+
+    put(cache=first, texts=["a", "b", "c"])
+    put(cache=second, texts=["d", "e", "f"])
+    assert stored(path=path) == 4
+    assert second.stats()["entries"] == 4
+
+    put(cache=first, texts=["g"])
+    assert stored(path=path) == 4
+    assert first.evictions == 1
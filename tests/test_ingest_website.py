@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# """
+# test_ingest_website.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+from lancedb.table import Table
+from utils.openai_stub import serve
+
+from configs import cfgs
+from src.app.embedding import (
+    compute_chunk_id,
+    get_chunk_ids,
+    ingest_website,
+    open_ingest_table,
+    to_record_batch,
+)
+
+MODEL = "text-embedding-3-small"
+PAGE = "<html><body><h1>Lance</h1><p>Lance stores vectors next to scalar columns.</p></body></html>"
+
+
+@pytest.fixture
+def site() -> Iterator[str]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            base: str = f"http://127.0.0.1:{self.server.server_port}"  # type: ignore
+            if self.path == "/sitemap.xml":
+                body: bytes = (
+                    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    f"<url><loc>{base}/lance.html</loc></url></urlset>"
+                ).encode()
+                content_type: str = "application/xml"
+            else:
+                body, content_type = PAGE.encode(), "text/html"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[None]:
+    server = serve(port=0, latency_ms=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setitem(cfgs["EMBEDDINGS"]["CACHE"], "PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setitem(cfgs["CRAWLER"], "STATE_PATH", str(tmp_path / "crawl.sqlite"))
+    yield
+    server.shutdown()
+    server.server_close()
+
+
+def row(text: str, filename: Optional[str] = None, url: Optional[str] = None) -> Dict[str, Any]:
+    metadata: Dict[str, Any] = {
+        "content_hash": "h" if url else None,
+        "fetched_at": None,
+        "filename": filename,
+        "page_numbers": None,
+        "source_url": url,
+        "title": None,
+    }
+    return {
+        "text": text,
+        "metadata": metadata,
+        "chunk_id": compute_chunk_id(text=text, metadata=metadata),
+        "filename": filename,
+        "title": None,
+        "source_url": url,
+        "page_start": None,
+        "page_end": None,
+    }
+
+
+def test_upsert_crawl_keeps_documents_and_other_sites(
+    site: str, stub: None, tmp_path: Path
+) -> None:
+    db_path: str = str(tmp_path / "db")
+    table: Table = open_ingest_table(
+        db_path=db_path, table_name="docs", llm_provider="openai", embed_model=MODEL, mode="upsert"
+    )
+    others: List[Dict[str, Any]] = [
+        row(text="A chunk of an uploaded PDF.", filename="report.pdf"),
+        row(text="A page of another site.", url="https://other.example/page.html"),
+    ]
+    table.add(data=to_record_batch(table=table, rows=others))
+    # A page of this site that is no longer in its sitemap
+    gone: Dict[str, Any] = row(text="A removed page.", url=f"{site}/removed.html")
+    table.add(data=to_record_batch(table=table, rows=[gone]))
+
+    table = ingest_website(
+        base_url=site,
+        max_tokens=256,
+        db_path=db_path,
+        table_name="docs",
+        llm_provider="openai",
+        embed_model=MODEL,
+        mode="upsert",
+    )
+
+    stored = get_chunk_ids(table=table)
+    assert {other["chunk_id"] for other in others} <= stored
+    assert gone["chunk_id"] not in stored
+    assert len(stored) > len(others)
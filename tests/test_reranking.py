@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# """
+# test_reranking.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+from typing import Dict, List
+
+from utils.reranking import BM25Reranker
+from utils.retrieval import SearchResult
+
+QUERY = "lance vector index"
+TEXTS: Dict[str, str] = {
+    "a": "The lance format stores vector columns next to scalar ones.",
+    "b": "An IVF-PQ index speeds up vector search over large tables.",
+    "c": "Full-text search uses an inverted index over tokenized chunks.",
+    "d": "Lance datasets are versioned and support time travel.",
+}
+
+
+def candidates(chunk_ids: List[str]) -> List[SearchResult]:
+    return [
+        SearchResult(text=TEXTS[chunk_id], score=0.0, chunk_id=chunk_id) for chunk_id in chunk_ids
+    ]
+
+
+def scores(results: List[SearchResult]) -> Dict[str, float]:
+    return {result.chunk_id or "": result.score for result in results}
+
+
+def test_bm25_scores_do_not_depend_on_earlier_candidate_sets() -> None:
+    fresh: Dict[str, float] = scores(
+        BM25Reranker().rerank(query=QUERY, results=candidates(["a", "b"]), top_n=2)[0]
+    )
+
+    reranker = BM25Reranker()
+    reranker.rerank(query=QUERY, results=candidates(["a", "b", "c", "d"]), top_n=4)
+    reranked, timings = reranker.rerank(query=QUERY, results=candidates(["a", "b"]), top_n=2)
+
+    # The statistics of the larger set must not leak into the smaller one
+    assert scores(reranked) == fresh
+    assert timings["cache_hits"] == 0
+
+
+def test_bm25_reuses_scores_of_the_same_candidate_set() -> None:
+    reranker = BM25Reranker()
+    first, _ = reranker.rerank(query=QUERY, results=candidates(["a", "b", "c"]), top_n=3)
+    second, timings = reranker.rerank(query=QUERY, results=candidates(["c", "b", "a"]), top_n=3)
+
+    assert scores(second) == scores(first)
+    assert timings["cache_hits"] == 3
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# """
+# test_retrieval.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+from pathlib import Path
+from typing import List
+
+import lancedb
+import pyarrow as pa
+from lancedb.table import Table
+from utils.retrieval import RetrievalConfig, federated_search
+
+
+def make_table(db: lancedb.DBConnection, name: str, texts: List[str]) -> Table:
+    table: Table = db.create_table(
+        name=name,
+        data=pa.table({"text": texts, "chunk_id": [f"{name}-{i}" for i in range(len(texts))]}),
+    )
+    table.create_fts_index("text", use_tantivy=False)
+    return table
+
+
+def test_federated_bm25_scores_are_normalized_per_table(tmp_path: Path) -> None:
+    db = lancedb.connect(uri=str(tmp_path))
+    # "lance" is rare in the large table, so its raw BM25 scores there are much
+    # higher than in the small table where every chunk mentions it
+    large: Table = make_table(
+        db=db,
+        name="large",
+        texts=["lance columnar format", "versioned datasets written by lance and read by lance"]
+        + [f"unrelated chunk number {i}" for i in range(50)],
+    )
+    small: Table = make_table(
+        db=db,
+        name="small",
+        texts=["lance tables", "lance and lance indexes", "lance search"],
+    )
+
+    results, _ = federated_search(
+        tables=[large, small], query="lance", limit=2, config=RetrievalConfig(mode="fts")
+    )
+
+    # The best chunk of each table ranks first, not only those of the large table
+    assert sorted(results.column("table").to_pylist()) == ["large", "small"]
+    assert results.column("_score").to_pylist()[0] == 1.0
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# """
+# test_tokenizer.py
+# Created on Oct 17, 2026
+# @ Author: Mazhar
+# """
+
+import pytest
+from utils import tokenizer
+from utils.tokenizer import OpenAITokenizerWrapper
+
+
+def test_count_tokens_matches_the_public_tokenize_hook() -> None:
+    wrapper = OpenAITokenizerWrapper()
+    text: str = "Docling converts PDFs, then the hybrid chunker splits them. " * 20
+
+    assert wrapper.count_tokens(text=text) == len(wrapper.tokenize(text=text))
+    assert wrapper.count_tokens_batch(texts=[text, "short"]) == [
+        wrapper.count_tokens(text=text),
+        wrapper.count_tokens(text="short"),
+    ]
+    assert wrapper.encode(text) == [int(token) for token in wrapper.tokenize(text=text)]
+
+
+def test_count_cache_keys_texts_by_digest() -> None:
+    wrapper = OpenAITokenizerWrapper()
+    text: str = "a long chunk of text " * 500
+    wrapper.count_tokens(text=text)
+
+    # The cached keys hold a fixed-size digest, never the text itself
+    assert all(len(digest) == 16 for _, digest in tokenizer._counts)
+    assert all(text not in key for key in tokenizer._counts)
+
+
+def test_encode_only_accepts_text() -> None:
+    with pytest.raises(TypeError):
+        OpenAITokenizerWrapper().encode([1, 2, 3])